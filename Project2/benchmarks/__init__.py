@@ -0,0 +1,9 @@
+# benchmarks/__init__.py
+#
+# ICS 33 Winter 2024
+# Project 2: Learning to Fly
+#
+# Initialization module for the benchmarks package.  Each benchmark is a module
+# that can be run from the project directory, e.g.:
+#
+#     python -m benchmarks.bench_dispatch
@@ -0,0 +1,154 @@
+# benchmarks/_support.py
+#
+# ICS 33 Winter 2024
+# Project 2: Learning to Fly
+#
+# Shared helpers for the benchmarks: building a small in-memory database from
+# schema.sql and attaching it to an engine, and timing a workload.
+
+import sqlite3
+import time
+from pathlib import Path
+from p2app.engine import Engine
+
+
+SCHEMA_PATH = Path(__file__).resolve().parent.parent / 'schema.sql'
+
+
+def make_memory_database(
+        countries: int = 250, regions: int = 4000, airports: int = 0,
+        navaids: int = 0, frequencies: int = 0) -> sqlite3.Connection:
+    """Creates an in-memory database with the project's schema and some sample rows."""
+    connection = sqlite3.connect(':memory:')
+    connection.executescript(SCHEMA_PATH.read_text())
+    connection.execute('PRAGMA foreign_keys = ON;')
+
+    connection.executemany(
+        'INSERT INTO continent (continent_id, continent_code, name) VALUES (?, ?, ?);',
+        [(1, 'AF', 'Africa'), (2, 'AN', 'Antarctica'), (3, 'AS', 'Asia'), (4, 'EU', 'Europe'),
+         (5, 'NA', 'North America'), (6, 'OC', 'Oceania'), (7, 'SA', 'South America')])
+
+    connection.executemany(
+        'INSERT INTO country (country_id, country_code, name, continent_id, wikipedia_link, keywords) '
+        'VALUES (?, ?, ?, ?, ?, ?);',
+        [(i, f'C{i:03}', f'Country {i}', i % 7 + 1, '', None) for i in range(1, countries + 1)])
+
+    connection.executemany(
+        'INSERT INTO region (region_id, region_code, local_code, name, continent_id, country_id, '
+        'wikipedia_link, keywords) VALUES (?, ?, ?, ?, ?, ?, ?, ?);',
+        [(i, f'C{i % countries + 1:03}-{i}', str(i), f'Region {i}', (i % countries + 1) % 7 + 1,
+          i % countries + 1, None, None) for i in range(1, regions + 1)])
+
+    connection.executemany(
+        'INSERT INTO airport (airport_id, airport_ident, type, name, latitude_deg, longitude_deg, '
+        'elevation_ft, continent_id, country_id, region_id, municipality, scheduled_service, '
+        'gps_code, iata_code, local_code, home_link, wikipedia_link, keywords) '
+        'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?);',
+        [_sample_airport(i, countries, regions) for i in range(1, airports + 1)])
+
+    connection.executemany(
+        'INSERT INTO navigation_aid (navigation_aid_id, filename, ident, name, type, frequency_khz, '
+        'latitude_deg, longitude_deg, iso_country, airport_id) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?);',
+        [_sample_navaid(i, countries, airports) for i in range(1, navaids + 1)])
+
+    connection.executemany(
+        'INSERT INTO airport_frequency (airport_frequency_id, airport_id, type, description, frequency_mhz) '
+        'VALUES (?, ?, ?, ?, ?);',
+        [_sample_frequency(i, airports) for i in range(1, frequencies + 1)])
+
+    connection.commit()
+    return connection
+
+
+def sample_word(i: int) -> str:
+    """Returns a made-up, pronounceable word that is different for every non-negative integer,
+    for use in sample names."""
+    syllables = []
+
+    while True:
+        i, syllable = divmod(i, len(_SYLLABLES))
+        syllables.append(_SYLLABLES[syllable])
+
+        if i == 0:
+            return ''.join(syllables).capitalize()
+
+
+def sample_iata_code(i: int) -> str:
+    """Returns the three-letter IATA code given to sample airport i, if it has one."""
+    return ''.join(chr(ord('A') + i // 26 ** place % 26) for place in (2, 1, 0))
+
+
+def sample_airport_name(i: int) -> str:
+    """Returns the name given to sample airport i."""
+    return f'{sample_word(i)} {_AIRPORT_KINDS[i % len(_AIRPORT_KINDS)][1]}'
+
+
+def _sample_airport(i: int, countries: int, regions: int) -> tuple:
+    """Returns the row for sample airport i: a tenth of the airports have an IATA code, half
+    have a GPS code, and every municipality has about fifteen airports."""
+    region_id = i % regions + 1
+    country_id = region_id % countries + 1
+
+    return (
+        i, f'A{i:05}', _AIRPORT_KINDS[i % len(_AIRPORT_KINDS)][0], sample_airport_name(i),
+        i * 37 % 18000 / 100 - 90, i * 91 % 36000 / 100 - 180, i % 5000,
+        country_id % 7 + 1, country_id, region_id, sample_word(i % 5000 + 100000),
+        int(i % 10 == 0), f'G{i:05}' if i % 2 == 0 else None,
+        sample_iata_code(i // 10) if i % 10 == 0 else None, None, None, None, None)
+
+
+def _sample_navaid(i: int, countries: int, airports: int) -> tuple:
+    """Returns the row for sample navigation aid i, scattered independently of the airports;
+    only a third of them are linked to an airport."""
+    return (
+        i, f'{sample_word(i)}_NAV', f'N{i:04}', f'{sample_word(i)} VOR', _NAVAID_KINDS[i % len(_NAVAID_KINDS)],
+        108000 + i % 1000 * 10, i * 53 % 17900 / 100 - 89.5, i * 71 % 35900 / 100 - 179.5,
+        f'C{i % countries + 1:03}', i % airports + 1 if airports and i % 3 == 0 else None)
+
+
+def _sample_frequency(i: int, airports: int) -> tuple:
+    """Returns the row for sample airport frequency i, on the 25 kHz channels of the VHF
+    airband, spread across the airports."""
+    kind = _FREQUENCY_KINDS[i % len(_FREQUENCY_KINDS)]
+    return (i, i % airports + 1, kind, f'{kind} {i}', (118000 + i * 7 % 549 * 25) / 1000)
+
+
+_SYLLABLES = [consonant + vowel for consonant in 'bdfgklmnprstvz' for vowel in 'aeiou']
+
+_AIRPORT_KINDS = [
+    ('small_airport', 'Airfield'), ('heliport', 'Heliport'), ('small_airport', 'Airstrip'),
+    ('medium_airport', 'Airport'), ('closed', 'Field')
+]
+
+
+_FREQUENCY_KINDS = ['CTAF', 'TWR', 'GND', 'ATIS', 'UNIC', 'APP']
+
+_NAVAID_KINDS = ['VOR', 'VOR-DME', 'NDB', 'VORTAC', 'DME', 'TACAN']
+
+
+def attach_database(engine: Engine, connection: sqlite3.Connection) -> Engine:
+    """Makes the given connection the engine's open database, bypassing OpenDatabaseEvent
+    (which needs a path on disk), but preparing the engine the same way."""
+    engine._connections.attach(connection)
+    engine._reference_tables.load(connection)
+    engine._nearby_airports.load(connection)
+    engine._airports.prepare(connection)
+    return engine
+
+
+def events_per_second(process_event, events: list, repeat: int = 5) -> float:
+    """Runs every event through process_event, draining its results, and returns the
+    best observed throughput across the given number of repetitions."""
+    best = 0.0
+
+    for _ in range(repeat):
+        start = time.perf_counter()
+
+        for event in events:
+            for _ in process_event(event):
+                pass
+
+        elapsed = time.perf_counter() - start
+        best = max(best, len(events) / elapsed)
+
+    return best
@@ -0,0 +1,90 @@
+# benchmarks/bench_airport_search.py
+#
+# ICS 33 Winter 2024
+# Project 2: Learning to Fly
+#
+# Measures the latency of every kind of airport search on a table the size of
+# the full OurAirports data set, and fails if any search takes longer than the
+# latency budget.  The indexes the searches rely on are the ones the engine creates
+# when it opens a database, along with the full-text index that prefix and ranked
+# name searches need; the rest of the curated indexes aren't created.
+#
+#     python -m benchmarks.bench_airport_search
+
+import statistics
+import sys
+import time
+from p2app.engine import Engine
+from p2app.events import *
+from benchmarks._support import (
+    attach_database, make_memory_database, sample_airport_name, sample_iata_code, sample_word)
+
+
+AIRPORTS = 75_000
+SEARCHES_PER_KIND = 200
+PAGE_SIZE = 100
+LATENCY_BUDGET_MS = 20.0
+
+
+def make_searches() -> dict[str, list[StartAirportSearchEvent]]:
+    """Returns, for each kind of search the engine supports, a list of searches for
+    different airports, each asking for the first page of results as the user
+    interface does."""
+    def searches(make_criteria, match_mode = MATCH_EXACT):
+        return [
+            StartAirportSearchEvent(*make_criteria(i), PAGE_SIZE, None, match_mode)
+            for i in range(1, AIRPORTS, AIRPORTS // SEARCHES_PER_KIND)
+        ]
+
+    return {
+        'airport_ident': searches(lambda i: (f'A{i:05}', None, None, None, None)),
+        'iata_code': searches(lambda i: (None, sample_iata_code(i // 10), None, None, None)),
+        'gps_code': searches(lambda i: (None, None, f'G{i // 2 * 2:05}', None, None)),
+        'municipality': searches(lambda i: (None, None, None, sample_word(i % 5000 + 100000), None)),
+        'name (exact)': searches(lambda i: (None, None, None, None, sample_airport_name(i))),
+        'name (prefix)': searches(lambda i: (None, None, None, None, sample_word(i)[:4]), MATCH_PREFIX),
+        'name (ranked)': searches(lambda i: (None, None, None, None, sample_word(i)), MATCH_RANKED)
+    }
+
+
+def latencies_ms(engine: Engine, events: list) -> list[float]:
+    """Runs each event through the engine, draining its results, and returns how long
+    each one took in milliseconds."""
+    latencies = []
+
+    for event in events:
+        start = time.perf_counter()
+
+        for _ in engine.process_event(event):
+            pass
+
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    return latencies
+
+
+def main():
+    engine = attach_database(Engine(), make_memory_database(airports = AIRPORTS))
+
+    for event in (BuildFullTextIndexEvent(), AnalyzeDatabaseEvent()):
+        for _ in engine.process_event(event):
+            pass
+
+    print(f'{"search":16} {"median ms":>10} {"max ms":>10}')
+    is_within_budget = True
+
+    for kind, events in make_searches().items():
+        latencies = latencies_ms(engine, events)
+        worst = max(latencies)
+        is_within_budget = is_within_budget and worst < LATENCY_BUDGET_MS
+        print(f'{kind:16} {statistics.median(latencies):10.3f} {worst:10.3f}')
+
+    if is_within_budget:
+        print(f'every search finished within {LATENCY_BUDGET_MS} ms')
+    else:
+        print(f'some searches took longer than {LATENCY_BUDGET_MS} ms')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+# benchmarks/bench_dispatch.py
+#
+# ICS 33 Winter 2024
+# Project 2: Learning to Fly
+#
+# Compares the engine's type-keyed dispatch registry against the broadcast
+# strategy it replaced, where every event built fresh Continents, Countries and
+# Regions objects and offered the event to each of them in turn.
+#
+# The table engines the broadcast strategy called no longer exist, so it's rebuilt
+# here on top of today's table engines.  Both strategies run through the engine's
+# real process_event, so they pay the same per-event bookkeeping (timing, error
+# handling, borrowing a connection, and making searches cancellable), and the
+# difference between them is only the cost of finding an event's handler.
+#
+#     python -m benchmarks.bench_dispatch
+
+from p2app.engine import Engine
+from p2app.engine.continents_engine import Continents
+from p2app.engine.countries_engine import Countries
+from p2app.engine.regions_engine import Regions
+from p2app.events import *
+from benchmarks._support import attach_database, events_per_second, make_memory_database
+
+
+
+class BroadcastHandlers:
+    """Stands in for an engine's handler registry, finding an event's handler the way the
+    engine used to: building all three table engines per event and checking the event
+    against each of their event types.  The handler it returns runs every match."""
+
+    def __init__(self, engine: Engine):
+        """Initializes the handlers, which share the engine's entity cache and reference tables"""
+        self._engine = engine
+
+    def get(self, event_type: type) -> 'callable':
+        """Returns the handler for events of the given type."""
+        table_engines = (
+            Continents(self._engine._cache, self._engine._reference_tables),
+            Countries(self._engine._cache, self._engine._reference_tables),
+            Regions(self._engine._cache, self._engine._reference_tables))
+
+        handlers = [
+            handler
+            for table_engine in table_engines
+            for handled_type, handler in table_engine.handlers().items()
+            if issubclass(event_type, handled_type)
+        ]
+
+        def handle(connection, event):
+            for handler in handlers:
+                yield from handler(connection, event)
+
+        return handle
+
+
+def make_workload() -> list:
+    """Returns a mix of loads and code searches spread across the three tables, all of
+    which are primary key or UNIQUE lookups, so dispatch makes up a visible share of
+    the cost of each event."""
+    events = []
+
+    for i in range(1, 201):
+        events.append(LoadContinentEvent(i % 7 + 1))
+        events.append(LoadCountryEvent(i % 250 + 1))
+        events.append(LoadRegionEvent(i * 17 % 4000 + 1))
+        events.append(StartContinentSearchEvent('EU', None))
+        events.append(StartCountrySearchEvent(f'C{i % 250 + 1:03}', None))
+        events.append(StartRegionSearchEvent(f'C{i % 250 + 1:03}-{i}', None, None))
+
+    return events
+
+
+def main():
+    engine = attach_database(Engine(), make_memory_database())
+    broadcast_engine = attach_database(Engine(), make_memory_database())
+    broadcast_engine._handlers = BroadcastHandlers(broadcast_engine)
+    events = make_workload()
+
+    before = events_per_second(broadcast_engine.process_event, events)
+    after = events_per_second(engine.process_event, events)
+
+    print(f'broadcast dispatch : {before:12,.0f} events/s')
+    print(f'registry dispatch  : {after:12,.0f} events/s')
+    print(f'speedup            : {after / before:12.2f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+# benchmarks/bench_frequency_search.py
+#
+# ICS 33 Winter 2024
+# Project 2: Learning to Fly
+#
+# Compares finding the frequencies within a range using the frequency index
+# against a query that scans both the airport_frequency and navigation_aid
+# tables, and measures how long the index takes to build.
+#
+#     python -m benchmarks.bench_frequency_search
+
+import random
+import time
+from p2app.engine import Engine
+from p2app.events import FindFrequenciesEvent, FrequencyFoundEvent
+from benchmarks._support import attach_database, make_memory_database
+
+
+AIRPORTS = 70_000
+NAVAIDS = 11_000
+FREQUENCIES = 30_000
+QUERIES = 200
+RANGE_MHZ = 0.1
+
+
+def scanned(connection, low: float, high: float) -> list:
+    """Finds the frequencies in a range by scanning both tables."""
+    return connection.execute(
+        "SELECT 'airport_frequency', airport_frequency_id, frequency_mhz FROM airport_frequency "
+        'WHERE frequency_mhz BETWEEN ? AND ? '
+        'UNION ALL '
+        "SELECT 'navigation_aid', navigation_aid_id, frequency_khz / 1000.0 FROM navigation_aid "
+        'WHERE frequency_khz / 1000.0 BETWEEN ? AND ? '
+        'ORDER BY 3, 1, 2;',
+        (low, high, low, high)).fetchall()
+
+
+def indexed(engine: Engine, low: float, high: float) -> list:
+    """Finds the (source, record id) of the frequencies in a range using the frequency index."""
+    return [
+        (event.match().source, event.match().record_id, event.match().frequency_mhz)
+        for event in engine.process_event(FindFrequenciesEvent(low, high))
+        if isinstance(event, FrequencyFoundEvent)
+    ]
+
+
+def main():
+    connection = make_memory_database(airports = AIRPORTS, navaids = NAVAIDS, frequencies = FREQUENCIES)
+    engine = attach_database(Engine(), connection)
+
+    start = time.perf_counter()
+    indexed(engine, 0, 0)
+    build_ms = (time.perf_counter() - start) * 1000
+
+    generator = random.Random(33)
+    ranges = [(low, low + RANGE_MHZ) for low in (round(generator.uniform(108, 137), 3) for _ in range(QUERIES))]
+
+    start = time.perf_counter()
+    expected = [scanned(connection, low, high) for low, high in ranges]
+    scanned_ms = (time.perf_counter() - start) * 1000 / QUERIES
+
+    start = time.perf_counter()
+    found = [indexed(engine, low, high) for low, high in ranges]
+    indexed_ms = (time.perf_counter() - start) * 1000 / QUERIES
+
+    if found != expected:
+        raise AssertionError('the frequency index and the table scan disagree')
+
+    matches = sum(len(result) for result in found) / QUERIES
+    print(f'{FREQUENCIES:,} airport frequencies, {NAVAIDS:,} navaids, {RANGE_MHZ:g} MHz ranges, {matches:.0f} matches each')
+    print(f'index build      {build_ms:8.2f} ms (once)')
+    print(f'table scan       {scanned_ms:8.3f} ms per range')
+    print(f'frequency index  {indexed_ms:8.3f} ms per range')
+    print(f'speedup          {scanned_ms / indexed_ms:8.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+# benchmarks/bench_navaid_proximity.py
+#
+# ICS 33 Winter 2024
+# Project 2: Learning to Fly
+#
+# Times building the navaid proximity table against a double loop that measures
+# the distance from every airport to every navigation aid.  The double loop is
+# only run over a sample of the airports, then scaled up to all of them.
+#
+#     python -m benchmarks.bench_navaid_proximity
+
+import time
+from p2app.engine import Engine
+from p2app.engine.spatial import haversine_km
+from p2app.events import BuildNavaidProximityEvent
+from benchmarks._support import attach_database, make_memory_database
+
+
+AIRPORTS = 70_000
+NAVAIDS = 11_000
+RADIUS_KM = 50.0
+SAMPLED_AIRPORTS = 200
+
+
+def double_loop(airports: list, navaids: list, radius_km: float) -> set:
+    """Finds every (airport, navigation aid) pair within the distance by measuring the
+    distance between every airport and every navigation aid."""
+    pairs = set()
+
+    for airport_id, airport_latitude, airport_longitude in airports:
+        for navaid_id, navaid_latitude, navaid_longitude in navaids:
+            if haversine_km(airport_latitude, airport_longitude, navaid_latitude, navaid_longitude) <= radius_km:
+                pairs.add((airport_id, navaid_id))
+
+    return pairs
+
+
+def main():
+    connection = make_memory_database(airports = AIRPORTS, navaids = NAVAIDS)
+    engine = attach_database(Engine(), connection)
+
+    start = time.perf_counter()
+    results = list(engine.process_event(BuildNavaidProximityEvent(RADIUS_KM)))
+    indexed_seconds = time.perf_counter() - start
+
+    airports = connection.execute(
+        'SELECT airport_id, latitude_deg, longitude_deg FROM airport ORDER BY airport_id LIMIT ?;',
+        (SAMPLED_AIRPORTS, )).fetchall()
+
+    navaids = connection.execute(
+        'SELECT navigation_aid_id, latitude_deg, longitude_deg FROM navigation_aid;').fetchall()
+
+    start = time.perf_counter()
+    expected = double_loop(airports, navaids, RADIUS_KM)
+    linear_seconds = (time.perf_counter() - start) * AIRPORTS / SAMPLED_AIRPORTS
+
+    found = set(connection.execute(
+        'SELECT airport_id, navigation_aid_id FROM airport_navaid_proximity WHERE airport_id <= ?;',
+        (SAMPLED_AIRPORTS, )).fetchall())
+
+    if found != expected:
+        raise AssertionError('the navaid proximity table and the double loop disagree')
+
+    print(f'{AIRPORTS:,} airports, {NAVAIDS:,} navaids, within {RADIUS_KM:g} km: {results[-1]}')
+    print(f'double loop (estimated) {linear_seconds:8.2f} s')
+    print(f'spatial index           {indexed_seconds:8.2f} s')
+    print(f'speedup                 {linear_seconds / indexed_seconds:8.1f}x')
+
+
+if __name__ == '__main__':
+    main()
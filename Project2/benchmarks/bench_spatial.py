@@ -0,0 +1,83 @@
+# benchmarks/bench_spatial.py
+#
+# ICS 33 Winter 2024
+# Project 2: Learning to Fly
+#
+# Compares the spatial index's nearest-airport and radius queries against a
+# linear scan that measures the distance to every airport.
+#
+#     python -m benchmarks.bench_spatial
+
+import random
+import time
+from p2app.engine.spatial import SpatialIndex, haversine_km
+from benchmarks._support import make_memory_database
+
+
+AIRPORTS = 75_000
+QUERIES = 50
+NEAREST_COUNT = 10
+RADIUS_KM = 100.0
+
+
+def linear_nearest(points: list, latitude_deg: float, longitude_deg: float, count: int) -> list:
+    """Finds the nearest points by measuring the distance to every one of them."""
+    return sorted(
+        (haversine_km(latitude_deg, longitude_deg, point_latitude, point_longitude), point_id)
+        for point_id, point_latitude, point_longitude in points)[:count]
+
+
+def linear_within(points: list, latitude_deg: float, longitude_deg: float, radius_km: float) -> list:
+    """Finds the points within a distance by measuring the distance to every one of them."""
+    found = []
+
+    for point_id, point_latitude, point_longitude in points:
+        distance = haversine_km(latitude_deg, longitude_deg, point_latitude, point_longitude)
+
+        if distance <= radius_km:
+            found.append((distance, point_id))
+
+    return sorted(found)
+
+
+def milliseconds_per_query(query, coordinates: list) -> tuple[float, list]:
+    """Runs the query at each coordinate, returning the average time per query in
+    milliseconds along with the results."""
+    start = time.perf_counter()
+    results = [query(latitude_deg, longitude_deg) for latitude_deg, longitude_deg in coordinates]
+    return (time.perf_counter() - start) * 1000 / len(coordinates), results
+
+
+def main():
+    connection = make_memory_database(airports = AIRPORTS)
+    points = connection.execute('SELECT airport_id, latitude_deg, longitude_deg FROM airport;').fetchall()
+
+    index = SpatialIndex()
+    index.load(points)
+
+    generator = random.Random(33)
+    coordinates = [(generator.uniform(-80, 80), generator.uniform(-180, 180)) for _ in range(QUERIES)]
+
+    comparisons = [
+        (f'{NEAREST_COUNT} nearest',
+         lambda latitude, longitude: linear_nearest(points, latitude, longitude, NEAREST_COUNT),
+         lambda latitude, longitude: index.nearest(latitude, longitude, NEAREST_COUNT)),
+        (f'within {RADIUS_KM:g} km',
+         lambda latitude, longitude: linear_within(points, latitude, longitude, RADIUS_KM),
+         lambda latitude, longitude: index.within(latitude, longitude, RADIUS_KM))
+    ]
+
+    print(f'{"query":16} {"linear ms":>10} {"indexed ms":>11} {"speedup":>9}')
+
+    for name, linear_query, indexed_query in comparisons:
+        linear_ms, linear_results = milliseconds_per_query(linear_query, coordinates)
+        indexed_ms, indexed_results = milliseconds_per_query(indexed_query, coordinates)
+
+        if linear_results != indexed_results:
+            raise AssertionError(f'{name}: the spatial index and the linear scan disagree')
+
+        print(f'{name:16} {linear_ms:10.3f} {indexed_ms:11.3f} {linear_ms / indexed_ms:8.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,419 @@
+# benchmarks/generate_database.py
+#
+# ICS 33 Winter 2024
+# Project 2: Learning to Fly
+#
+# Generates a synthetic database with the schema in schema.sql, at a chosen
+# multiple of the size of the stock airport.db, for load testing the engine well
+# beyond the size of the real data.
+#
+#     python -m benchmarks.generate_database OUTPUT [--scale 10] [--seed 33]
+#
+# Every foreign key refers to a row that exists: each region belongs to a country,
+# each airport to a region of that country (and that country's continent), and
+# each runway, frequency, and linked navigation aid to an airport.  The data is
+# shaped like the real data: a few countries hold most of the airports, airports
+# cluster around their regions, most airports are small airfields and heliports,
+# and runways, frequencies, and navigation aids are concentrated at the larger
+# airports.  Rows are generated and inserted a chunk at a time, so the memory used
+# doesn't grow with the scale.
+
+import argparse
+import itertools
+import math
+import random
+import sqlite3
+import time
+from pathlib import Path
+from benchmarks._support import SCHEMA_PATH
+
+
+# The approximate number of rows in each table of the stock airport.db; a scale of 1
+# generates about this many.  There are always exactly seven continents.
+BASE_COUNTS = {
+    'country': 249,
+    'region': 3960,
+    'airport': 75000
+}
+
+CONTINENTS = [
+    (1, 'AF', 'Africa'), (2, 'AN', 'Antarctica'), (3, 'AS', 'Asia'), (4, 'EU', 'Europe'),
+    (5, 'NA', 'North America'), (6, 'OC', 'Oceania'), (7, 'SA', 'South America')
+]
+
+# The rough center of each continent, from which its countries' centers are scattered.
+_CONTINENT_CENTERS = {
+    1: (5.0, 20.0), 2: (-78.0, 0.0), 3: (30.0, 95.0), 4: (50.0, 15.0),
+    5: (40.0, -95.0), 6: (-25.0, 140.0), 7: (-15.0, -60.0)
+}
+
+# How likely a country is to be on each continent (Antarctica has very few).
+_CONTINENT_WEIGHTS = [54, 1, 50, 52, 40, 25, 14]
+
+# Each airport type, how common it is, the word its names end with, and the chance
+# that it has a runway, the number of frequencies it has on average, and the number of
+# navigation aids near it on average.
+_AIRPORT_TYPES = [
+    ('small_airport', 0.55, 'Airfield', 0.70, 0.25, 0.12),
+    ('heliport', 0.24, 'Heliport', 0.50, 0.02, 0.02),
+    ('closed', 0.13, 'Field', 0.30, 0.0, 0.05),
+    ('medium_airport', 0.06, 'Airport', 1.0, 2.5, 1.0),
+    ('seaplane_base', 0.014, 'Seaplane Base', 0.6, 0.1, 0.05),
+    ('large_airport', 0.0055, 'International Airport', 1.0, 6.0, 3.0),
+    ('balloonport', 0.0005, 'Balloonport', 0.0, 0.0, 0.0)
+]
+
+_RUNWAY_SURFACES = [
+    ('ASP', 30), ('TURF', 22), ('CON', 10), ('GRVL', 9), ('GRASS', 6), ('DIRT', 5),
+    ('ASPH', 4), ('UNK', 3), ('PEM', 2), ('SAND', 1), ('WATER', 1), (None, 7)
+]
+
+_FREQUENCY_TYPES = [('CTAF', 30), ('UNIC', 20), ('TWR', 15), ('GND', 12), ('ATIS', 10), ('APP', 8), ('DEP', 5)]
+
+_NAVAID_TYPES = [('VOR-DME', 30), ('NDB', 30), ('DME', 15), ('VOR', 10), ('VORTAC', 10), ('TACAN', 5)]
+
+_SYLLABLES = [consonant + vowel for consonant in 'bdfghklmnprstvwz' for vowel in 'aeiou'] + \
+             ['an', 'el', 'or', 'is', 'un', 'ar', 'en']
+
+# The number of rows inserted by each executemany.
+_CHUNK_SIZE = 10000
+
+# The chance that a navigation aid near an airport is linked to it.
+_NAVAID_LINK_CHANCE = 0.4
+
+
+
+class Generator:
+    """Generates the rows of each table from a seeded random number generator, so the same
+    scale and seed always generate the same database."""
+
+    def __init__(self, scale: float, seed: int):
+        self._random = random.Random(seed)
+        self._scale = scale
+        self._countries = []
+        self._regions_by_country = {}
+        self._icao_count = 0
+        self._iata_count = 0
+        self._runway_id = 0
+        self._frequency_id = 0
+        self._navaid_id = 0
+
+    def countries(self) -> list[tuple]:
+        """Returns the country rows, remembering each country's continent, center, spread, and
+        share of the airports.  The shares follow Zipf's law, as the real ones roughly do."""
+        count = max(1, round(BASE_COUNTS['country'] * self._scale))
+        shares = [1 / (rank + 1) ** 1.1 for rank in range(count)]
+        self._random.shuffle(shares)
+        total_share = sum(shares)
+        rows = []
+
+        for index in range(count):
+            country_id = index + 1
+            code = _letters(index, 2)
+            name = self._name(2)
+            continent_id = self._random.choices(range(1, 8), _CONTINENT_WEIGHTS)[0]
+            share = shares[index] / total_share
+            center = self._scatter(_CONTINENT_CENTERS[continent_id], 15.0)
+            spread = min(20.0, 1.0 + 60.0 * math.sqrt(share))
+
+            self._countries.append((country_id, code, continent_id, share, center, spread))
+
+            rows.append((
+                country_id, code, name, continent_id, _wikipedia_link(name),
+                self._name(1) if self._random.random() < 0.1 else None))
+
+        return rows
+
+    def regions(self) -> list[tuple]:
+        """Returns the region rows: every country has at least one, and the rest are shared
+        out in proportion to the square root of the countries' shares of the airports."""
+        count = max(len(self._countries), round(BASE_COUNTS['region'] * self._scale))
+        weights = [math.sqrt(country[3]) for country in self._countries]
+        extra = _apportion(count - len(self._countries), weights)
+        rows = []
+        region_id = 0
+
+        for (country_id, country_code, continent_id, share, center, spread), extra_count in zip(self._countries, extra):
+            regions = []
+
+            for local_index in range(1 + extra_count):
+                region_id += 1
+                local_code = str(local_index + 1) if local_index < 99 else _letters(local_index, 2)
+                name = self._name(self._random.choice((1, 1, 2)))
+                region_center = self._scatter(center, spread)
+                municipalities = [self._name(1) for _ in range(self._random.randint(3, 30))]
+                regions.append((region_id, continent_id, region_center, spread / 3, municipalities))
+
+                rows.append((
+                    region_id, f'{country_code}-{local_code}', local_code, name, continent_id, country_id,
+                    _wikipedia_link(name) if self._random.random() < 0.7 else None, None))
+
+            self._regions_by_country[country_id] = regions
+
+        return rows
+
+    def airports(self) -> 'Iterator[tuple[tuple, list, list, list]]':
+        """Yields, for every airport, its row along with the rows of its runways, its
+        frequencies, and the navigation aids near it."""
+        count = round(BASE_COUNTS['airport'] * self._scale)
+        per_country = _apportion(count, [country[3] for country in self._countries])
+        type_weights = [airport_type[1] for airport_type in _AIRPORT_TYPES]
+        airport_id = 0
+
+        for country, country_count in zip(self._countries, per_country):
+            country_id, country_code, continent_id = country[:3]
+            regions = self._regions_by_country[country_id]
+            region_weights = [1 / (rank + 1) for rank in range(len(regions))]
+
+            for local_number in range(1, country_count + 1):
+                airport_id += 1
+                airport_type = self._random.choices(_AIRPORT_TYPES, type_weights)[0]
+                region = self._random.choices(regions, region_weights)[0]
+
+                airport = self._airport(
+                    airport_id, local_number, airport_type, country_id, country_code, region)
+
+                yield (
+                    airport, self._runways(airport, airport_type), self._frequencies(airport, airport_type),
+                    self._navaids(airport, airport_type, country_code))
+
+    def _airport(
+            self, airport_id: int, local_number: int, airport_type: tuple, country_id: int,
+            country_code: str, region: tuple) -> tuple:
+        """Returns one airport's row."""
+        type_name, _, kind = airport_type[:3]
+        region_id, continent_id, center, spread, municipalities = region
+        latitude, longitude = self._scatter(center, spread)
+        municipality = self._random.choice(municipalities) if self._random.random() < 0.9 else None
+        is_major = type_name in ('large_airport', 'medium_airport')
+
+        if is_major or self._random.random() < 0.15:
+            ident = _letters(self._icao_count, 4)
+            self._icao_count += 1
+            gps_code = ident
+        else:
+            ident = f'{country_code}-{local_number:04}'
+            gps_code = None
+
+        if type_name == 'large_airport' or (type_name == 'medium_airport' and self._random.random() < 0.6):
+            iata_code = _letters(self._iata_count % 26 ** 3, 3)
+            self._iata_count += 1
+        else:
+            iata_code = None
+
+        scheduled_service = int(
+            type_name == 'large_airport' or (type_name == 'medium_airport' and self._random.random() < 0.6)
+            or (type_name == 'small_airport' and self._random.random() < 0.02))
+
+        name = f'{municipality or self._name(1)} {kind}'
+
+        return (
+            airport_id, ident, type_name, name, round(latitude, 6), round(longitude, 6),
+            None if self._random.random() < 0.05 else int(abs(self._random.gauss(0, 1500))),
+            continent_id, country_id, region_id, municipality, scheduled_service, gps_code, iata_code,
+            f'{self._random.randint(0, 99):02}{_letters(self._random.randrange(676), 2)}'
+                if self._random.random() < 0.3 else None,
+            f'https://www.{name.split()[0].lower()}-airport.example' if is_major and self._random.random() < 0.3 else None,
+            _wikipedia_link(name) if is_major and self._random.random() < 0.5 else None,
+            self._name(1) if self._random.random() < 0.05 else None)
+
+    def _runways(self, airport: tuple, airport_type: tuple) -> list[tuple]:
+        """Returns the rows of an airport's runways."""
+        type_name, runway_chance = airport_type[0], airport_type[3]
+
+        if self._random.random() >= runway_chance:
+            return []
+
+        if type_name == 'large_airport':
+            count, length_range = self._random.randint(2, 4), (7000, 13000)
+        elif type_name == 'medium_airport':
+            count, length_range = self._random.randint(1, 2), (4000, 9000)
+        elif type_name == 'heliport':
+            count, length_range = 1, (40, 100)
+        else:
+            count, length_range = 1 if self._random.random() < 0.85 else 2, (1200, 5000)
+
+        rows = []
+
+        for _ in range(count):
+            self._runway_id += 1
+            heading = self._random.randint(1, 18)
+            length = self._random.randint(*length_range)
+
+            if type_name == 'heliport':
+                surface, le_ident, he_ident = self._random.choice(('CON', 'ASP', 'TURF')), 'H1', None
+            elif type_name == 'seaplane_base':
+                surface, le_ident, he_ident = 'WATER', f'{heading:02}W', f'{heading + 18:02}W'
+            else:
+                surface = self._random.choices(*zip(*_RUNWAY_SURFACES))[0]
+                le_ident, he_ident = f'{heading:02}', f'{heading + 18:02}'
+
+            lighted_chance = 0.95 if type_name in ('large_airport', 'medium_airport') else 0.2
+
+            rows.append((
+                self._runway_id, airport[0], length, max(20, int(length / self._random.uniform(25, 60))), surface,
+                int(self._random.random() < lighted_chance), int(type_name == 'closed'),
+                le_ident, heading * 10.0, he_ident))
+
+        return rows
+
+    def _frequencies(self, airport: tuple, airport_type: tuple) -> list[tuple]:
+        """Returns the rows of an airport's frequencies, on the 25 kHz channels of the VHF airband."""
+        rows = []
+
+        for _ in range(self._poisson(airport_type[4])):
+            self._frequency_id += 1
+            frequency_type = self._random.choices(*zip(*_FREQUENCY_TYPES))[0]
+            frequency_mhz = round(118 + self._random.randrange(760) * 0.025, 3)
+            rows.append((self._frequency_id, airport[0], frequency_type, f'{airport[3]} {frequency_type}', frequency_mhz))
+
+        return rows
+
+    def _navaids(self, airport: tuple, airport_type: tuple, country_code: str) -> list[tuple]:
+        """Returns the rows of the navigation aids near an airport, within about 30 km of it."""
+        rows = []
+
+        for _ in range(self._poisson(airport_type[5])):
+            self._navaid_id += 1
+            navaid_type = self._random.choices(*zip(*_NAVAID_TYPES))[0]
+            ident = _letters(self._random.randrange(26 ** 3), 3)
+            name = self._name(1)
+            latitude, longitude = self._scatter((airport[4], airport[5]), 0.15)
+
+            if navaid_type == 'NDB':
+                frequency_khz = self._random.randint(190, 1750)
+            else:
+                frequency_khz = 108000 + self._random.randrange(200) * 50
+
+            rows.append((
+                self._navaid_id, f'{name}_{navaid_type}_{country_code}', ident, name, navaid_type, frequency_khz,
+                round(latitude, 6), round(longitude, 6), airport[6], country_code,
+                airport[0] if self._random.random() < _NAVAID_LINK_CHANCE else None))
+
+        return rows
+
+    def _name(self, words: int) -> str:
+        """Returns a made-up name of the given number of words, each two or three syllables long."""
+        return ' '.join(
+            ''.join(self._random.choices(_SYLLABLES, k = self._random.choice((2, 2, 3)))).capitalize()
+            for _ in range(words))
+
+    def _scatter(self, center: tuple[float, float], spread: float) -> tuple[float, float]:
+        """Returns a point scattered normally around a center, by the given number of degrees,
+        kept within the valid ranges of latitude and longitude."""
+        latitude = max(-89.9, min(89.9, self._random.gauss(center[0], spread)))
+        longitude = (self._random.gauss(center[1], spread) + 180) % 360 - 180
+        return latitude, longitude
+
+    def _poisson(self, mean: float) -> int:
+        """Returns a random count with a Poisson distribution and the given mean."""
+        limit = math.exp(-mean)
+        count = 0
+        product = self._random.random()
+
+        while product > limit:
+            count += 1
+            product *= self._random.random()
+
+        return count
+
+
+def _letters(index: int, minimum_length: int) -> str:
+    """Returns a distinct string of capital letters for every non-negative index, at least
+    the given length: every code of that length comes first, then every longer one."""
+    length = minimum_length
+
+    while index >= 26 ** length:
+        index -= 26 ** length
+        length += 1
+
+    return ''.join(chr(ord('A') + index // 26 ** place % 26) for place in reversed(range(length)))
+
+
+def _apportion(total: int, weights: list[float]) -> list[int]:
+    """Divides a total into whole parts in proportion to the weights, by largest remainder."""
+    weight_sum = sum(weights)
+    exact = [total * weight / weight_sum for weight in weights]
+    parts = [int(share) for share in exact]
+    by_remainder = sorted(range(len(weights)), key = lambda index: exact[index] - parts[index], reverse = True)
+
+    for index in by_remainder[:total - sum(parts)]:
+        parts[index] += 1
+
+    return parts
+
+
+def _wikipedia_link(name: str) -> str:
+    return f'https://en.wikipedia.org/wiki/{name.replace(" ", "_")}'
+
+
+_INSERT_STATEMENTS = {
+    'continent': 'INSERT INTO continent VALUES (?, ?, ?);',
+    'country': 'INSERT INTO country VALUES (?, ?, ?, ?, ?, ?);',
+    'region': 'INSERT INTO region VALUES (?, ?, ?, ?, ?, ?, ?, ?);',
+    'airport': 'INSERT INTO airport VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?);',
+    'runway': 'INSERT INTO runway (runway_id, airport_id, length_ft, width_ft, surface, lighted, closed, '
+              'le_ident, le_heading_deg, he_ident) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?);',
+    'airport_frequency': 'INSERT INTO airport_frequency VALUES (?, ?, ?, ?, ?);',
+    'navigation_aid': 'INSERT INTO navigation_aid (navigation_aid_id, filename, ident, name, type, '
+                      'frequency_khz, latitude_deg, longitude_deg, elevation_ft, iso_country, airport_id) '
+                      'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?);'
+}
+
+
+def generate(path: Path, scale: float, seed: int) -> dict[str, int]:
+    """Creates a database at the given path, which must not already exist, returning the
+    number of rows generated for each table."""
+    connection = sqlite3.connect(path)
+    connection.executescript(SCHEMA_PATH.read_text())
+    connection.execute('PRAGMA journal_mode = OFF;')
+    connection.execute('PRAGMA synchronous = OFF;')
+
+    generator = Generator(scale, seed)
+    counts = dict.fromkeys(_INSERT_STATEMENTS, 0)
+
+    def insert(table: str, rows: list[tuple]) -> None:
+        connection.executemany(_INSERT_STATEMENTS[table], rows)
+        counts[table] += len(rows)
+
+    with connection:
+        insert('continent', CONTINENTS)
+        insert('country', generator.countries())
+        insert('region', generator.regions())
+
+    airports = generator.airports()
+
+    while chunk := list(itertools.islice(airports, _CHUNK_SIZE)):
+        with connection:
+            insert('airport', [airport for airport, runways, frequencies, navaids in chunk])
+            insert('runway', [runway for airport, runways, frequencies, navaids in chunk for runway in runways])
+            insert('airport_frequency', [row for airport, runways, frequencies, navaids in chunk for row in frequencies])
+            insert('navigation_aid', [row for airport, runways, frequencies, navaids in chunk for row in navaids])
+
+    connection.close()
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description = 'Generates a synthetic airport database.')
+    parser.add_argument('output', type = Path, help = 'the database file to create')
+    parser.add_argument('--scale', type = float, default = 1.0, help = 'a multiple of the stock airport.db\'s size')
+    parser.add_argument('--seed', type = int, default = 33, help = 'the seed of the random number generator')
+    arguments = parser.parse_args()
+
+    if arguments.output.exists():
+        parser.error(f'{arguments.output} already exists')
+    elif arguments.scale <= 0:
+        parser.error('the scale must be greater than zero')
+
+    start = time.perf_counter()
+    counts = generate(arguments.output, arguments.scale, arguments.seed)
+
+    for table, count in counts.items():
+        print(f'{table:18} {count:12,} rows')
+
+    print(f'generated in {time.perf_counter() - start:.1f} s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+# benchmarks/replay.py
+#
+# ICS 33 Winter 2024
+# Project 2: Learning to Fly
+#
+# Replays a log of the events a user session sent to the engine (as recorded
+# from the Debug menu) against a copy of a database, with no user interface,
+# then reports the throughput and the latency of each event type.  The result
+# events can be written to a file, so two versions of the engine can be compared
+# by diffing what they produced for the same session (the location of the
+# database's copy is written as <copy>, so it doesn't differ between runs).
+#
+#     python -m benchmarks.replay session.jsonl airport.db [--results results.txt]
+#
+# The events are replayed one after another, as fast as the engine can process
+# them, rather than at the pace they were recorded.  Any database the session
+# opened is replaced by the copy, so the original database is never changed.
+
+import argparse
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+from p2app.engine import Engine
+from p2app.engine.timing import TimingStatistics
+from p2app.events import *
+from p2app.events.recording import read_recording
+
+
+def copy_database(source: Path, target: Path) -> None:
+    """Copies a database, including anything still in its write-ahead log, using SQLite's
+    backup API, which never writes to the source."""
+    source_connection = sqlite3.connect(f'{source.resolve().as_uri()}?mode=ro', uri = True)
+    target_connection = sqlite3.connect(target)
+
+    try:
+        source_connection.backup(target_connection)
+    finally:
+        source_connection.close()
+        target_connection.close()
+
+
+def replay(engine: Engine, events: list, database: Path, results_file) -> tuple[TimingStatistics, float]:
+    """Processes each event with the engine, opening the database first unless the session
+    begins by opening one, and returns the timing of each event type along with the total
+    time taken.  Each event and its results are written to the results file, if given."""
+    timing = TimingStatistics()
+
+    if not events or not isinstance(events[0], OpenDatabaseEvent):
+        events = [OpenDatabaseEvent(database)] + events
+
+    start = time.perf_counter()
+
+    for event in events:
+        if isinstance(event, OpenDatabaseEvent):
+            event = OpenDatabaseEvent(database, event.profile_name())
+
+        event_start = time.perf_counter()
+        results = list(engine.process_event(event))
+        timing.record(TIMING_KIND_EVENT, type(event).__name__, time.perf_counter() - event_start, len(results))
+
+        if results_file is not None:
+            results_file.write(_without_copy_directory(f'> {event}\n', database))
+            results_file.writelines(_without_copy_directory(f'< {result}\n', database) for result in results)
+
+        if any(isinstance(result, EndApplicationEvent) for result in results):
+            break
+
+    return timing, time.perf_counter() - start
+
+
+def _without_copy_directory(line: str, database: Path) -> str:
+    """Replaces the temporary directory the database was copied to, which is different every
+    time, wherever it appears in a line of the results, so that results can be diffed."""
+    return line.replace(str(database.parent), '<copy>')
+
+
+def main():
+    parser = argparse.ArgumentParser(description = 'Replays a recorded session against a copy of a database.')
+    parser.add_argument('log', type = Path, help = 'the recorded session')
+    parser.add_argument('database', type = Path, help = 'the database to replay it against (left unchanged)')
+    parser.add_argument('--results', type = Path, help = 'a file to write each event and its results to')
+    arguments = parser.parse_args()
+
+    events = [event for seconds, event in read_recording(arguments.log)]
+
+    with tempfile.TemporaryDirectory() as directory:
+        database = Path(directory) / arguments.database.name
+        copy_database(arguments.database, database)
+        engine = Engine()
+
+        if arguments.results:
+            with arguments.results.open('w', encoding = 'utf-8') as results_file:
+                timing, seconds = replay(engine, events, database, results_file)
+        else:
+            timing, seconds = replay(engine, events, database, None)
+
+        list(engine.process_event(CloseDatabaseEvent()))
+
+    statistics = timing.snapshot()
+    event_count = sum(statistic.count for statistic in statistics)
+
+    print(f'{event_count:,} events in {seconds:.3f} s ({event_count / seconds:,.0f} events/s)')
+    print()
+    print(f'{"event":36} {"count":>7} {"p50 ms":>9} {"p95 ms":>9} {"p99 ms":>9} {"results":>9}')
+
+    for statistic in statistics:
+        print(
+            f'{statistic.name:36} {statistic.count:7,} {statistic.p50_seconds * 1000:9.3f} '
+            f'{statistic.p95_seconds * 1000:9.3f} {statistic.p99_seconds * 1000:9.3f} {statistic.rows:9,}')
+
+
+if __name__ == '__main__':
+    main()
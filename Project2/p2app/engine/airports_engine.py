@@ -0,0 +1,234 @@
+# p2app/engine/airports_engine.py
+#
+# ICS 33 Winter 2024
+# Project 2: Learning to Fly
+
+import sqlite3
+from collections.abc import Iterator
+from itertools import product
+from p2app.events import *
+from p2app.engine.cursors import keyset_where_clause, paged_batches
+from p2app.engine.entity_cache import EntityCache
+from p2app.engine.full_text import match_search_statement, search_continuation
+from p2app.engine.indexes import create_indexes
+from p2app.engine.reference_tables import ReferenceTables
+from p2app.engine.runway_summary import has_runway_summary, runway_filter_characteristic
+from p2app.engine.spatial import SpatialIndex
+
+
+
+# Every column of the airport table other than its id, in the order they appear in
+# both the table and the Airport namedtuple.
+_AIRPORT_COLUMNS = Airport._fields[1:]
+
+# The criteria an airport search can match exactly, other than the name.
+_SEARCH_CRITERIA = ('airport_ident', 'iata_code', 'gps_code', 'municipality')
+
+# The curated indexes that the searches' criteria (other than airport_ident, which
+# is UNIQUE) rely on, which are created whenever a database is opened.
+_SEARCH_INDEXES = [
+    'airport_iata_code_index', 'airport_gps_code_index', 'airport_municipality_index',
+    'airport_name_index'
+]
+
+
+
+class Airports:
+    """
+    This object processes all the airport-related events sent to it by the user interface,
+    then generate events that are sent back to the user interface in response, yielding
+    them one at a time as they become available.
+    """
+    def __init__(self, cache: EntityCache, reference_tables: ReferenceTables, locations: SpatialIndex):
+        """Initializes the airports engine, given the cache that loaded and saved airports share,
+        the in-memory continents and countries that saves are validated against, and the
+        spatial index of airport positions that saves keep current"""
+        self._cache = cache
+        self._reference_tables = reference_tables
+        self._locations = locations
+
+    def handlers(self) -> dict[type, 'callable']:
+        """
+        Returns a dictionary mapping each airport-related event type to the method that
+        handles it, so the main engine can dispatch an event with a single lookup.
+        """
+        return {
+            StartAirportSearchEvent: self.search,
+            LoadAirportEvent: self.load,
+            SaveNewAirportEvent: self.save_new,
+            SaveAirportEvent: self.save
+        }
+
+    def prepare(self, connection: sqlite3.Connection) -> None:
+        """Creates the indexes that searches rely on, if they don't already exist, so that
+        searches are indexed without anyone having to create the curated indexes first."""
+        create_indexes(connection, _SEARCH_INDEXES)
+
+    def search(self, connection: sqlite3.Connection, event: StartAirportSearchEvent) -> Iterator['events']:
+        """
+        Yields the airports matching the search in AirportSearchResultsEvents, each carrying a
+        batch of them, so a large result costs the user interface one event per batch rather
+        than one per airport.  If the search asks for a page size and more matches remain after
+        that many, the page ends with an AirportSearchMoreResultsEvent carrying the
+        continuation for the next page.  A search that can't be carried out yields an
+        AirportSearchFailedEvent instead.
+        """
+        if event.runway_filter() and not has_runway_summary(connection):
+            yield AirportSearchFailedEvent(
+                'Rebuild the runway summary before searching for airports by runway', event.generation())
+            return
+
+        statement, parameters = self.search_statement(connection, event)
+        cursor = connection.execute(statement, parameters)
+        for rows, more in paged_batches(cursor, event.page_size()):
+            airports = [Airport(*row[:len(Airport._fields)]) for row in rows]
+            yield AirportSearchResultsEvent(airports, event.generation())
+
+            if more:
+                continuation = search_continuation(rows[-1], len(Airport._fields))
+                yield AirportSearchMoreResultsEvent(continuation, event.generation())
+
+    def search_statement(self, connection: sqlite3.Connection, event: StartAirportSearchEvent) -> tuple[str, list]:
+        """
+        Returns the SQL statement and parameters that carry out the given search.  Every
+        criterion is matched exactly, except that the name can also be matched by prefix
+        or by rank; each is backed by an index, so no search scans the whole table.  A
+        runway filter is checked against the runway summary, not the runway table.
+        """
+        statement = 'SELECT * FROM airport WHERE '
+        characteristics = []
+        parameters = []
+
+        for column in _SEARCH_CRITERIA:
+            value = getattr(event, column)()
+
+            if value:
+                parameters.append(value)
+                characteristics.append(f'{column} = ?')
+
+        if event.runway_filter():
+            characteristic, runway_parameters = runway_filter_characteristic(event.runway_filter())
+            parameters.extend(runway_parameters)
+            characteristics.append(characteristic)
+
+        if event.name():
+            if event.match_mode() != MATCH_EXACT:
+                return match_search_statement(
+                    connection, 'airport', characteristics, parameters, event.name(),
+                    event.match_mode(), event.continuation(), event.page_size())
+
+            parameters.append(event.name())
+            characteristics.append('name = ?')
+
+        clause, parameters = keyset_where_clause(
+            'airport_id', characteristics, parameters, event.continuation(), event.page_size())
+        statement += clause
+
+        return statement, parameters
+
+    def sample_searches(self) -> list[StartAirportSearchEvent]:
+        """
+        Returns one search event for every shape of statement that search_statement can
+        produce (each combination of criteria and match mode, both unpaged and as a later
+        page), so the statements can be checked without knowing what users will search for.
+        """
+        return [
+            StartAirportSearchEvent(*criteria, page_size, continuation, match_mode)
+            for criteria in product((None, 'sample'), repeat = len(_SEARCH_CRITERIA) + 1)
+            if any(criteria)
+            for match_mode in (MATCH_MODES if criteria[-1] else (MATCH_EXACT, ))
+            for page_size, continuation in (
+                (None, None), (100, 0 if match_mode == MATCH_EXACT else (0.0, 0)))
+        ]
+
+    def load(self, connection: sqlite3.Connection, event: LoadAirportEvent) -> Iterator['events']:
+        """Yields an AirportLoadedEvent for the requested airport, from the cache if it's there."""
+        loaded_airport = self._cache.get(Airport, event.airport_id())
+
+        if loaded_airport is None:
+            statement = 'SELECT * FROM airport WHERE airport_id = ?;'
+            parameter = (event.airport_id(), )
+            cursor = connection.execute(statement, parameter)
+            result = cursor.fetchone()
+            cursor.close()
+
+            loaded_airport = Airport(*result)
+            self._cache.put_if_absent(loaded_airport)
+
+        yield AirportLoadedEvent(loaded_airport)
+
+    def save_new(self, connection: sqlite3.Connection, event: SaveNewAirportEvent) -> Iterator['events']:
+        """Inserts a new airport, yielding either an AirportSavedEvent or a SaveAirportFailedEvent."""
+        failure = self._reference_failure(event.airport())
+
+        if failure:
+            yield SaveAirportFailedEvent(failure)
+            return
+
+        try:
+            statement = \
+                f'INSERT INTO airport ({", ".join(_AIRPORT_COLUMNS)}) ' + \
+                f'VALUES ({", ".join(":" + column for column in _AIRPORT_COLUMNS)});'
+
+            new_airport = event.airport()
+            cursor = connection.execute(statement, new_airport._asdict())
+            connection.commit()
+
+            added_airport = new_airport._replace(airport_id = cursor.lastrowid)
+            cursor.close()
+            self._cache.put(added_airport)
+            self._locations.put(added_airport.airport_id, added_airport.latitude_deg, added_airport.longitude_deg)
+            yield AirportSavedEvent(added_airport)
+
+        except sqlite3.IntegrityError as e:
+            yield SaveAirportFailedEvent(_describe_integrity_error(e))
+
+    def save(self, connection: sqlite3.Connection, event: SaveAirportEvent) -> Iterator['events']:
+        """Updates an existing airport, yielding either an AirportSavedEvent or a SaveAirportFailedEvent."""
+        failure = self._reference_failure(event.airport())
+
+        if failure:
+            yield SaveAirportFailedEvent(failure)
+            return
+
+        try:
+            statement = \
+                f'UPDATE airport SET {", ".join(column + " = :" + column for column in _AIRPORT_COLUMNS)} ' + \
+                'WHERE airport_id = :airport_id;'
+
+            modified_airport = event.airport()
+            connection.execute(statement, modified_airport._asdict())
+            connection.commit()
+
+            self._cache.put(modified_airport)
+            self._locations.put(
+                modified_airport.airport_id, modified_airport.latitude_deg, modified_airport.longitude_deg)
+            yield AirportSavedEvent(modified_airport)
+
+        except sqlite3.IntegrityError as e:
+            yield SaveAirportFailedEvent(_describe_integrity_error(e))
+
+    def _reference_failure(self, airport: Airport) -> str | None:
+        """Returns the reason the reference tables show the given airport can't be saved, or
+        None if it can, so most bad saves are rejected without a round trip to SQLite."""
+        try:
+            continent = self._reference_tables.continent(int(airport.continent_id))
+        except (TypeError, ValueError):
+            continent = None
+
+        if continent is None or self._reference_tables.country(airport.country_id) is None:
+            return 'Invalid continent_code or country code'
+
+        return None
+
+
+def _describe_integrity_error(error: sqlite3.IntegrityError) -> str:
+    """Returns a readable reason for an airport that violated a constraint."""
+    if "UNIQUE constraint failed" in str(error):
+        return 'Duplicate airport_ident Not Allowed'
+    elif "FOREIGN KEY constraint failed" in str(error):
+        return 'Invalid continent_code, country code or region code'
+    elif "NOT NULL constraint failed" in str(error):
+        return f'Missing {str(error).rsplit(".", 1)[-1]}'
+    else:
+        return str(error)
@@ -0,0 +1,231 @@
+# p2app/engine/bulk_import.py
+#
+# ICS 33 Winter 2024
+# Project 2: Learning to Fly
+#
+# Bulk importing of continents, countries, and regions from files in the format
+# published by OurAirports, either as CSV or as JSONL (one JSON object per line,
+# with the same field names as the CSV columns).
+
+import csv
+import json
+import sqlite3
+from collections.abc import Iterator
+from pathlib import Path
+from p2app.events import *
+from p2app.engine.reference_tables import ReferenceTables
+
+
+
+# The number of rows inserted in each transaction.  Committing once per chunk rather
+# than once per row is what makes a bulk import fast; keeping chunks bounded means a
+# failure part way through a huge file only loses the chunk in progress.
+_CHUNK_SIZE = 5000
+
+_JSONL_SUFFIXES = ('.jsonl', '.ndjson', '.json')
+
+_INSERT_STATEMENTS = {
+    'continent': 'INSERT INTO continent (continent_code, name) VALUES (?, ?);',
+    'country': 'INSERT INTO country (country_code, name, continent_id, wikipedia_link, keywords) '
+               'VALUES (?, ?, ?, ?, ?);',
+    'region': 'INSERT INTO region (region_code, local_code, name, continent_id, country_id, '
+              'wikipedia_link, keywords) VALUES (?, ?, ?, ?, ?, ?, ?);'
+}
+
+
+
+class BulkImport:
+    """
+    This object processes bulk import events sent to it by the user interface, inserting
+    the rows of an OurAirports file in chunked transactions and yielding progress events
+    as each chunk is committed.
+    """
+
+    def __init__(self, reference_tables: ReferenceTables):
+        """Initializes the bulk import engine, given the in-memory continents and countries
+        that imported rows' codes are resolved against"""
+        self._reference_tables = reference_tables
+
+    def handlers(self) -> dict[type, 'callable']:
+        """
+        Returns a dictionary mapping each bulk import event type to the method that
+        handles it, so the main engine can dispatch an event with a single lookup.
+        """
+        return {
+            StartBulkImportEvent: self.start
+        }
+
+    def start(self, connection: sqlite3.Connection, event: StartBulkImportEvent) -> Iterator['events']:
+        """
+        Imports every row of the event's file into the event's table.  A row that can't be
+        inserted (because it's missing a field, refers to an unknown continent or country,
+        or violates a constraint) is reported in the BulkImportCompletedEvent rather than
+        stopping the import.
+        """
+        table = event.table()
+
+        if table not in _INSERT_STATEMENTS:
+            yield BulkImportFailedEvent(f'Cannot import into table {repr(table)}')
+            return
+
+        statement = _INSERT_STATEMENTS[table]
+        make_parameters = _PARAMETER_MAKERS[table]
+        lookups = self._reference_tables.code_lookups()
+
+        rows_read = 0
+        rows_inserted = 0
+        failures = []
+        chunk = []
+
+        try:
+            for line_number, record in _read_records(Path(event.path()), failures):
+                rows_read += 1
+
+                try:
+                    chunk.append((line_number, make_parameters(record, lookups)))
+                except ValueError as e:
+                    failures.append(ImportFailure(line_number, str(e)))
+
+                if len(chunk) == _CHUNK_SIZE:
+                    rows_inserted += _insert_chunk(connection, table, statement, chunk, failures)
+                    chunk = []
+                    yield BulkImportProgressEvent(table, rows_read, rows_inserted)
+
+            if chunk:
+                rows_inserted += _insert_chunk(connection, table, statement, chunk, failures)
+                yield BulkImportProgressEvent(table, rows_read, rows_inserted)
+
+        except (OSError, UnicodeDecodeError, csv.Error, json.JSONDecodeError) as e:
+            self._refresh_reference_tables(connection, table)
+            yield BulkImportFailedEvent(
+                f'Could not read {event.path()} after {rows_read} rows '
+                f'({rows_inserted} were imported): {e}')
+            return
+
+        # Rows that can't be read are reported as they're read, but rows that violate a
+        # constraint only once their chunk is inserted, so the failures are put back in
+        # the order of the file.
+        failures.sort(key = lambda failure: failure.line_number)
+
+        self._refresh_reference_tables(connection, table)
+        yield BulkImportCompletedEvent(table, rows_inserted, failures)
+
+    def _refresh_reference_tables(self, connection: sqlite3.Connection, table: str) -> None:
+        """Reloads the reference tables after continents or countries have been imported."""
+        if table in ('continent', 'country'):
+            self._reference_tables.load(connection)
+
+
+def _insert_chunk(
+        connection: sqlite3.Connection, table: str, statement: str,
+        chunk: list[tuple[int, tuple]], failures: list[ImportFailure]) -> int:
+    """
+    Inserts one chunk of rows in a single transaction, returning how many were inserted.
+    The whole chunk is tried at once with executemany; only if that fails is the chunk
+    retried one row at a time, so the rows that violate a constraint can be reported.
+    """
+    try:
+        with connection:
+            connection.executemany(statement, [parameters for line_number, parameters in chunk])
+
+        return len(chunk)
+    except sqlite3.IntegrityError:
+        pass
+
+    inserted = 0
+
+    with connection:
+        for line_number, parameters in chunk:
+            try:
+                connection.execute(statement, parameters)
+                inserted += 1
+            except sqlite3.IntegrityError as e:
+                failures.append(ImportFailure(line_number, _describe_integrity_error(table, e)))
+
+    return inserted
+
+
+def _describe_integrity_error(table: str, error: sqlite3.IntegrityError) -> str:
+    """Returns a readable reason for a row that violated a constraint."""
+    if "UNIQUE constraint failed" in str(error):
+        return f'Duplicate {table}_code Not Allowed'
+    elif "FOREIGN KEY constraint failed" in str(error):
+        return 'Invalid continent_code or country code'
+    else:
+        return str(error)
+
+
+def _read_records(path: Path, failures: list[ImportFailure]) -> Iterator[tuple[int, dict]]:
+    """Yields (line number, record) for every record in a CSV or JSONL file, reading the
+    file incrementally.  The format is chosen by the file's suffix.  A JSONL line that
+    holds something other than an object is reported as a failure instead."""
+    if path.suffix.lower() in _JSONL_SUFFIXES:
+        with path.open(encoding = 'utf-8') as file:
+            for line_number, line in enumerate(file, start = 1):
+                if line.strip():
+                    record = json.loads(line)
+
+                    if isinstance(record, dict):
+                        yield line_number, record
+                    else:
+                        failures.append(ImportFailure(line_number, 'Not a JSON object'))
+    else:
+        with path.open(encoding = 'utf-8-sig', newline = '') as file:
+            reader = csv.DictReader(file)
+
+            for record in reader:
+                yield reader.line_num, record
+
+
+def _field(record: dict, name: str, required: bool = True) -> str | None:
+    """Returns a record's value for a field, stripped of surrounding whitespace, or None if
+    it's missing or empty; a required field that is missing or empty raises a ValueError."""
+    value = record.get(name)
+    value = str(value).strip() if value is not None else ''
+
+    if value:
+        return value
+    elif required:
+        raise ValueError(f'Missing {name}')
+    else:
+        return None
+
+
+def _lookup(lookups: dict[str, dict[str, int]], table: str, code: str) -> int:
+    """Returns the id of the continent or country with the given code, raising a ValueError
+    if there isn't one."""
+    try:
+        return lookups[table][code]
+    except KeyError:
+        raise ValueError(f'Unknown {table} code {repr(code)}')
+
+
+def _continent_parameters(record: dict, lookups: dict[str, dict[str, int]]) -> tuple:
+    return _field(record, 'code'), _field(record, 'name')
+
+
+def _country_parameters(record: dict, lookups: dict[str, dict[str, int]]) -> tuple:
+    return (
+        _field(record, 'code'),
+        _field(record, 'name'),
+        _lookup(lookups, 'continent', _field(record, 'continent')),
+        _field(record, 'wikipedia_link', required = False) or '',
+        _field(record, 'keywords', required = False))
+
+
+def _region_parameters(record: dict, lookups: dict[str, dict[str, int]]) -> tuple:
+    return (
+        _field(record, 'code'),
+        _field(record, 'local_code'),
+        _field(record, 'name'),
+        _lookup(lookups, 'continent', _field(record, 'continent')),
+        _lookup(lookups, 'country', _field(record, 'iso_country')),
+        _field(record, 'wikipedia_link', required = False),
+        _field(record, 'keywords', required = False))
+
+
+_PARAMETER_MAKERS = {
+    'continent': _continent_parameters,
+    'country': _country_parameters,
+    'region': _region_parameters
+}
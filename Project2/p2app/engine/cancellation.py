@@ -0,0 +1,151 @@
+# p2app/engine/cancellation.py
+#
+# ICS 33 Winter 2024
+# Project 2: Learning to Fly
+#
+# Stopping searches that are still in progress, either because the user interface
+# asked for them to be cancelled or because they ran longer than the time budget
+# of the database's connection profile.
+
+import sqlite3
+import threading
+import time
+from collections.abc import Iterator
+from p2app.events import *
+
+
+
+# How many SQLite virtual machine instructions a search's statements execute between
+# checks of whether it's been cancelled or run out of time.  Each check costs a call
+# into Python, so it's a balance between that cost and how quickly a search stops.
+_PROGRESS_INTERVAL = 1000
+
+_CANCELLED_REASON = 'The search was cancelled'
+
+
+
+class RunningSearches:
+    """
+    Keeps track of the searches in progress, so the ones of a particular kind (such as
+    region searches) can be cancelled without disturbing the others, and stops any search
+    that runs longer than its time budget.  A search runs with a progress handler on its
+    connection, which SQLite calls periodically while executing the search's statements;
+    once the search is cancelled or its budget is spent, the handler tells SQLite to
+    abandon the statement.  Cancelling also interrupts the connection, which stops a
+    statement in the middle of a step without waiting for the next check.
+
+    A cancellation can carry a generation, in which case it only stops the searches of
+    its kind from earlier generations, including the ones that haven't started yet
+    because they're still waiting behind other events; those stop as soon as they start.
+    """
+
+    def __init__(self):
+        """Initializes an empty set of running searches"""
+        self._lock = threading.Lock()
+        self._searches = set()
+        self._cancelled_generations = {}
+
+    def run(
+            self, handler: 'callable', connection: sqlite3.Connection, event,
+            budget_seconds: float | None) -> Iterator['events']:
+        """
+        Yields the events a search's handler yields, stopping it if it's cancelled or takes
+        longer than the given budget (if any), in which case its last event is a
+        SearchCancelledEvent explaining why.
+        """
+        search = _Search(type(event).__name__, event.generation(), connection, budget_seconds)
+
+        with self._lock:
+            cancelled_generation = self._cancelled_generations.get(search.name())
+            is_cancelled = cancelled_generation is not None and search.is_before(cancelled_generation)
+
+            if not is_cancelled:
+                self._searches.add(search)
+
+        if is_cancelled:
+            yield SearchCancelledEvent(search.name(), _CANCELLED_REASON, search.generation())
+            return
+
+        connection.set_progress_handler(search.should_stop, _PROGRESS_INTERVAL)
+
+        try:
+            yield from handler(connection, event)
+        except sqlite3.OperationalError:
+            if search.stop_reason() is None:
+                raise
+
+            yield SearchCancelledEvent(search.name(), search.stop_reason(), search.generation())
+        finally:
+            # The search is forgotten before its connection is returned to the pool, and
+            # always under the lock that cancel holds, so a cancellation can never
+            # interrupt whatever the connection is lent out for next.
+            with self._lock:
+                self._searches.discard(search)
+
+            connection.set_progress_handler(None, 0)
+
+    def cancel(self, name: str, generation: int | None = None) -> int:
+        """
+        Cancels the searches in progress whose event type has the given name (e.g.,
+        'StartRegionSearchEvent') and that are from a generation earlier than the given one
+        (or all of them, if no generation is given), returning how many there were.  The
+        searches from earlier generations that haven't started yet stop when they start.
+        """
+        with self._lock:
+            if generation is not None:
+                previous = self._cancelled_generations.get(name)
+                self._cancelled_generations[name] = generation if previous is None else max(previous, generation)
+
+            cancelled = [
+                search for search in self._searches
+                if search.name() == name and (generation is None or search.generation() is None
+                                              or search.is_before(generation))
+            ]
+
+            for search in cancelled:
+                search.cancel()
+
+            return len(cancelled)
+
+
+
+class _Search:
+    """One search in progress, along with the connection it's running on."""
+
+    def __init__(
+            self, name: str, generation: int | None, connection: sqlite3.Connection,
+            budget_seconds: float | None):
+        self._name = name
+        self._generation = generation
+        self._connection = connection
+        self._budget_seconds = budget_seconds
+        self._deadline = None if budget_seconds is None else time.monotonic() + budget_seconds
+        self._stop_reason = None
+
+    def name(self) -> str:
+        """Returns the name of the search's event type."""
+        return self._name
+
+    def generation(self) -> int | None:
+        """Returns the search's generation, or None if it doesn't have one."""
+        return self._generation
+
+    def is_before(self, generation: int) -> bool:
+        """Returns True if the search has a generation and it's earlier than the given one."""
+        return self._generation is not None and self._generation < generation
+
+    def stop_reason(self) -> str | None:
+        """Returns why the search was stopped, or None if it hasn't been."""
+        return self._stop_reason
+
+    def cancel(self) -> None:
+        """Stops the search, interrupting the statement it's executing, if any."""
+        self._stop_reason = _CANCELLED_REASON
+        self._connection.interrupt()
+
+    def should_stop(self) -> bool:
+        """The progress handler, which returns True once the search should be abandoned."""
+        if self._stop_reason is None and self._deadline is not None and time.monotonic() > self._deadline:
+            self._stop_reason = f'The search took longer than its budget of {self._budget_seconds:g} seconds'
+
+        return self._stop_reason is not None
@@ -0,0 +1,185 @@
+# p2app/engine/connections.py
+#
+# ICS 33 Winter 2024
+# Project 2: Learning to Fly
+#
+# The engine's connections to the open database: one connection that every
+# change is written through, and a pool of read-only connections that searches
+# and loads borrow, so that several of them can run at the same time.
+
+import queue
+import sqlite3
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from functools import partial
+from pathlib import Path
+from p2app.engine.profiles import ConnectionProfile, apply_profile, connect, reader_profile
+from p2app.engine.timing import TimedConnection, TimingStatistics
+from p2app.events import ConnectionPoolStatistics
+
+
+
+class ConnectionManager:
+    """
+    Owns the writer connection and the pool of read connections.  The writer is used by
+    the engine's thread, one event at a time, as before; the readers are opened with
+    check_same_thread turned off, since a search can borrow one on any thread.  With the
+    database in WAL mode, a reader sees the last committed state of the database and
+    is never blocked by the writer, nor the writer by it.  When there are no readers
+    (as with an in-memory database), borrowing one returns the writer instead.  Every
+    connection it opens times the statements executed through it.
+    """
+
+    def __init__(self, timing: TimingStatistics):
+        """Initializes a connection manager with no database open, given the statistics
+        that its connections' statement timings are recorded in"""
+        self._factory = partial(TimedConnection, timing = timing)
+        self._writer = None
+        self._readers = []
+        self._idle_readers = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._reset_statistics()
+
+    def open(self, path: Path, profile: ConnectionProfile) -> dict[str, object]:
+        """
+        Opens the writer connection to the database at the given path and applies the
+        profile to it, then opens the profile's number of readers, returning the settings
+        that took effect.  Raises an sqlite3.Error if the database can't be opened, in which
+        case nothing is left open.  Any database that was already open is closed once the
+        new one has been opened.
+        """
+        writer = connect(path, profile, factory = self._factory)
+
+        try:
+            cursor = writer.execute('SELECT airport_id FROM airport;')
+            cursor.fetchone()
+            cursor.close()
+
+            writer.execute('PRAGMA foreign_keys = ON;')
+            settings = apply_profile(writer, profile)
+            readers = []
+
+            try:
+                for _ in range(profile.reader_count):
+                    readers.append(connect(
+                        path, reader_profile(profile), check_same_thread = False, factory = self._factory))
+                    apply_profile(readers[-1], reader_profile(profile))
+            except sqlite3.Error:
+                for reader in readers:
+                    reader.close()
+
+                raise
+        except sqlite3.Error:
+            writer.close()
+            raise
+
+        self.attach(writer, readers)
+        settings['reader_count'] = len(readers)
+        settings['search_budget_seconds'] = profile.search_budget_seconds
+        return settings
+
+    def attach(self, writer: sqlite3.Connection, readers: list[sqlite3.Connection] | None = None) -> None:
+        """Makes already-open connections the writer and the pool of readers, closing the
+        ones they replace."""
+        self.close()
+        self._writer = writer
+        self._readers = list(readers or [])
+        self._idle_readers = queue.LifoQueue()
+
+        for reader in self._readers:
+            self._idle_readers.put(reader)
+
+        self._reset_statistics()
+
+    def writer(self) -> sqlite3.Connection | None:
+        """Returns the writer connection, or None if no database is open."""
+        return self._writer
+
+    def pool_size(self) -> int:
+        """Returns the number of read connections in the pool."""
+        return len(self._readers)
+
+    @contextmanager
+    def reader(self) -> Iterator[sqlite3.Connection | None]:
+        """Lends out an idle read connection for the duration of a with statement, waiting
+        for one to be returned if they're all in use.  Without a pool, the writer is lent."""
+        if not self._readers:
+            yield self._writer
+            return
+
+        # The reader goes back to the pool it was borrowed from, which might not be the
+        # current one by then, if the database was closed or another one opened meanwhile.
+        idle_readers = self._idle_readers
+
+        try:
+            reader = idle_readers.get_nowait()
+            wait_seconds = None
+        except queue.Empty:
+            start = time.perf_counter()
+            reader = idle_readers.get()
+            wait_seconds = time.perf_counter() - start
+
+        if reader is None:
+            # The pool was retired while this was waiting for a reader; the None is passed
+            # along to anything else still waiting for one.
+            idle_readers.put(None)
+            yield None
+            return
+
+        with self._lock:
+            self._acquisitions += 1
+            self._in_use += 1
+            self._peak_in_use = max(self._peak_in_use, self._in_use)
+
+            if wait_seconds is not None:
+                self._waits += 1
+                self._wait_seconds += wait_seconds
+
+        try:
+            yield reader
+        finally:
+            with self._lock:
+                is_retired = idle_readers is not self._idle_readers
+
+                if not is_retired:
+                    self._in_use -= 1
+                    idle_readers.put(reader)
+
+            if is_retired:
+                reader.close()
+
+    def close(self) -> None:
+        """Closes every connection, first waiting for each reader that's lent out to be
+        returned, then retires the pool, so that a reader can never be returned to it
+        and lent out again."""
+        for _ in self._readers:
+            self._idle_readers.get().close()
+
+        if self._writer is not None:
+            self._writer.close()
+
+        with self._lock:
+            retired_readers = self._idle_readers
+            self._writer = None
+            self._readers = []
+            self._idle_readers = queue.LifoQueue()
+
+        retired_readers.put(None)
+
+    def statistics(self) -> ConnectionPoolStatistics:
+        """Returns how much the pool of read connections has been used since it was opened."""
+        with self._lock:
+            return ConnectionPoolStatistics(
+                len(self._readers), self._in_use, self._peak_in_use, self._acquisitions,
+                self._waits, self._wait_seconds)
+
+    def _reset_statistics(self) -> None:
+        """Zeroes the pool's usage counters."""
+        with self._lock:
+            self._in_use = 0
+            self._peak_in_use = 0
+            self._acquisitions = 0
+            self._waits = 0
+            self._wait_seconds = 0.0
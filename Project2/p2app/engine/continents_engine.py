@@ -4,80 +4,168 @@
 # Project 2: Learning to Fly
 
 import sqlite3
+from collections.abc import Iterator
+from itertools import product
 from p2app.events import *
+from p2app.engine.cursors import keyset_where_clause, paged_batches
+from p2app.engine.entity_cache import EntityCache
+from p2app.engine.full_text import match_search_statement, search_continuation
+from p2app.engine.reference_tables import ReferenceTables
 
 class Continents:
     """
     This object processes all the continent-related events sent to it by the user interface,
-    then generate events that are sent back to the user interface in response, into a list.
+    then generate events that are sent back to the user interface in response, yielding
+    them one at a time as they become available.
     """
 
-    def __init__(self):
-        """Initializes the continents engine"""
-        pass
+    def __init__(self, cache: EntityCache, reference_tables: ReferenceTables):
+        """Initializes the continents engine, given the cache that loaded and saved continents share
+        and the in-memory continents and countries that saves are validated against"""
+        self._cache = cache
+        self._reference_tables = reference_tables
 
-    def event_handler(self, connection: sqlite3.Connection, event: 'events') -> list['events']:
+    def handlers(self) -> dict[type, 'callable']:
         """
-        Returns a list of all the events that should be generated by the main module as the response,
-        given the events sent to it by the user interface.
+        Returns a dictionary mapping each continent-related event type to the method that
+        handles it, so the main engine can dispatch an event with a single lookup.
         """
-        events = []
-        if isinstance(event, StartContinentSearchEvent):
-            if not event.continent_code():
-                statement = 'SELECT * FROM continent WHERE name = ?;'
-                parameters = (event.name(), )
-            elif not event.name():
-                statement = 'SELECT * FROM continent WHERE continent_code = ?;'
-                parameters = (event.continent_code(), )
-            else:
-                statement = 'SELECT * FROM continent WHERE continent_code = ? AND name = ?;'
-                parameters = (event.continent_code(), event.name())
-
-            cursor = connection.execute(statement, parameters)
-            results = cursor.fetchall()
-            for result in results:
-                continent = Continent(result[0], result[1], result[2])
-                events.append(ContinentSearchResultEvent(continent))
-            cursor.close()
-
-        if isinstance(event, LoadContinentEvent):
+        return {
+            StartContinentSearchEvent: self.search,
+            LoadContinentEvent: self.load,
+            SaveNewContinentEvent: self.save_new,
+            SaveContinentEvent: self.save
+        }
+
+    def search(self, connection: sqlite3.Connection, event: StartContinentSearchEvent) -> Iterator['events']:
+        """
+        Yields the continents matching the search in ContinentSearchResultsEvents, each carrying a
+        batch of them, so a large result costs the user interface one event per batch rather
+        than one per continent.  If the search asks for a page size and more matches remain after
+        that many, the page ends with a ContinentSearchMoreResultsEvent carrying the
+        continuation for the next page.
+        """
+        statement, parameters = self.search_statement(connection, event)
+        cursor = connection.execute(statement, parameters)
+        for rows, more in paged_batches(cursor, event.page_size()):
+            continents = [Continent(row[0], row[1], row[2]) for row in rows]
+            yield ContinentSearchResultsEvent(continents, event.generation())
+
+            if more:
+                continuation = search_continuation(rows[-1], len(Continent._fields))
+                yield ContinentSearchMoreResultsEvent(continuation, event.generation())
+
+    def search_statement(self, connection: sqlite3.Connection, event: StartContinentSearchEvent) -> tuple[str, list]:
+        """Returns the SQL statement and parameters that carry out the given search."""
+        statement = 'SELECT * FROM continent WHERE '
+        characteristics = []
+        parameters = []
+        if event.continent_code():
+            parameters.append(event.continent_code())
+            characteristics.append('continent_code = ?')
+        if event.name():
+            if event.match_mode() != MATCH_EXACT:
+                return match_search_statement(
+                    connection, 'continent', characteristics, parameters, event.name(),
+                    event.match_mode(), event.continuation(), event.page_size())
+
+            parameters.append(event.name())
+            characteristics.append('name = ?')
+
+        clause, parameters = keyset_where_clause(
+            'continent_id', characteristics, parameters, event.continuation(), event.page_size())
+        statement += clause
+
+        return statement, parameters
+
+    def sample_searches(self) -> list[StartContinentSearchEvent]:
+        """
+        Returns one search event for every shape of statement that search_statement can
+        produce (each combination of criteria and match mode, both unpaged and as a later
+        page), so the statements can be checked without knowing what users will search for.
+        """
+        return [
+            StartContinentSearchEvent(continent_code, name, page_size, continuation, match_mode)
+            for continent_code, name in product((None, 'sample'), repeat = 2)
+            if continent_code or name
+            for match_mode in (MATCH_MODES if name else (MATCH_EXACT, ))
+            for page_size, continuation in (
+                (None, None), (100, 0 if match_mode == MATCH_EXACT else (0.0, 0)))
+        ]
+
+    def load(self, connection: sqlite3.Connection, event: LoadContinentEvent) -> Iterator['events']:
+        """Yields a ContinentLoadedEvent for the requested continent, from the cache if it's there."""
+        loaded_continent = self._cache.get(Continent, event.continent_id())
+
+        if loaded_continent is None:
             statement = 'SELECT * FROM continent WHERE continent_id = ?;'
             parameter = (event.continent_id(), )
             cursor = connection.execute(statement, parameter)
-            loaded_continent = cursor.fetchone()
-
-            events.append(ContinentLoadedEvent(Continent(loaded_continent[0], loaded_continent[1], loaded_continent[2])))
+            result = cursor.fetchone()
             cursor.close()
 
-        if isinstance(event, SaveNewContinentEvent):
-            try:
-                statement = 'INSERT INTO continent (continent_code, name) VALUES (:continent_code, :name);'
-                parameters = {'continent_code': event.continent()[1], 'name': event.continent()[2]}
-                cursor = connection.execute(statement, parameters)
-                connection.commit()
+            loaded_continent = Continent(*result)
+            self._cache.put_if_absent(loaded_continent)
 
-                added_continent = Continent(cursor.lastrowid, event.continent()[1], event.continent()[2])
-                events.append(ContinentSavedEvent(added_continent))
-                cursor.close()
+        yield ContinentLoadedEvent(loaded_continent)
 
-            except sqlite3.IntegrityError:
-                events.append(SaveContinentFailedEvent('Duplicate continent_code Not Allowed'))
+    def save_new(self, connection: sqlite3.Connection, event: SaveNewContinentEvent) -> Iterator['events']:
+        """Inserts a new continent, yielding either a ContinentSavedEvent or a SaveContinentFailedEvent."""
+        failure = self._reference_failure(event.continent())
 
-        if isinstance(event, SaveContinentEvent):
-            try:
-                statement = 'UPDATE continent SET continent_code = ?, name = ? WHERE continent_id = ?;'
-                parameters = (event.continent()[1], event.continent()[2], event.continent()[0])
-                connection.execute(statement, parameters)
-                connection.commit()
+        if failure:
+            yield SaveContinentFailedEvent(failure)
+            return
 
-                modified_continent = Continent(event.continent()[0], event.continent()[1], event.continent()[2])
-                events.append(ContinentSavedEvent(modified_continent))
+        try:
+            statement = 'INSERT INTO continent (continent_code, name) VALUES (:continent_code, :name);'
+            parameters = {'continent_code': event.continent()[1], 'name': event.continent()[2]}
+            cursor = connection.execute(statement, parameters)
+            connection.commit()
+
+            added_continent = Continent(cursor.lastrowid, event.continent()[1], event.continent()[2])
+            cursor.close()
+            self._cache.put(added_continent)
+            self._reference_tables.put(added_continent)
+            yield ContinentSavedEvent(added_continent)
+
+        except sqlite3.IntegrityError:
+            yield SaveContinentFailedEvent('Duplicate continent_code Not Allowed')
+
+    def save(self, connection: sqlite3.Connection, event: SaveContinentEvent) -> Iterator['events']:
+        """Updates an existing continent, yielding either a ContinentSavedEvent or a SaveContinentFailedEvent."""
+        failure = self._reference_failure(event.continent())
+
+        if failure:
+            yield SaveContinentFailedEvent(failure)
+            return
+
+        try:
+            statement = 'UPDATE continent SET continent_code = ?, name = ? WHERE continent_id = ?;'
+            parameters = (event.continent()[1], event.continent()[2], event.continent()[0])
+            cursor = connection.execute(statement, parameters)
+            connection.commit()
 
-            except sqlite3.IntegrityError:
-                events.append(SaveContinentFailedEvent('Duplicate continent_code Not Allowed'))
+            # An update for an id that doesn't exist changes nothing, so there's nothing to
+            # write through to the cache or the reference tables.
+            if cursor.rowcount != 1:
+                yield SaveContinentFailedEvent('Continent Not Found')
+                return
 
-        return events
+            modified_continent = Continent(event.continent()[0], event.continent()[1], event.continent()[2])
+            self._cache.put(modified_continent)
+            self._reference_tables.put(modified_continent)
+            yield ContinentSavedEvent(modified_continent)
 
+        except sqlite3.IntegrityError:
+            yield SaveContinentFailedEvent('Duplicate continent_code Not Allowed')
 
+    def _reference_failure(self, continent: Continent) -> str | None:
+        """Returns the reason the reference tables show the given continent can't be saved, or
+        None if it can, so most bad saves are rejected without a round trip to SQLite."""
+        existing_id = self._reference_tables.continent_id_for_code(continent.continent_code)
 
+        if existing_id is not None and existing_id != continent.continent_id:
+            return 'Duplicate continent_code Not Allowed'
 
+        return None
@@ -4,90 +4,183 @@
 # Project 2: Learning to Fly
 
 import sqlite3
+from collections.abc import Iterator
+from itertools import product
 from p2app.events import *
+from p2app.engine.cursors import keyset_where_clause, paged_batches
+from p2app.engine.entity_cache import EntityCache
+from p2app.engine.full_text import match_search_statement, search_continuation
+from p2app.engine.reference_tables import ReferenceTables
 
 class Countries:
     """
     This object processes all the country-related events sent to it by the user interface,
-    then generate events that are sent back to the user interface in response, into a list.
+    then generate events that are sent back to the user interface in response, yielding
+    them one at a time as they become available.
     """
 
-    def __init__(self):
-        """Initializes the countries engine"""
-        pass
+    def __init__(self, cache: EntityCache, reference_tables: ReferenceTables):
+        """Initializes the countries engine, given the cache that loaded and saved countries share
+        and the in-memory continents and countries that saves are validated against"""
+        self._cache = cache
+        self._reference_tables = reference_tables
 
-    def event_handler(self, connection: sqlite3.Connection, event: 'events') -> list['events']:
+    def handlers(self) -> dict[type, 'callable']:
         """
-        Returns a list of all the events that should be generated by the main module as the response,
-        given the events sent to it by the user interface.
+        Returns a dictionary mapping each country-related event type to the method that
+        handles it, so the main engine can dispatch an event with a single lookup.
         """
-        events = []
-        if isinstance(event, StartCountrySearchEvent):
-            if not event.country_code():
-                statement = 'SELECT * FROM country WHERE name = ?;'
-                parameters = (event.name(), )
-            elif not event.name():
-                statement = 'SELECT * FROM country WHERE country_code = ?;'
-                parameters = (event.country_code(), )
-            else:
-                statement = 'SELECT * FROM country WHERE country_code = ? AND name = ?;'
-                parameters = (event.country_code(), event.name())
-
-            cursor = connection.execute(statement, parameters)
-            results = cursor.fetchall()
-            for result in results:
-                country = Country(result[0], result[1], result[2], result[3], result[4], result[5])
-                events.append(CountrySearchResultEvent(country))
-            cursor.close()
-
-        if isinstance(event, LoadCountryEvent):
+        return {
+            StartCountrySearchEvent: self.search,
+            LoadCountryEvent: self.load,
+            SaveNewCountryEvent: self.save_new,
+            SaveCountryEvent: self.save
+        }
+
+    def search(self, connection: sqlite3.Connection, event: StartCountrySearchEvent) -> Iterator['events']:
+        """
+        Yields the countries matching the search in CountrySearchResultsEvents, each carrying a
+        batch of them, so a large result costs the user interface one event per batch rather
+        than one per country.  If the search asks for a page size and more matches remain after
+        that many, the page ends with a CountrySearchMoreResultsEvent carrying the
+        continuation for the next page.
+        """
+        statement, parameters = self.search_statement(connection, event)
+        cursor = connection.execute(statement, parameters)
+        for rows, more in paged_batches(cursor, event.page_size()):
+            countries = [Country(row[0], row[1], row[2], row[3], row[4], row[5]) for row in rows]
+            yield CountrySearchResultsEvent(countries, event.generation())
+
+            if more:
+                continuation = search_continuation(rows[-1], len(Country._fields))
+                yield CountrySearchMoreResultsEvent(continuation, event.generation())
+
+    def search_statement(self, connection: sqlite3.Connection, event: StartCountrySearchEvent) -> tuple[str, list]:
+        """Returns the SQL statement and parameters that carry out the given search."""
+        statement = 'SELECT * FROM country WHERE '
+        characteristics = []
+        parameters = []
+        if event.country_code():
+            parameters.append(event.country_code())
+            characteristics.append('country_code = ?')
+        if event.name():
+            if event.match_mode() != MATCH_EXACT:
+                return match_search_statement(
+                    connection, 'country', characteristics, parameters, event.name(),
+                    event.match_mode(), event.continuation(), event.page_size())
+
+            parameters.append(event.name())
+            characteristics.append('name = ?')
+
+        clause, parameters = keyset_where_clause(
+            'country_id', characteristics, parameters, event.continuation(), event.page_size())
+        statement += clause
+
+        return statement, parameters
+
+    def sample_searches(self) -> list[StartCountrySearchEvent]:
+        """
+        Returns one search event for every shape of statement that search_statement can
+        produce (each combination of criteria and match mode, both unpaged and as a later
+        page), so the statements can be checked without knowing what users will search for.
+        """
+        return [
+            StartCountrySearchEvent(country_code, name, page_size, continuation, match_mode)
+            for country_code, name in product((None, 'sample'), repeat = 2)
+            if country_code or name
+            for match_mode in (MATCH_MODES if name else (MATCH_EXACT, ))
+            for page_size, continuation in (
+                (None, None), (100, 0 if match_mode == MATCH_EXACT else (0.0, 0)))
+        ]
+
+    def load(self, connection: sqlite3.Connection, event: LoadCountryEvent) -> Iterator['events']:
+        """Yields a CountryLoadedEvent for the requested country, from the cache if it's there."""
+        loaded_country = self._cache.get(Country, event.country_id())
+
+        if loaded_country is None:
             statement = 'SELECT * FROM country WHERE country_id = ?;'
             parameter = (event.country_id(), )
             cursor = connection.execute(statement, parameter)
-            loaded_country = cursor.fetchone()
-
-            events.append(CountryLoadedEvent(Country(loaded_country[0], loaded_country[1], loaded_country[2], loaded_country[3], loaded_country[4], loaded_country[5])))
+            result = cursor.fetchone()
             cursor.close()
 
-        if isinstance(event, SaveNewCountryEvent):
-            try:
-                statement = 'INSERT INTO country (country_code, name, continent_id, wikipedia_link, keywords) VALUES (:country_code, :name, :continent_id, :wikipedia_link, :keywords);'
-                new_country = event.country()
-                if event.country()[4] is None:
-                    new_country = event.country()._replace(wikipedia_link = '')
-                parameters = {'country_code': new_country[1], 'name': new_country[2], 'continent_id': new_country[3], 'wikipedia_link': new_country[4], 'keywords': new_country[5]}
-                cursor = connection.execute(statement, parameters)
-                connection.commit()
-
-                added_country = Country(cursor.lastrowid, new_country[1], new_country[2], new_country[3], new_country[4], new_country[5])
-                events.append(CountrySavedEvent(added_country))
-                cursor.close()
-
-
-            except sqlite3.IntegrityError as e:
-                if "UNIQUE constraint failed" in str(e):
-                    events.append(SaveCountryFailedEvent('Duplicate country_code Not Allowed'))
-                elif "FOREIGN KEY constraint failed" in str(e):
-                    events.append(SaveCountryFailedEvent('Invalid continent_code'))
-
-
-        if isinstance(event, SaveCountryEvent):
-            try:
-                statement = 'UPDATE country SET country_code = ?, name = ?, continent_id = ?, wikipedia_link = ?, keywords = ? WHERE country_id = ?;'
-                new_country = event.country()
-                if event.country()[4] is None:
-                    new_country = event.country()._replace(wikipedia_link = '')
-                parameters = (new_country[1], new_country[2], new_country[3], new_country[4], new_country[5], new_country[0])
-                connection.execute(statement, parameters)
-                connection.commit()
-
-                modified_country = Country(new_country[0], new_country[1], new_country[2], new_country[3], new_country[4], new_country[5])
-                events.append(CountrySavedEvent(modified_country))
-
-            except sqlite3.IntegrityError as e:
-                if "UNIQUE constraint failed" in str(e):
-                    events.append(SaveCountryFailedEvent('Duplicate country_code Not Allowed'))
-                elif "FOREIGN KEY constraint failed" in str(e):
-                    events.append(SaveCountryFailedEvent('Invalid continent_code'))
-
-        return events
\ No newline at end of file
+            loaded_country = Country(*result)
+            self._cache.put_if_absent(loaded_country)
+
+        yield CountryLoadedEvent(loaded_country)
+
+    def save_new(self, connection: sqlite3.Connection, event: SaveNewCountryEvent) -> Iterator['events']:
+        """Inserts a new country, yielding either a CountrySavedEvent or a SaveCountryFailedEvent."""
+        failure = self._reference_failure(event.country())
+
+        if failure:
+            yield SaveCountryFailedEvent(failure)
+            return
+
+        try:
+            statement = 'INSERT INTO country (country_code, name, continent_id, wikipedia_link, keywords) VALUES (:country_code, :name, :continent_id, :wikipedia_link, :keywords);'
+            new_country = event.country()
+            if event.country()[4] is None:
+                new_country = event.country()._replace(wikipedia_link = '')
+            parameters = {'country_code': new_country[1], 'name': new_country[2], 'continent_id': new_country[3], 'wikipedia_link': new_country[4], 'keywords': new_country[5]}
+            cursor = connection.execute(statement, parameters)
+            connection.commit()
+
+            added_country = Country(cursor.lastrowid, new_country[1], new_country[2], new_country[3], new_country[4], new_country[5])
+            cursor.close()
+            self._cache.put(added_country)
+            self._reference_tables.put(added_country)
+            yield CountrySavedEvent(added_country)
+
+
+        except sqlite3.IntegrityError as e:
+            if "UNIQUE constraint failed" in str(e):
+                yield SaveCountryFailedEvent('Duplicate country_code Not Allowed')
+            elif "FOREIGN KEY constraint failed" in str(e):
+                yield SaveCountryFailedEvent('Invalid continent_code')
+
+    def save(self, connection: sqlite3.Connection, event: SaveCountryEvent) -> Iterator['events']:
+        """Updates an existing country, yielding either a CountrySavedEvent or a SaveCountryFailedEvent."""
+        failure = self._reference_failure(event.country())
+
+        if failure:
+            yield SaveCountryFailedEvent(failure)
+            return
+
+        try:
+            statement = 'UPDATE country SET country_code = ?, name = ?, continent_id = ?, wikipedia_link = ?, keywords = ? WHERE country_id = ?;'
+            new_country = event.country()
+            if event.country()[4] is None:
+                new_country = event.country()._replace(wikipedia_link = '')
+            parameters = (new_country[1], new_country[2], new_country[3], new_country[4], new_country[5], new_country[0])
+            cursor = connection.execute(statement, parameters)
+            connection.commit()
+
+            # An update for an id that doesn't exist changes nothing, so there's nothing to
+            # write through to the cache or the reference tables.
+            if cursor.rowcount != 1:
+                yield SaveCountryFailedEvent('Country Not Found')
+                return
+
+            modified_country = Country(new_country[0], new_country[1], new_country[2], new_country[3], new_country[4], new_country[5])
+            self._cache.put(modified_country)
+            self._reference_tables.put(modified_country)
+            yield CountrySavedEvent(modified_country)
+
+        except sqlite3.IntegrityError as e:
+            if "UNIQUE constraint failed" in str(e):
+                yield SaveCountryFailedEvent('Duplicate country_code Not Allowed')
+            elif "FOREIGN KEY constraint failed" in str(e):
+                yield SaveCountryFailedEvent('Invalid continent_code')
+
+    def _reference_failure(self, country: Country) -> str | None:
+        """Returns the reason the reference tables show the given country can't be saved, or
+        None if it can, so most bad saves are rejected without a round trip to SQLite."""
+        existing_id = self._reference_tables.country_id_for_code(country.country_code)
+
+        if existing_id is not None and existing_id != country.country_id:
+            return 'Duplicate country_code Not Allowed'
+        elif self._reference_tables.continent(country.continent_id) is None:
+            return 'Invalid continent_code'
+
+        return None
@@ -0,0 +1,85 @@
+# p2app/engine/cursors.py
+#
+# ICS 33 Winter 2024
+# Project 2: Learning to Fly
+#
+# Helpers for reading query results incrementally, so that large result sets
+# never have to be held in memory all at once.
+
+import sqlite3
+from collections.abc import Iterator
+
+
+FETCH_BATCH_SIZE = 100
+
+
+def fetch_in_batches(cursor: sqlite3.Cursor, batch_size: int = FETCH_BATCH_SIZE) -> Iterator[tuple]:
+    """
+    Yields the rows of an executed cursor one at a time, reading them from SQLite in
+    batches of the given size, and closes the cursor once it is exhausted (or once the
+    caller stops iterating).
+    """
+    try:
+        while True:
+            rows = cursor.fetchmany(batch_size)
+
+            if not rows:
+                break
+
+            yield from rows
+    finally:
+        cursor.close()
+
+
+def paged_batches(
+        cursor: sqlite3.Cursor, page_size: int | None,
+        batch_size: int = FETCH_BATCH_SIZE) -> Iterator[tuple[list[tuple], bool]]:
+    """
+    Yields the rows of one page of an executed search in lists of up to the given size,
+    so each list can be sent to the user interface as a single event.  Each list is paired
+    with whether more rows remain after it beyond the page size (which is only ever true
+    of the last list), which is known because search statements ask for one row more than
+    the page size.  A full list is held back until the row after it has been read, so
+    that it's never followed by an empty one.
+    """
+    batch = []
+
+    for number, row in enumerate(fetch_in_batches(cursor, batch_size), start = 1):
+        if page_size and number > page_size:
+            yield batch, True
+            return
+
+        if len(batch) == batch_size:
+            yield batch, False
+            batch = []
+
+        batch.append(row)
+
+    if batch:
+        yield batch, False
+
+
+def keyset_where_clause(
+        key_column: str, characteristics: list[str], parameters: list,
+        continuation: int | None, page_size: int | None) -> tuple[str, list]:
+    """
+    Returns the WHERE clause (without the WHERE keyword) and its parameters for one
+    page of a search.  Paging is done on the table's primary key rather than with
+    OFFSET: the continuation is the last key the previous page returned, so every
+    page costs the same as the first.  When a page size is given, one row more than
+    the page size is requested, so the caller can tell whether another page exists.
+    """
+    characteristics = list(characteristics)
+    parameters = list(parameters)
+
+    if continuation is not None:
+        characteristics.append(f'{key_column} > ?')
+        parameters.append(continuation)
+
+    clause = ' AND '.join(characteristics) + f' ORDER BY {key_column}'
+
+    if page_size:
+        clause += ' LIMIT ?'
+        parameters.append(page_size + 1)
+
+    return clause, parameters
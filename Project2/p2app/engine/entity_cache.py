@@ -0,0 +1,83 @@
+# p2app/engine/entity_cache.py
+#
+# ICS 33 Winter 2024
+# Project 2: Learning to Fly
+#
+# A bounded, least-recently-used cache of the continents, countries, regions, and
+# airports the engine has loaded or saved, so flipping back and forth between the
+# same few records doesn't query the database every time.
+
+import threading
+from collections import OrderedDict
+from p2app.events import CacheStatistics
+
+
+
+_DEFAULT_CAPACITY = 1024
+
+
+
+class EntityCache:
+    """
+    A write-through cache of Continent, Country, Region, and Airport namedtuples, keyed by
+    their type and id.  The engine fills it when records are loaded, updates it when they're
+    saved, and clears it whenever the database is opened or closed.  Searches and loads can
+    run on several threads at once, so every operation holds a lock.
+    """
+
+    def __init__(self, capacity: int = _DEFAULT_CAPACITY):
+        """Initializes an empty cache that holds at most the given number of entities"""
+        self._capacity = capacity
+        self._entities = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+        self._lock = threading.Lock()
+
+    def get(self, entity_type: type, entity_id: int) -> tuple | None:
+        """Returns the cached entity of the given type and id, or None if it isn't cached."""
+        key = (entity_type, entity_id)
+
+        with self._lock:
+            entity = self._entities.get(key)
+
+            if entity is None:
+                self._misses += 1
+            else:
+                self._hits += 1
+                self._entities.move_to_end(key)
+
+            return entity
+
+    def put(self, entity: tuple) -> None:
+        """Caches an entity (whose first field is its id), evicting the least recently used
+        entity if the cache is full."""
+        with self._lock:
+            self._store(entity)
+
+    def put_if_absent(self, entity: tuple) -> None:
+        """Caches an entity that was just loaded, unless it's already cached.  A load running
+        on a read connection may have read the entity just before a save changed it, so the
+        saved version, if it's been cached in the meantime, is the one kept."""
+        with self._lock:
+            if (type(entity), entity[0]) not in self._entities:
+                self._store(entity)
+
+    def clear(self) -> None:
+        """Removes every entity from the cache, leaving the hit and miss counters alone."""
+        with self._lock:
+            self._entities.clear()
+
+    def statistics(self) -> CacheStatistics:
+        """Returns the cache's hit and miss counters along with its current size."""
+        with self._lock:
+            return CacheStatistics(self._hits, self._misses, len(self._entities), self._capacity)
+
+    def _store(self, entity: tuple) -> None:
+        """Caches an entity, evicting the least recently used one if the cache is full; the
+        lock must already be held."""
+        key = (type(entity), entity[0])
+        self._entities[key] = entity
+        self._entities.move_to_end(key)
+
+        if len(self._entities) > self._capacity:
+            self._entities.popitem(last = False)
@@ -0,0 +1,144 @@
+# p2app/engine/frequency_index.py
+#
+# ICS 33 Winter 2024
+# Project 2: Learning to Fly
+#
+# An in-memory index of every airport and navigation aid frequency, sorted so
+# that the frequencies within a range can be found by binary search.
+
+import sqlite3
+from array import array
+from bisect import bisect_left, bisect_right
+from collections.abc import Iterator
+from p2app.events import *
+
+
+
+# The number of records loaded by each query when turning matches into FrequencyMatches.
+_LOAD_BATCH_SIZE = 500
+
+# The sources of the indexed frequencies, as they're stored in the index's array of
+# sources, along with the query that loads the matching records from each.
+_AIRPORT = 0
+_NAVAID = 1
+
+_SOURCES = {
+    _AIRPORT: (
+        FREQUENCY_SOURCE_AIRPORT,
+        'SELECT rowid, airport_frequency_id, airport_id, type, description, frequency_mhz '
+        'FROM airport_frequency WHERE rowid IN ({placeholders});'),
+    _NAVAID: (
+        FREQUENCY_SOURCE_NAVAID,
+        'SELECT rowid, navigation_aid_id, airport_id, type, name, frequency_khz / 1000.0 '
+        'FROM navigation_aid WHERE rowid IN ({placeholders});')
+}
+
+
+
+class FrequencyIndex:
+    """
+    This object processes the event that finds the airport and navigation aid frequencies
+    within a range.  It answers it from three parallel arrays, sorted by frequency in MHz,
+    holding each frequency, the table it came from, and the rowid of its record; a range
+    is then two binary searches.  The arrays are built the first time they're needed, and
+    rebuilt after anything has been written to the database, either through the engine's
+    connection or by another one.
+    """
+
+    def __init__(self):
+        """Initializes the frequency index engine, with no index built yet"""
+        self._frequencies = array('d')
+        self._sources = array('b')
+        self._rowids = array('q')
+        self._version = None
+
+    def handlers(self) -> dict[type, 'callable']:
+        """
+        Returns a dictionary mapping each frequency event type to the method that handles
+        it, so the main engine can dispatch an event with a single lookup.
+        """
+        return {
+            FindFrequenciesEvent: self.find
+        }
+
+    def clear(self) -> None:
+        """Discards the index, as when the database is closed, so it's rebuilt on next use."""
+        self._frequencies = array('d')
+        self._sources = array('b')
+        self._rowids = array('q')
+        self._version = None
+
+    def find(self, connection: sqlite3.Connection, event: FindFrequenciesEvent) -> Iterator['events']:
+        """Yields a FrequencyFoundEvent for every airport and navigation aid frequency within
+        the event's range (inclusive), lowest frequency first, limited to the event's type of
+        frequency if it has one."""
+        if event.unit() not in FREQUENCY_UNITS:
+            yield FindFrequenciesFailedEvent(f'Unknown frequency unit: {event.unit()}')
+            return
+        elif event.low() > event.high():
+            yield FindFrequenciesFailedEvent('The low end of the range must not be above the high end')
+            return
+
+        scale = 1000 if event.unit() == FREQUENCY_KHZ else 1
+        self._ensure_current(connection)
+
+        start = bisect_left(self._frequencies, event.low() / scale)
+        end = bisect_right(self._frequencies, event.high() / scale)
+
+        for batch_start in range(start, end, _LOAD_BATCH_SIZE):
+            batch_end = min(end, batch_start + _LOAD_BATCH_SIZE)
+            sources = self._sources[batch_start:batch_end]
+            rowids = self._rowids[batch_start:batch_end]
+            records = _load_records(connection, sources, rowids)
+
+            for source, rowid in zip(sources, rowids):
+                match = records.get((source, rowid))
+
+                if match is not None and event.frequency_type() in (None, match.type):
+                    yield FrequencyFoundEvent(match)
+
+    def _ensure_current(self, connection: sqlite3.Connection) -> None:
+        """
+        Builds the index if it hasn't been built since the database last changed.  The
+        connection's total_changes counts the writes made through it; PRAGMA data_version
+        changes whenever another connection commits a write.
+        """
+        cursor = connection.execute('PRAGMA data_version;')
+        version = (connection, connection.total_changes, cursor.fetchone()[0])
+        cursor.close()
+
+        if version == self._version:
+            return
+
+        cursor = connection.execute(
+            f'SELECT frequency_mhz, {_AIRPORT}, rowid FROM airport_frequency '
+            'UNION ALL '
+            f'SELECT frequency_khz / 1000.0, {_NAVAID}, rowid FROM navigation_aid '
+            'ORDER BY 1, 2, 3;')
+
+        entries = cursor.fetchall()
+        cursor.close()
+
+        self._frequencies = array('d', (frequency for frequency, source, rowid in entries))
+        self._sources = array('b', (source for frequency, source, rowid in entries))
+        self._rowids = array('q', (rowid for frequency, source, rowid in entries))
+        self._version = version
+
+
+def _load_records(connection: sqlite3.Connection, sources: array, rowids: array) -> dict[tuple[int, int], FrequencyMatch]:
+    """Loads the records with the given sources and rowids, returning a dictionary mapping
+    each (source, rowid) to its FrequencyMatch."""
+    records = {}
+
+    for source, (source_name, statement) in _SOURCES.items():
+        wanted = [rowid for rowid_source, rowid in zip(sources, rowids) if rowid_source == source]
+
+        if wanted:
+            cursor = connection.execute(statement.format(placeholders = ', '.join('?' for _ in wanted)), wanted)
+
+            for rowid, *fields in cursor.fetchall():
+                records[(source, rowid)] = FrequencyMatch(source_name, *fields)
+
+            cursor.close()
+
+    return records
@@ -0,0 +1,215 @@
+# p2app/engine/full_text.py
+#
+# ICS 33 Winter 2024
+# Project 2: Learning to Fly
+#
+# A full-text index over the names and keywords of continents, countries,
+# regions, and airports, built with SQLite's FTS5 extension, and the search
+# statements that use it for prefix and ranked matching.
+
+import re
+import sqlite3
+from collections.abc import Iterator
+from p2app.events import *
+from p2app.engine.cursors import keyset_where_clause
+
+
+
+# The indexed tables, as table -> (full-text table, key column, indexed columns).  The
+# full-text tables are "external content" tables: they store only the index, reading
+# the text itself from the table they index, and triggers keep them in sync with it.
+FULL_TEXT_TABLES = {
+    'continent': ('continent_fts', 'continent_id', ('name', )),
+    'country': ('country_fts', 'country_id', ('name', 'keywords')),
+    'region': ('region_fts', 'region_id', ('name', 'keywords')),
+    'airport': ('airport_fts', 'airport_id', ('name', 'keywords'))
+}
+
+# How much more a match in a name counts than a match in the keywords when ranking.
+_NAME_WEIGHT = 10.0
+
+_TOKEN_PATTERN = re.compile(r'\w+')
+
+
+
+class FullTextIndex:
+    """
+    This object processes the events that build and drop the full-text index.  The index
+    is opt-in, because building it takes a while on a full OurAirports database; until it
+    exists, prefix and ranked searches fall back to LIKE patterns.
+    """
+
+    def __init__(self):
+        """Initializes the full-text index engine"""
+        pass
+
+    def handlers(self) -> dict[type, 'callable']:
+        """
+        Returns a dictionary mapping each full-text index event type to the method that
+        handles it, so the main engine can dispatch an event with a single lookup.
+        """
+        return {
+            BuildFullTextIndexEvent: self.build,
+            DropFullTextIndexEvent: self.drop
+        }
+
+    def build(self, connection: sqlite3.Connection, event: BuildFullTextIndexEvent) -> Iterator['events']:
+        """
+        Creates the full-text table and triggers for every indexed table that doesn't have
+        them yet, fills each from its table's existing rows, and yields a
+        FullTextIndexBuiltEvent naming the tables that were indexed.
+        """
+        built = []
+
+        with connection:
+            for table, (fts_table, key_column, columns) in FULL_TEXT_TABLES.items():
+                if not is_full_text_indexed(connection, table):
+                    for statement in _create_statements(table, fts_table, key_column, columns):
+                        connection.execute(statement)
+
+                    connection.execute(f"INSERT INTO {fts_table} ({fts_table}) VALUES ('rebuild');")
+                    built.append(table)
+
+        yield FullTextIndexBuiltEvent(built)
+
+    def drop(self, connection: sqlite3.Connection, event: DropFullTextIndexEvent) -> Iterator['events']:
+        """Drops the full-text table and triggers of every indexed table that has them,
+        yielding a FullTextIndexDroppedEvent naming the tables that were dropped."""
+        dropped = []
+
+        with connection:
+            for table, (fts_table, key_column, columns) in FULL_TEXT_TABLES.items():
+                if is_full_text_indexed(connection, table):
+                    for trigger in ('insert', 'delete', 'update'):
+                        connection.execute(f'DROP TRIGGER IF EXISTS {fts_table}_{trigger};')
+
+                    connection.execute(f'DROP TABLE {fts_table};')
+                    dropped.append(table)
+
+        yield FullTextIndexDroppedEvent(dropped)
+
+
+def is_full_text_indexed(connection: sqlite3.Connection, table: str) -> bool:
+    """Returns True if the given table's full-text table exists."""
+    cursor = connection.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?;",
+        (FULL_TEXT_TABLES[table][0], ))
+
+    exists = cursor.fetchone() is not None
+    cursor.close()
+    return exists
+
+
+def match_search_statement(
+        connection: sqlite3.Connection, table: str, characteristics: list[str], parameters: list,
+        name: str, match_mode: str, continuation: int | tuple[float, int] | None,
+        page_size: int | None) -> tuple[str, list]:
+    """
+    Returns the SQL statement and parameters for a search whose name criterion is matched
+    by prefix or by rank, along with the given characteristics for the other criteria.
+
+    When the table is full-text indexed, each result row has one extra column after the
+    table's own: its bm25 score, where lower is better.  Results are ordered by score and
+    then by key, so pages are continued from a (score, key) pair.  Otherwise, the name is
+    matched with LIKE and results are paged by key alone, as exact searches are (picking
+    up from the key of a ranked continuation, if the index was dropped between pages).
+    """
+    fts_table, key_column, columns = FULL_TEXT_TABLES[table]
+    expression = _match_expression(name, match_mode)
+
+    if expression is None or not is_full_text_indexed(connection, table):
+        if isinstance(continuation, tuple):
+            continuation = continuation[1]
+
+        characteristic, like_parameters = _like_characteristic(columns, name, match_mode)
+        clause, parameters = keyset_where_clause(
+            key_column, characteristics + [characteristic], parameters + like_parameters,
+            continuation, page_size)
+
+        return f'SELECT * FROM {table} WHERE {clause}', parameters
+
+    weights = ', '.join(str(_NAME_WEIGHT if column == 'name' else 1.0) for column in columns)
+    conditions = [f'{fts_table} MATCH ?'] + characteristics
+    parameters = [expression] + parameters
+
+    statement = \
+        f'SELECT * FROM (SELECT {table}.*, bm25({fts_table}, {weights}) AS score ' + \
+        f'FROM {table} JOIN {fts_table} ON {fts_table}.rowid = {table}.{key_column} ' + \
+        f'WHERE {" AND ".join(conditions)})'
+
+    if continuation is not None:
+        statement += f' WHERE (score, {key_column}) > (?, ?)'
+        parameters.extend(continuation)
+
+    statement += f' ORDER BY score, {key_column}'
+
+    if page_size:
+        statement += ' LIMIT ?'
+        parameters.append(page_size + 1)
+
+    return statement, parameters
+
+
+def search_continuation(result: tuple, column_count: int) -> int | tuple[float, int]:
+    """Returns the continuation that resumes a search after the given result row, which
+    is a (score, key) pair if the row came from a ranked search and the key otherwise."""
+    if len(result) > column_count:
+        return result[column_count], result[0]
+    else:
+        return result[0]
+
+
+def _create_statements(table: str, fts_table: str, key_column: str, columns: tuple[str]) -> list[str]:
+    """Returns the statements that create a table's full-text table and the triggers that
+    keep it in sync when rows are inserted, deleted, or have their text updated."""
+    column_list = ', '.join(columns)
+    new_values = ', '.join(f'new.{column}' for column in columns)
+    old_values = ', '.join(f'old.{column}' for column in columns)
+
+    insert_new = \
+        f'INSERT INTO {fts_table} (rowid, {column_list}) VALUES (new.{key_column}, {new_values});'
+
+    delete_old = \
+        f"INSERT INTO {fts_table} ({fts_table}, rowid, {column_list}) " + \
+        f"VALUES ('delete', old.{key_column}, {old_values});"
+
+    return [
+        f'CREATE VIRTUAL TABLE {fts_table} USING fts5({column_list}, '
+        f"content = '{table}', content_rowid = '{key_column}', "
+        f"tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3');",
+
+        f'CREATE TRIGGER {fts_table}_insert AFTER INSERT ON {table} BEGIN {insert_new} END;',
+
+        f'CREATE TRIGGER {fts_table}_delete AFTER DELETE ON {table} BEGIN {delete_old} END;',
+
+        f'CREATE TRIGGER {fts_table}_update AFTER UPDATE OF {key_column}, {column_list} ON {table} '
+        f'BEGIN {delete_old} {insert_new} END;'
+    ]
+
+
+def _match_expression(name: str, match_mode: str) -> str | None:
+    """
+    Returns the FTS5 query for a name typed by the user, or None if it contains no words.
+    A prefix match requires a name to contain a word beginning with each word typed; a
+    ranked match requires any indexed column to contain a word beginning with any of them.
+    """
+    tokens = [f'"{token}"*' for token in _TOKEN_PATTERN.findall(name)]
+
+    if not tokens:
+        return None
+    elif match_mode == MATCH_PREFIX:
+        return ' '.join(f'name : {token}' for token in tokens)
+    else:
+        return ' OR '.join(tokens)
+
+
+def _like_characteristic(columns: tuple[str], name: str, match_mode: str) -> tuple[str, list]:
+    """Returns a characteristic that approximates a prefix or ranked match with LIKE, for
+    tables that aren't full-text indexed, along with its parameters."""
+    escaped = name.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+    if match_mode == MATCH_PREFIX:
+        return "name LIKE ? ESCAPE '\\'", [f'{escaped}%']
+
+    characteristics = [f"{column} LIKE ? ESCAPE '\\'" for column in columns]
+    return f'({" OR ".join(characteristics)})', [f'%{escaped}%'] * len(columns)
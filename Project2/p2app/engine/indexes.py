@@ -0,0 +1,149 @@
+# p2app/engine/indexes.py
+#
+# ICS 33 Winter 2024
+# Project 2: Learning to Fly
+#
+# Management of the secondary indexes that the engine's searches rely on, along
+# with an advisor that asks SQLite how each search would be carried out.
+
+import sqlite3
+from collections.abc import Iterator
+from p2app.events import *
+
+
+
+# The curated set of secondary indexes, as (name, table, columns).  schema.sql only
+# defines primary keys and UNIQUE constraints, so without these every search by name
+# or local code, and every lookup of an airport's runways or frequencies, scans the
+# whole table.
+SECONDARY_INDEXES = [
+    ('country_name_index', 'country', ('name', )),
+    ('region_name_index', 'region', ('name', )),
+    ('region_local_code_index', 'region', ('local_code', )),
+    ('airport_name_index', 'airport', ('name', )),
+    ('airport_iata_code_index', 'airport', ('iata_code', )),
+    ('airport_gps_code_index', 'airport', ('gps_code', )),
+    ('airport_municipality_index', 'airport', ('municipality', )),
+    ('airport_region_id_index', 'airport', ('region_id', )),
+    ('airport_country_id_index', 'airport', ('country_id', )),
+    ('runway_airport_id_index', 'runway', ('airport_id', )),
+    ('airport_frequency_airport_id_index', 'airport_frequency', ('airport_id', )),
+    ('navigation_aid_id_index', 'navigation_aid', ('navigation_aid_id', ))
+]
+
+
+
+class Indexes:
+    """
+    This object processes the index-related events sent to it by the user interface:
+    creating, listing and dropping the curated secondary indexes, gathering statistics
+    with ANALYZE, and explaining the query plan of every search the engine can issue.
+    """
+
+    def __init__(self, table_engines: list):
+        """
+        Initializes the index engine, given the table engines whose searches should be
+        explained.  Each must provide sample_searches and search_statement methods.
+        """
+        self._table_engines = table_engines
+
+    def handlers(self) -> dict[type, 'callable']:
+        """
+        Returns a dictionary mapping each index-related event type to the method that
+        handles it, so the main engine can dispatch an event with a single lookup.
+        """
+        return {
+            CreateIndexesEvent: self.create,
+            DropIndexesEvent: self.drop,
+            ListIndexesEvent: self.list_indexes,
+            ExplainSearchesEvent: self.explain,
+            AnalyzeDatabaseEvent: self.analyze
+        }
+
+    def create(self, connection: sqlite3.Connection, event: CreateIndexesEvent) -> Iterator['events']:
+        """Creates every curated index that doesn't already exist, yielding an IndexesCreatedEvent
+        that names the ones that were created."""
+        existing = _existing_index_names(connection)
+        created = []
+
+        for name, table, columns in SECONDARY_INDEXES:
+            if name not in existing:
+                connection.execute(f'CREATE INDEX {name} ON {table} ({", ".join(columns)});')
+                created.append(name)
+
+        connection.commit()
+        yield IndexesCreatedEvent(created)
+
+    def drop(self, connection: sqlite3.Connection, event: DropIndexesEvent) -> Iterator['events']:
+        """Drops every curated index that exists, yielding an IndexesDroppedEvent that names
+        the ones that were dropped.  Indexes that aren't in the curated set are left alone."""
+        existing = _existing_index_names(connection)
+        dropped = []
+
+        for name, table, columns in SECONDARY_INDEXES:
+            if name in existing:
+                connection.execute(f'DROP INDEX {name};')
+                dropped.append(name)
+
+        connection.commit()
+        yield IndexesDroppedEvent(dropped)
+
+    def list_indexes(self, connection: sqlite3.Connection, event: ListIndexesEvent) -> Iterator['events']:
+        """Yields an IndexesListedEvent describing every curated index and whether it exists."""
+        existing = _existing_index_names(connection)
+
+        yield IndexesListedEvent([
+            IndexStatus(name, table, columns, name in existing)
+            for name, table, columns in SECONDARY_INDEXES
+        ])
+
+    def explain(self, connection: sqlite3.Connection, event: ExplainSearchesEvent) -> Iterator['events']:
+        """
+        Runs EXPLAIN QUERY PLAN on every shape of search statement the table engines can
+        issue, yielding a SearchesExplainedEvent that reports each plan and whether it still
+        scans a whole table.
+        """
+        plans = []
+
+        for table_engine in self._table_engines:
+            for search in table_engine.sample_searches():
+                statement, parameters = table_engine.search_statement(connection, search)
+                cursor = connection.execute(f'EXPLAIN QUERY PLAN {statement}', parameters)
+                plan = [row[3] for row in cursor.fetchall()]
+                cursor.close()
+
+                is_full_scan = any(_is_full_scan(detail) for detail in plan)
+                plans.append(SearchPlan(repr(search), statement, plan, is_full_scan))
+
+        yield SearchesExplainedEvent(plans)
+
+    def analyze(self, connection: sqlite3.Connection, event: AnalyzeDatabaseEvent) -> Iterator['events']:
+        """Gathers statistics about the tables and indexes, so the query planner can choose
+        between indexes well, yielding a DatabaseAnalyzedEvent when it's done."""
+        connection.execute('ANALYZE;')
+        connection.commit()
+        yield DatabaseAnalyzedEvent()
+
+
+def create_indexes(connection: sqlite3.Connection, names: list[str]) -> None:
+    """Creates the curated indexes with the given names, skipping any that already exist."""
+    for name, table, columns in SECONDARY_INDEXES:
+        if name in names:
+            connection.execute(f'CREATE INDEX IF NOT EXISTS {name} ON {table} ({", ".join(columns)});')
+
+    connection.commit()
+
+
+def _existing_index_names(connection: sqlite3.Connection) -> set[str]:
+    """Returns the names of all of the indexes in the database."""
+    cursor = connection.execute("SELECT name FROM sqlite_master WHERE type = 'index';")
+    names = {row[0] for row in cursor.fetchall()}
+    cursor.close()
+    return names
+
+
+def _is_full_scan(detail: str) -> bool:
+    """Returns True if a line of EXPLAIN QUERY PLAN output describes a scan of a whole table
+    (or of a whole index), as opposed to a search that uses an index to narrow the rows.
+    A "scan" of a full-text table is really a lookup in its index, so it doesn't count."""
+    return detail.startswith('SCAN ') and 'VIRTUAL TABLE' not in detail
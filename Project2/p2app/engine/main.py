@@ -8,11 +8,61 @@
 # This is the outermost layer of the part of the program that you'll need to build,
 # which means that YOU WILL DEFINITELY NEED TO MAKE CHANGES TO THIS FILE.
 from p2app.events import *
+import csv
 import sqlite3
+import time
+from collections.abc import Iterator
+from contextlib import AbstractContextManager, nullcontext
 from pathlib import Path
+from p2app.engine.airports_engine import Airports
 from p2app.engine.continents_engine import Continents
 from p2app.engine.countries_engine import Countries
 from p2app.engine.regions_engine import Regions
+from p2app.engine.runway_summary import RunwaySummary
+from p2app.engine.bulk_import import BulkImport
+from p2app.engine.cancellation import RunningSearches
+from p2app.engine.connections import ConnectionManager
+from p2app.engine.entity_cache import EntityCache
+from p2app.engine.frequency_index import FrequencyIndex
+from p2app.engine.full_text import FullTextIndex
+from p2app.engine.indexes import Indexes
+from p2app.engine.navaid_proximity import NavaidProximity
+from p2app.engine.profiles import get_profile
+from p2app.engine.reference_tables import ReferenceTables
+from p2app.engine.spatial import NearbyAirports, SpatialIndex
+from p2app.engine.table_export import TableExport
+from p2app.engine.timing import TimingStatistics
+
+
+
+# The events whose handlers only read from the database, each mapped to the lane it's
+# processed in.  They're processed on a connection borrowed from the pool of read
+# connections, and may be processed on other threads at the same time as the events
+# that write and as the events in other lanes.  The events in one lane are processed
+# one at a time, in the order they were sent, so (for example) a region that's loaded
+# after a search of the regions can't arrive before the search's results.
+_CONCURRENT_EVENTS = {
+    StartContinentSearchEvent: 'continents', LoadContinentEvent: 'continents',
+    StartCountrySearchEvent: 'countries', LoadCountryEvent: 'countries',
+    StartRegionSearchEvent: 'regions', LoadRegionEvent: 'regions',
+    StartAirportSearchEvent: 'airports', LoadAirportEvent: 'airports',
+    FindNearestAirportsEvent: 'nearby airports', FindAirportsWithinEvent: 'nearby airports',
+    LoadNearbyNavaidsEvent: 'nearby navaids', StartTableExportEvent: 'exports'
+}
+
+# The searches that can be stopped while they're in progress, either by a
+# CancelSearchEvent or by running past the connection profile's time budget.
+_CANCELLABLE_EVENTS = frozenset({
+    StartContinentSearchEvent, StartCountrySearchEvent,
+    StartRegionSearchEvent, StartAirportSearchEvent
+})
+
+# The events that are processed as soon as they're sent, on the thread that sent
+# them, rather than waiting their turn behind the events sent before them, which
+# could include the very searches they're meant to cancel.
+_IMMEDIATE_EVENTS = frozenset({
+    CancelSearchEvent
+})
 
 
 class Engine:
@@ -24,48 +74,222 @@ class Engine:
 
     def __init__(self):
         """Initializes the engine"""
-        self._connection = None
+        self._timing = TimingStatistics()
+        self._connections = ConnectionManager(self._timing)
+        self._searches = RunningSearches()
+        self._search_budget = None
+        self._cache = EntityCache()
+        self._reference_tables = ReferenceTables()
+        self._airport_locations = SpatialIndex()
+        self._continents = Continents(self._cache, self._reference_tables)
+        self._countries = Countries(self._cache, self._reference_tables)
+        self._regions = Regions(self._cache, self._reference_tables)
+        self._airports = Airports(self._cache, self._reference_tables, self._airport_locations)
+
+        self._handlers = {
+            OpenDatabaseEvent: self._open_database,
+            CloseDatabaseEvent: self._close_database,
+            QuitInitiatedEvent: self._quit,
+            CancelSearchEvent: self._cancel_searches,
+            GetCacheStatisticsEvent: self._cache_statistics,
+            GetConnectionPoolStatisticsEvent: self._connection_pool_statistics,
+            GetTimingStatisticsEvent: self._timing_statistics,
+            ResetTimingStatisticsEvent: self._reset_timing_statistics,
+            DumpTimingStatisticsEvent: self._dump_timing_statistics
+        }
+
+        table_engines = [self._continents, self._countries, self._regions, self._airports]
+        self._indexes = Indexes(table_engines)
+        self._bulk_import = BulkImport(self._reference_tables)
+        self._full_text = FullTextIndex()
+        self._nearby_airports = NearbyAirports(self._airport_locations)
+        self._runway_summary = RunwaySummary()
+        self._navaid_proximity = NavaidProximity()
+        self._frequency_index = FrequencyIndex()
+        self._table_export = TableExport()
+
+        other_engines = [
+            self._indexes, self._bulk_import, self._full_text, self._nearby_airports,
+            self._runway_summary, self._navaid_proximity, self._frequency_index,
+            self._table_export
+        ]
+
+        for engine in table_engines + other_engines:
+            self._handlers.update(engine.handlers())
+
+
+    def concurrent_lane(self, event) -> str | None:
+        """Returns the name of the lane an event can be processed in, on another thread at the
+        same time as the events in other lanes, if it only reads from the database and there's
+        a pool of read connections to process it with; otherwise, returns None."""
+        if self._connections.pool_size() > 0:
+            return _CONCURRENT_EVENTS.get(type(event))
+        else:
+            return None
+
+
+    def is_immediate(self, event) -> bool:
+        """Returns True if the event should be processed as soon as it's sent, on the thread
+        that sent it, rather than after the events sent before it."""
+        return type(event) in _IMMEDIATE_EVENTS
 
 
     def process_event(self, event) -> None:
         """A generator function that processes one event sent from the user interface,
-        yielding zero or more events in response."""
-        try:
-            if isinstance(event, OpenDatabaseEvent):
-                try:
-                    connection = sqlite3.connect(event.path())
-                    cursor = connection.execute('SELECT airport_id FROM airport;')
-                    cursor.fetchone()
-                    connection.execute('PRAGMA foreign_keys = ON;')
-                    self._connection = connection
-                    yield DatabaseOpenedEvent(event.path())
-                except sqlite3.Error as e:
-                    yield DatabaseOpenFailedEvent(str(e))
-
-            elif isinstance(event, CloseDatabaseEvent):
-                yield DatabaseClosedEvent()
-
-            elif isinstance(event, QuitInitiatedEvent):
-                yield EndApplicationEvent()
+        yielding zero or more events in response, and records how long it took (until the
+        last event was yielded) in the timing statistics."""
+        handler = self._handlers.get(type(event))
 
-            else:
-                for event in Continents.event_handler(Continents(), self._connection, event):
-                    yield event
+        if handler is None:
+            return
+
+        start = time.perf_counter()
+        result_count = 0
+
+        for result_event in self._handle(handler, event):
+            result_count += 1
+            yield result_event
 
-                for event in Countries.event_handler(Countries(), self._connection, event):
-                    yield event
+        self._timing.record(TIMING_KIND_EVENT, type(event).__name__, time.perf_counter() - start, result_count)
 
-                for event in Regions.event_handler(Regions(), self._connection, event):
-                    yield event
+
+    def _handle(self, handler: 'callable', event) -> Iterator['events']:
+        """Runs an event's handler on the appropriate connection, turning any exception it
+        raises into an ErrorEvent."""
+        try:
+            with self._connection_for(event) as connection:
+                if type(event) in _CANCELLABLE_EVENTS:
+                    yield from self._searches.run(handler, connection, event, self._search_budget)
+                else:
+                    yield from handler(connection, event)
+        except sqlite3.OperationalError as e:
+            if 'readonly database' in str(e):
+                yield ErrorEvent('The database was opened with a read-only connection profile')
+            else:
+                yield ErrorEvent('Unknown error')
+        except GeneratorExit:
+            # The events are no longer wanted (e.g., an export abandoned when the
+            # application was closed), so there's no one to report an error to.
+            raise
         except:
             yield ErrorEvent('Unknown error')
 
 
+    def _connection_for(self, event) -> AbstractContextManager[sqlite3.Connection | None]:
+        """Returns a context manager that lends out the connection to process an event on: a
+        read connection from the pool if the event only reads and there is a pool, otherwise
+        the writer (without the cost of borrowing it)."""
+        if type(event) in _CONCURRENT_EVENTS and self._connections.pool_size() > 0:
+            return self._connections.reader()
+        else:
+            return nullcontext(self._connections.writer())
 
 
+    def _open_database(self, connection: sqlite3.Connection, event: OpenDatabaseEvent) -> Iterator['events']:
+        """Closes the database that's open, if any, then opens the one at the event's path,
+        along with the requested profile's pool of read connections, tuning each connection
+        with the profile, then loads the continents, countries, and airport positions into
+        memory, and reports what settings it applied."""
+        try:
+            profile = get_profile(event.profile_name())
+        except KeyError:
+            yield DatabaseOpenFailedEvent(f'Unknown connection profile: {event.profile_name()}')
+            return
 
+        self._forget_database()
 
+        try:
+            settings = self._connections.open(event.path(), profile)
+        except sqlite3.Error as e:
+            yield DatabaseOpenFailedEvent(str(e))
+            return
 
+        try:
+            connection = self._connections.writer()
+            self._reference_tables.load(connection)
+            self._nearby_airports.load(connection)
+            self._frequency_index.clear()
+            self._cache.clear()
+
+            # A read-only connection can't create indexes, so its airport searches use
+            # whichever of them the database already has.
+            if not profile.read_only:
+                self._airports.prepare(connection)
+        except sqlite3.Error as e:
+            self._connections.close()
+            yield DatabaseOpenFailedEvent(str(e))
+            return
+
+        self._search_budget = profile.search_budget_seconds
+        yield DatabaseOpenedEvent(event.path())
+        yield DatabaseProfileAppliedEvent(profile.name, settings)
+
+
+    def _close_database(self, connection: sqlite3.Connection, event: CloseDatabaseEvent) -> Iterator['events']:
+        """Closes the currently open database, once any searches still using it are done."""
+        self._forget_database()
+        yield DatabaseClosedEvent()
+
+
+    def _forget_database(self) -> None:
+        """Closes every connection to the open database, if any, once any searches still
+        using it are done, and discards everything loaded from it."""
+        self._connections.close()
+        self._cache.clear()
+        self._reference_tables.clear()
+        self._nearby_airports.clear()
+        self._frequency_index.clear()
+
+
+    def _quit(self, connection: sqlite3.Connection, event: QuitInitiatedEvent) -> Iterator['events']:
+        """Ends the application."""
+        yield EndApplicationEvent()
+
+
+    def _cancel_searches(self, connection: sqlite3.Connection, event: CancelSearchEvent) -> Iterator['events']:
+        """Stops the searches of the kind the event names that are from earlier generations
+        than the event's (or all of them, if it has none); each one reports that it was
+        cancelled."""
+        self._searches.cancel(event.search(), event.generation())
+        yield from ()
 
 
+    def _cache_statistics(self, connection: sqlite3.Connection, event: GetCacheStatisticsEvent) -> Iterator['events']:
+        """Reports the entity cache's hit and miss counters."""
+        yield CacheStatisticsEvent(self._cache.statistics())
+
+
+    def _connection_pool_statistics(
+            self, connection: sqlite3.Connection, event: GetConnectionPoolStatisticsEvent) -> Iterator['events']:
+        """Reports how much the pool of read connections is being used."""
+        yield ConnectionPoolStatisticsEvent(self._connections.statistics())
+
+
+    def _timing_statistics(self, connection: sqlite3.Connection, event: GetTimingStatisticsEvent) -> Iterator['events']:
+        """Reports the timing statistics of every event type and statement shape so far."""
+        yield TimingStatisticsEvent(self._timing.snapshot())
+
+
+    def _reset_timing_statistics(
+            self, connection: sqlite3.Connection, event: ResetTimingStatisticsEvent) -> Iterator['events']:
+        """Discards the timing statistics recorded so far."""
+        self._timing.reset()
+        yield TimingStatisticsResetEvent()
+
+
+    def _dump_timing_statistics(
+            self, connection: sqlite3.Connection, event: DumpTimingStatisticsEvent) -> Iterator['events']:
+        """Writes the timing statistics to a CSV file at the event's path, one row per event
+        type or statement shape."""
+        statistics = self._timing.snapshot()
+
+        try:
+            with Path(event.path()).open('w', encoding = 'utf-8', newline = '') as file:
+                writer = csv.writer(file)
+                writer.writerow(TimingStatistic._fields)
+                writer.writerows(statistics)
+        except OSError as e:
+            yield ErrorEvent(f'Could not write timing statistics to {event.path()}: {e}')
+            return
 
+        yield TimingStatisticsDumpedEvent(event.path(), len(statistics))
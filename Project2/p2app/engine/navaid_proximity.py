@@ -0,0 +1,128 @@
+# p2app/engine/navaid_proximity.py
+#
+# ICS 33 Winter 2024
+# Project 2: Learning to Fly
+#
+# A batch job that finds the navigation aids within a given distance of every
+# airport, storing the pairs in a derived table that an airport's details can
+# be read from.
+
+import sqlite3
+from collections.abc import Iterator
+from p2app.engine.spatial import SpatialIndex
+from p2app.events import *
+
+
+
+PROXIMITY_TABLE = 'airport_navaid_proximity'
+
+# The number of airports whose nearby navigation aids are found and written at a time,
+# which bounds how many pairs are held in memory at once.
+_AIRPORT_BLOCK_SIZE = 5000
+
+_CREATE_TABLE = f"""
+    CREATE TABLE {PROXIMITY_TABLE} (
+        airport_id INTEGER NOT NULL,
+        navigation_aid_id INTEGER NOT NULL,
+        distance_km REAL NOT NULL,
+        PRIMARY KEY (airport_id, navigation_aid_id),
+        FOREIGN KEY (airport_id) REFERENCES airport (airport_id)
+    ) STRICT, WITHOUT ROWID;"""
+
+
+
+class NavaidProximity:
+    """
+    This object processes the events that build and read the navaid proximity table,
+    which pairs every airport with the navigation aids within a given distance of it.
+    The navigation aids are put into a spatial index, so each airport is only measured
+    against the handful of navigation aids in the grid cells around it.
+    """
+
+    def __init__(self):
+        """Initializes the navaid proximity engine"""
+        pass
+
+    def handlers(self) -> dict[type, 'callable']:
+        """
+        Returns a dictionary mapping each navaid proximity event type to the method that
+        handles it, so the main engine can dispatch an event with a single lookup.
+        """
+        return {
+            BuildNavaidProximityEvent: self.build,
+            LoadNearbyNavaidsEvent: self.load_nearby
+        }
+
+    def build(self, connection: sqlite3.Connection, event: BuildNavaidProximityEvent) -> Iterator['events']:
+        """
+        Replaces the navaid proximity table with every (airport, navigation aid) pair within
+        the event's distance of one another, all in one transaction, yielding a
+        NavaidProximityBuiltEvent with the number of pairs found.  The airports are read and
+        their pairs written a block at a time.  navigation_aid_id isn't declared as a key, so
+        it's indexed here to let an airport's nearby navigation aids be looked up by it.
+        """
+        if event.radius_km() <= 0:
+            yield NavaidProximityFailedEvent('The distance must be greater than zero')
+            return
+
+        cursor = connection.execute(
+            'SELECT navigation_aid_id, latitude_deg, longitude_deg FROM navigation_aid;')
+
+        navaids = SpatialIndex()
+        navaids.load(cursor)
+        cursor.close()
+
+        pair_count = 0
+
+        with connection:
+            connection.execute(
+                'CREATE INDEX IF NOT EXISTS navigation_aid_id_index ON navigation_aid (navigation_aid_id);')
+
+            connection.execute(f'DROP TABLE IF EXISTS {PROXIMITY_TABLE};')
+            connection.execute(_CREATE_TABLE)
+
+            cursor = connection.execute('SELECT airport_id, latitude_deg, longitude_deg FROM airport;')
+
+            while airports := cursor.fetchmany(_AIRPORT_BLOCK_SIZE):
+                pairs = [
+                    (airport_id, navaid_id, distance)
+                    for airport_id, latitude_deg, longitude_deg in airports
+                    for distance, navaid_id in navaids.within(latitude_deg, longitude_deg, event.radius_km())
+                ]
+
+                connection.executemany(f'INSERT INTO {PROXIMITY_TABLE} VALUES (?, ?, ?);', pairs)
+                pair_count += len(pairs)
+
+            cursor.close()
+
+        yield NavaidProximityBuiltEvent(event.radius_km(), pair_count)
+
+    def load_nearby(self, connection: sqlite3.Connection, event: LoadNearbyNavaidsEvent) -> Iterator['events']:
+        """Yields a NearbyNavaidsLoadedEvent with the navigation aids near the event's
+        airport, nearest first, as found when the navaid proximity table was last built."""
+        if not has_navaid_proximity(connection):
+            yield NavaidProximityFailedEvent('Build the navaid proximity table before loading nearby navaids')
+            return
+
+        cursor = connection.execute(
+            'SELECT n.navigation_aid_id, n.ident, n.name, n.type, n.frequency_khz, p.distance_km '
+            f'FROM {PROXIMITY_TABLE} AS p '
+            'JOIN navigation_aid AS n ON n.navigation_aid_id = p.navigation_aid_id '
+            'WHERE p.airport_id = ? '
+            'ORDER BY p.distance_km, n.navigation_aid_id;',
+            (event.airport_id(), ))
+
+        navaids = [NearbyNavaid(*result) for result in cursor.fetchall()]
+        cursor.close()
+
+        yield NearbyNavaidsLoadedEvent(event.airport_id(), navaids)
+
+
+def has_navaid_proximity(connection: sqlite3.Connection) -> bool:
+    """Returns True if the navaid proximity table exists."""
+    cursor = connection.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?;", (PROXIMITY_TABLE, ))
+
+    exists = cursor.fetchone() is not None
+    cursor.close()
+    return exists
@@ -0,0 +1,118 @@
+# p2app/engine/profiles.py
+#
+# ICS 33 Winter 2024
+# Project 2: Learning to Fly
+#
+# Connection profiles: named sets of SQLite pragmas that are applied whenever a
+# database is opened, so the engine can be tuned for interactive editing, for
+# loading large amounts of data, or for read-only analysis.
+
+import sqlite3
+from collections import namedtuple
+from pathlib import Path
+from p2app.events import CONNECTION_PROFILE_NAMES
+
+
+
+ConnectionProfile = namedtuple(
+    'ConnectionProfile',
+    ['name', 'read_only', 'journal_mode', 'synchronous', 'cache_size',
+     'mmap_size', 'temp_store', 'busy_timeout', 'reader_count', 'search_budget_seconds'])
+
+ConnectionProfile.__annotations__ = {
+    'name': str,
+    'read_only': bool,
+    'journal_mode': str | None,
+    'synchronous': str,
+    'cache_size': int,
+    'mmap_size': int,
+    'temp_store': str,
+    'busy_timeout': int,
+    'reader_count': int,
+    'search_budget_seconds': float | None
+}
+
+
+_MEBIBYTE = 1024 * 1024
+
+
+# A negative cache_size is measured in KiB rather than in pages.  A journal_mode
+# of None leaves the database's journal mode alone, which is required for
+# read-only connections, since changing it means writing to the database file.
+# reader_count is the number of read-only connections pooled alongside the main
+# connection, so that several searches can run at once.  A search that runs longer
+# than search_budget_seconds is stopped; None lets searches run as long as they take.
+PROFILES = {
+    'interactive': ConnectionProfile(
+        name = 'interactive', read_only = False, journal_mode = 'WAL', synchronous = 'NORMAL',
+        cache_size = -64 * 1024, mmap_size = 256 * _MEBIBYTE, temp_store = 'MEMORY',
+        busy_timeout = 5000, reader_count = 4, search_budget_seconds = 5.0),
+    'bulk-load': ConnectionProfile(
+        name = 'bulk-load', read_only = False, journal_mode = 'WAL', synchronous = 'OFF',
+        cache_size = -256 * 1024, mmap_size = 256 * _MEBIBYTE, temp_store = 'MEMORY',
+        busy_timeout = 30000, reader_count = 1, search_budget_seconds = None),
+    'read-only analytics': ConnectionProfile(
+        name = 'read-only analytics', read_only = True, journal_mode = None, synchronous = 'NORMAL',
+        cache_size = -256 * 1024, mmap_size = 1024 * _MEBIBYTE, temp_store = 'MEMORY',
+        busy_timeout = 5000, reader_count = 8, search_budget_seconds = None)
+}
+
+# SQLite reports these two settings as numbers when they're read back.
+_SYNCHRONOUS_NAMES = {0: 'OFF', 1: 'NORMAL', 2: 'FULL', 3: 'EXTRA'}
+_TEMP_STORE_NAMES = {0: 'DEFAULT', 1: 'FILE', 2: 'MEMORY'}
+
+DEFAULT_PROFILE_NAME = CONNECTION_PROFILE_NAMES[0]
+
+
+def get_profile(name: str | None) -> ConnectionProfile:
+    """Returns the profile with the given name (or the default profile if the name is None),
+    raising a KeyError if there is no such profile."""
+    return PROFILES[name if name is not None else DEFAULT_PROFILE_NAME]
+
+
+def connect(
+        path: Path, profile: ConnectionProfile, check_same_thread: bool = True,
+        factory = sqlite3.Connection) -> sqlite3.Connection:
+    """Opens a connection to the database at the given path, read-only if the profile asks
+    for it, creating it with the given factory.  The profile's pragmas are not applied; see
+    apply_profile."""
+    if profile.read_only:
+        return sqlite3.connect(
+            f'{Path(path).resolve().as_uri()}?mode=ro', uri = True, check_same_thread = check_same_thread,
+            factory = factory)
+    else:
+        return sqlite3.connect(path, check_same_thread = check_same_thread, factory = factory)
+
+
+def reader_profile(profile: ConnectionProfile) -> ConnectionProfile:
+    """Returns the profile applied to the read-only connections pooled alongside a connection
+    opened with the given profile."""
+    return profile._replace(read_only = True, journal_mode = None)
+
+
+def apply_profile(connection: sqlite3.Connection, profile: ConnectionProfile) -> dict[str, object]:
+    """
+    Applies a profile's pragmas to a connection, then reads each setting back from SQLite
+    and returns them, so the caller can report what actually took effect (e.g., a database
+    on a file system that doesn't support WAL keeps its old journal mode).
+    """
+    if profile.journal_mode is not None:
+        connection.execute(f'PRAGMA journal_mode = {profile.journal_mode};').fetchone()
+
+    connection.execute(f'PRAGMA synchronous = {profile.synchronous};')
+    connection.execute(f'PRAGMA cache_size = {int(profile.cache_size)};')
+    connection.execute(f'PRAGMA mmap_size = {int(profile.mmap_size)};').fetchone()
+    connection.execute(f'PRAGMA temp_store = {profile.temp_store};')
+    connection.execute(f'PRAGMA busy_timeout = {int(profile.busy_timeout)};').fetchone()
+    connection.execute(f'PRAGMA query_only = {"ON" if profile.read_only else "OFF"};')
+
+    settings = {}
+
+    for pragma in ('journal_mode', 'synchronous', 'cache_size', 'mmap_size',
+                   'temp_store', 'busy_timeout', 'query_only', 'foreign_keys'):
+        settings[pragma] = connection.execute(f'PRAGMA {pragma};').fetchone()[0]
+
+    settings['synchronous'] = _SYNCHRONOUS_NAMES.get(settings['synchronous'], settings['synchronous'])
+    settings['temp_store'] = _TEMP_STORE_NAMES.get(settings['temp_store'], settings['temp_store'])
+
+    return settings
@@ -0,0 +1,124 @@
+# p2app/engine/reference_tables.py
+#
+# ICS 33 Winter 2024
+# Project 2: Learning to Fly
+#
+# In-memory copies of the continent and country tables, which are small enough
+# (a handful of continents and a few hundred countries) to keep in full, so the
+# engine can validate and resolve references to them without asking SQLite.
+
+import sqlite3
+from p2app.events import *
+
+
+
+class _ReferenceTable:
+    """The rows of one reference table, keyed by id, along with maps from each row's
+    code and name to its id."""
+
+    def __init__(self):
+        self.rows = {}
+        self.codes_and_names = {}
+        self.ids_by_code = {}
+        self.ids_by_name = {}
+
+    def put(self, row: tuple, code: str, name: str) -> None:
+        """Adds a row, or replaces the row with the same id, keeping the maps current."""
+        row_id = row[0]
+
+        if row_id in self.codes_and_names:
+            old_code, old_name = self.codes_and_names[row_id]
+
+            if self.ids_by_code.get(old_code) == row_id:
+                del self.ids_by_code[old_code]
+
+            if self.ids_by_name.get(old_name) == row_id:
+                del self.ids_by_name[old_name]
+
+        self.rows[row_id] = row
+        self.codes_and_names[row_id] = (code, name)
+        self.ids_by_code[code] = row_id
+        self.ids_by_name.setdefault(name, row_id)
+
+    def clear(self) -> None:
+        """Removes every row."""
+        self.rows.clear()
+        self.codes_and_names.clear()
+        self.ids_by_code.clear()
+        self.ids_by_name.clear()
+
+
+
+class ReferenceTables:
+    """
+    The continents and countries of the open database, loaded in full when it's opened
+    and kept current as continents and countries are saved, so that saves can reject an
+    unknown continent_id or country_id, or a duplicate code, before reaching SQLite, and
+    codes and names can be resolved to ids without a query.
+    """
+
+    def __init__(self):
+        """Initializes empty reference tables"""
+        self._continents = _ReferenceTable()
+        self._countries = _ReferenceTable()
+
+    def load(self, connection: sqlite3.Connection) -> None:
+        """Replaces the reference tables' contents with every continent and country in the database."""
+        self.clear()
+
+        cursor = connection.execute('SELECT * FROM continent;')
+
+        for result in cursor.fetchall():
+            self.put(Continent(*result))
+
+        cursor.close()
+
+        cursor = connection.execute('SELECT * FROM country;')
+
+        for result in cursor.fetchall():
+            self.put(Country(*result))
+
+        cursor.close()
+
+    def clear(self) -> None:
+        """Removes every continent and country, as when the database is closed."""
+        self._continents.clear()
+        self._countries.clear()
+
+    def put(self, entity: Continent | Country) -> None:
+        """Adds a continent or country that has been saved, or replaces the one with its id."""
+        if isinstance(entity, Continent):
+            self._continents.put(entity, entity.continent_code, entity.name)
+        else:
+            self._countries.put(entity, entity.country_code, entity.name)
+
+    def continent(self, continent_id: int) -> Continent | None:
+        """Returns the continent with the given id, or None if there isn't one."""
+        return self._continents.rows.get(continent_id)
+
+    def country(self, country_id: int) -> Country | None:
+        """Returns the country with the given id, or None if there isn't one."""
+        return self._countries.rows.get(country_id)
+
+    def continent_id_for_code(self, continent_code: str) -> int | None:
+        """Returns the id of the continent with the given code, or None if there isn't one."""
+        return self._continents.ids_by_code.get(continent_code)
+
+    def country_id_for_code(self, country_code: str) -> int | None:
+        """Returns the id of the country with the given code, or None if there isn't one."""
+        return self._countries.ids_by_code.get(country_code)
+
+    def continent_id_for_name(self, name: str) -> int | None:
+        """Returns the id of a continent with the given name, or None if there isn't one."""
+        return self._continents.ids_by_name.get(name)
+
+    def country_id_for_name(self, name: str) -> int | None:
+        """Returns the id of a country with the given name, or None if there isn't one."""
+        return self._countries.ids_by_name.get(name)
+
+    def code_lookups(self) -> dict[str, dict[str, int]]:
+        """Returns the maps from continent and country codes to their ids, keyed by table name."""
+        return {
+            'continent': self._continents.ids_by_code,
+            'country': self._countries.ids_by_code
+        }
@@ -4,91 +4,177 @@
 # Project 2: Learning to Fly
 
 import sqlite3
+from collections.abc import Iterator
+from itertools import product
 from p2app.events import *
+from p2app.engine.cursors import keyset_where_clause, paged_batches
+from p2app.engine.entity_cache import EntityCache
+from p2app.engine.full_text import match_search_statement, search_continuation
+from p2app.engine.reference_tables import ReferenceTables
 
 class Regions:
     """
     This object processes all the region-related events sent to it by the user interface,
-    then generate events that are sent back to the user interface in response, into a list.
+    then generate events that are sent back to the user interface in response, yielding
+    them one at a time as they become available.
     """
-    def __init__(self):
-        """Initializes the regions engine"""
-        pass
+    def __init__(self, cache: EntityCache, reference_tables: ReferenceTables):
+        """Initializes the regions engine, given the cache that loaded and saved regions share
+        and the in-memory continents and countries that saves are validated against"""
+        self._cache = cache
+        self._reference_tables = reference_tables
 
-    def event_handler(self, connection: sqlite3.Connection, event: 'events') -> list['events']:
+    def handlers(self) -> dict[type, 'callable']:
         """
-        Returns a list of all the events that should be generated by the main module as the response,
-        given the events sent to it by the user interface.
+        Returns a dictionary mapping each region-related event type to the method that
+        handles it, so the main engine can dispatch an event with a single lookup.
         """
-
-        events = []
-        if isinstance(event, StartRegionSearchEvent):
-            statement = 'SELECT * FROM region WHERE '
-            characteristics = []
-            parameters = []
-            if event.region_code():
-                parameters.append(event.region_code())
-                characteristics.append('region_code = ?')
-            if event.local_code():
-                parameters.append(event.local_code())
-                characteristics.append('local_code = ?')
-            if event.name():
-                parameters.append(event.name())
-                characteristics.append('name = ?')
-
-            statement += ' AND '.join(characteristics)
-            cursor = connection.execute(statement, parameters)
-            results = cursor.fetchall()
-            for result in results:
-                region = Region(result[0], result[1], result[2], result[3], result[4], result[5], result[6], result[7])
-                events.append(RegionSearchResultEvent(region))
-            cursor.close()
-
-        if isinstance(event, LoadRegionEvent):
+        return {
+            StartRegionSearchEvent: self.search,
+            LoadRegionEvent: self.load,
+            SaveNewRegionEvent: self.save_new,
+            SaveRegionEvent: self.save
+        }
+
+    def search(self, connection: sqlite3.Connection, event: StartRegionSearchEvent) -> Iterator['events']:
+        """
+        Yields the regions matching the search in RegionSearchResultsEvents, each carrying a
+        batch of them, so a large result costs the user interface one event per batch rather
+        than one per region.  If the search asks for a page size and more matches remain after
+        that many, the page ends with a RegionSearchMoreResultsEvent carrying the
+        continuation for the next page.
+        """
+        statement, parameters = self.search_statement(connection, event)
+        cursor = connection.execute(statement, parameters)
+        for rows, more in paged_batches(cursor, event.page_size()):
+            regions = [Region(row[0], row[1], row[2], row[3], row[4], row[5], row[6], row[7]) for row in rows]
+            yield RegionSearchResultsEvent(regions, event.generation())
+
+            if more:
+                continuation = search_continuation(rows[-1], len(Region._fields))
+                yield RegionSearchMoreResultsEvent(continuation, event.generation())
+
+    def search_statement(self, connection: sqlite3.Connection, event: StartRegionSearchEvent) -> tuple[str, list]:
+        """Returns the SQL statement and parameters that carry out the given search."""
+        statement = 'SELECT * FROM region WHERE '
+        characteristics = []
+        parameters = []
+        if event.region_code():
+            parameters.append(event.region_code())
+            characteristics.append('region_code = ?')
+        if event.local_code():
+            parameters.append(event.local_code())
+            characteristics.append('local_code = ?')
+        if event.name():
+            if event.match_mode() != MATCH_EXACT:
+                return match_search_statement(
+                    connection, 'region', characteristics, parameters, event.name(),
+                    event.match_mode(), event.continuation(), event.page_size())
+
+            parameters.append(event.name())
+            characteristics.append('name = ?')
+
+        clause, parameters = keyset_where_clause(
+            'region_id', characteristics, parameters, event.continuation(), event.page_size())
+        statement += clause
+
+        return statement, parameters
+
+    def sample_searches(self) -> list[StartRegionSearchEvent]:
+        """
+        Returns one search event for every shape of statement that search_statement can
+        produce (each combination of criteria and match mode, both unpaged and as a later
+        page), so the statements can be checked without knowing what users will search for.
+        """
+        return [
+            StartRegionSearchEvent(region_code, local_code, name, page_size, continuation, match_mode)
+            for region_code, local_code, name in product((None, 'sample'), repeat = 3)
+            if region_code or local_code or name
+            for match_mode in (MATCH_MODES if name else (MATCH_EXACT, ))
+            for page_size, continuation in (
+                (None, None), (100, 0 if match_mode == MATCH_EXACT else (0.0, 0)))
+        ]
+
+    def load(self, connection: sqlite3.Connection, event: LoadRegionEvent) -> Iterator['events']:
+        """Yields a RegionLoadedEvent for the requested region, from the cache if it's there."""
+        loaded_region = self._cache.get(Region, event.region_id())
+
+        if loaded_region is None:
             statement = 'SELECT * FROM region WHERE region_id = ?;'
             parameter = (event.region_id(), )
             cursor = connection.execute(statement, parameter)
-            loaded_region = cursor.fetchone()
-
-            events.append(RegionLoadedEvent(Region(loaded_region[0], loaded_region[1], loaded_region[2], loaded_region[3], loaded_region[4], loaded_region[5], loaded_region[6], loaded_region[7])))
+            result = cursor.fetchone()
             cursor.close()
 
-        if isinstance(event, SaveNewRegionEvent):
-            try:
-                statement = 'INSERT INTO region (region_code, local_code, name, continent_id, country_id, wikipedia_link, keywords) VALUES (:region_code, :local_code, :name, :continent_id, :country_id, :wikipedia_link, :keywords);'
-                new_region = event.region()
+            loaded_region = Region(*result)
+            self._cache.put_if_absent(loaded_region)
 
-                parameters = {'region_code': new_region[1], 'local_code': new_region[2], 'name': new_region[3], 'continent_id': new_region[4], 'country_id': new_region[5], 'wikipedia_link': new_region[6], 'keywords':new_region[7]}
-                cursor = connection.execute(statement, parameters)
-                connection.commit()
+        yield RegionLoadedEvent(loaded_region)
 
-                added_region = Region(cursor.lastrowid, new_region[1], new_region[2], new_region[3], new_region[4], new_region[5], new_region[6], new_region[7])
-                events.append(RegionSavedEvent(added_region))
-                cursor.close()
+    def save_new(self, connection: sqlite3.Connection, event: SaveNewRegionEvent) -> Iterator['events']:
+        """Inserts a new region, yielding either a RegionSavedEvent or a SaveRegionFailedEvent."""
+        failure = self._reference_failure(event.region())
 
-            except sqlite3.IntegrityError as e:
-                if "UNIQUE constraint failed" in str(e):
-                    events.append(SaveRegionFailedEvent('Duplicate region_code Not Allowed'))
-                elif "FOREIGN KEY constraint failed" in str(e):
-                    events.append(SaveRegionFailedEvent('Invalid continent_code or country code'))
+        if failure:
+            yield SaveRegionFailedEvent(failure)
+            return
 
+        try:
+            statement = 'INSERT INTO region (region_code, local_code, name, continent_id, country_id, wikipedia_link, keywords) VALUES (:region_code, :local_code, :name, :continent_id, :country_id, :wikipedia_link, :keywords);'
+            new_region = event.region()
 
-        if isinstance(event, SaveRegionEvent):
-            try:
-                statement = 'UPDATE region SET region_code=?, local_code=?, name=?, continent_id=?, country_id=?, wikipedia_link=?, keywords=? WHERE region_id = ?;'
-                new_region = event.region()
+            parameters = {'region_code': new_region[1], 'local_code': new_region[2], 'name': new_region[3], 'continent_id': new_region[4], 'country_id': new_region[5], 'wikipedia_link': new_region[6], 'keywords':new_region[7]}
+            cursor = connection.execute(statement, parameters)
+            connection.commit()
 
-                parameters = (new_region[1], new_region[2], new_region[3], new_region[4], new_region[5], new_region[6], new_region[7], new_region[0])
-                connection.execute(statement, parameters)
-                connection.commit()
+            added_region = Region(cursor.lastrowid, new_region[1], new_region[2], new_region[3], new_region[4], new_region[5], new_region[6], new_region[7])
+            cursor.close()
+            self._cache.put(added_region)
+            yield RegionSavedEvent(added_region)
 
-                modified_region = Region(new_region[0], new_region[1], new_region[2], new_region[3], new_region[4], new_region[5], new_region[6], new_region[7])
-                events.append(RegionSavedEvent(modified_region))
+        except sqlite3.IntegrityError as e:
+            if "UNIQUE constraint failed" in str(e):
+                yield SaveRegionFailedEvent('Duplicate region_code Not Allowed')
+            elif "FOREIGN KEY constraint failed" in str(e):
+                yield SaveRegionFailedEvent('Invalid continent_code or country code')
 
-            except sqlite3.IntegrityError as e:
-                if "UNIQUE constraint failed" in str(e):
-                    events.append(SaveRegionFailedEvent('Duplicate region_code Not Allowed'))
-                elif "FOREIGN KEY constraint failed" in str(e):
-                    events.append(SaveRegionFailedEvent('Invalid continent_code or country code'))
+    def save(self, connection: sqlite3.Connection, event: SaveRegionEvent) -> Iterator['events']:
+        """Updates an existing region, yielding either a RegionSavedEvent or a SaveRegionFailedEvent."""
+        failure = self._reference_failure(event.region())
 
-        return events
\ No newline at end of file
+        if failure:
+            yield SaveRegionFailedEvent(failure)
+            return
+
+        try:
+            statement = 'UPDATE region SET region_code=?, local_code=?, name=?, continent_id=?, country_id=?, wikipedia_link=?, keywords=? WHERE region_id = ?;'
+            new_region = event.region()
+
+            parameters = (new_region[1], new_region[2], new_region[3], new_region[4], new_region[5], new_region[6], new_region[7], new_region[0])
+            cursor = connection.execute(statement, parameters)
+            connection.commit()
+
+            # An update for an id that doesn't exist changes nothing, so there's nothing to
+            # write through to the cache.
+            if cursor.rowcount != 1:
+                yield SaveRegionFailedEvent('Region Not Found')
+                return
+
+            modified_region = Region(new_region[0], new_region[1], new_region[2], new_region[3], new_region[4], new_region[5], new_region[6], new_region[7])
+            self._cache.put(modified_region)
+            yield RegionSavedEvent(modified_region)
+
+        except sqlite3.IntegrityError as e:
+            if "UNIQUE constraint failed" in str(e):
+                yield SaveRegionFailedEvent('Duplicate region_code Not Allowed')
+            elif "FOREIGN KEY constraint failed" in str(e):
+                yield SaveRegionFailedEvent('Invalid continent_code or country code')
+
+    def _reference_failure(self, region: Region) -> str | None:
+        """Returns the reason the reference tables show the given region can't be saved, or
+        None if it can, so most bad saves are rejected without a round trip to SQLite."""
+        if self._reference_tables.continent(region.continent_id) is None or \
+                self._reference_tables.country(region.country_id) is None:
+            return 'Invalid continent_code or country code'
+
+        return None
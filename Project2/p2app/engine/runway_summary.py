@@ -0,0 +1,175 @@
+# p2app/engine/runway_summary.py
+#
+# ICS 33 Winter 2024
+# Project 2: Learning to Fly
+#
+# A materialized summary of each airport's runways, kept in its own table so
+# that airport searches can filter on runways without joining and aggregating
+# the runway table every time.
+
+import sqlite3
+from collections.abc import Iterator
+from p2app.events import *
+
+
+
+SUMMARY_TABLE = 'airport_runway_summary'
+
+# How the free-text surface of a runway (e.g., 'ASPH', 'Concrete', 'TURF', 'GRVL')
+# is classified as 'paved', 'unpaved', 'water', or 'other'.  Anything unrecognized,
+# including a missing surface, is 'other'.
+_SURFACE_CLASS = """
+    CASE
+        WHEN surface LIKE '%wat%' THEN 'water'
+        WHEN surface LIKE '%unpaved%' THEN 'unpaved'
+        WHEN surface LIKE '%asp%' OR surface LIKE '%con%' OR surface LIKE '%bit%'
+            OR surface LIKE '%pem%' OR surface LIKE '%tarmac%' OR surface LIKE '%pav%'
+            OR surface LIKE '%brick%' THEN 'paved'
+        WHEN surface LIKE '%tur%' OR surface LIKE '%gr%' OR surface LIKE '%dirt%'
+            OR surface LIKE '%sand%' OR surface LIKE '%clay%' OR surface LIKE '%soil%'
+            OR surface LIKE '%coral%' OR surface LIKE '%lat%' OR surface LIKE '%earth%'
+            OR surface LIKE '%silt%' OR surface LIKE '%mat%' THEN 'unpaved'
+        ELSE 'other'
+    END"""
+
+_CREATE_TABLE = f"""
+    CREATE TABLE {SUMMARY_TABLE} (
+        airport_id INTEGER NOT NULL PRIMARY KEY,
+        runway_count INTEGER NOT NULL,
+        longest_ft INTEGER NULL,
+        longest_paved_ft INTEGER NULL,
+        longest_lighted_ft INTEGER NULL,
+        longest_lighted_paved_ft INTEGER NULL,
+        paved_count INTEGER NOT NULL,
+        unpaved_count INTEGER NOT NULL,
+        water_count INTEGER NOT NULL,
+        other_count INTEGER NOT NULL,
+        lighted_count INTEGER NOT NULL,
+        closed_count INTEGER NOT NULL,
+        FOREIGN KEY (airport_id) REFERENCES airport (airport_id)
+    ) STRICT;"""
+
+# The summary rows for the runways that match a condition on the runway table.  Closed
+# runways are counted, but not considered when finding the longest runways.
+_SUMMARIZE = f"""
+    SELECT
+        airport_id,
+        COUNT(*),
+        MAX(CASE WHEN NOT closed THEN length_ft END),
+        MAX(CASE WHEN NOT closed AND surface_class = 'paved' THEN length_ft END),
+        MAX(CASE WHEN NOT closed AND lighted THEN length_ft END),
+        MAX(CASE WHEN NOT closed AND lighted AND surface_class = 'paved' THEN length_ft END),
+        SUM(surface_class = 'paved'),
+        SUM(surface_class = 'unpaved'),
+        SUM(surface_class = 'water'),
+        SUM(surface_class = 'other'),
+        SUM(lighted <> 0),
+        SUM(closed <> 0)
+    FROM (
+        SELECT airport_id, length_ft, lighted, closed, {_SURFACE_CLASS} AS surface_class
+        FROM runway
+        WHERE {{condition}})
+    GROUP BY airport_id"""
+
+
+def _refresh_airport(airport_id: str) -> str:
+    """Returns the trigger statements that recompute the summary row of one airport (given
+    as an expression such as new.airport_id), removing it if it has no runways left."""
+    return \
+        f'DELETE FROM {SUMMARY_TABLE} WHERE airport_id = {airport_id}; ' + \
+        f'INSERT INTO {SUMMARY_TABLE} {_SUMMARIZE.format(condition = f"airport_id = {airport_id}")};'
+
+
+# The triggers that keep the summary current.  Each change to a runway recomputes the
+# summary of the airport it belongs to (or both airports, if it's moved), which only
+# reads that airport's runways, by way of runway_airport_id_index.
+_CREATE_TRIGGERS = [
+    f'CREATE TRIGGER {SUMMARY_TABLE}_insert AFTER INSERT ON runway '
+    f'BEGIN {_refresh_airport("new.airport_id")} END;',
+
+    f'CREATE TRIGGER {SUMMARY_TABLE}_delete AFTER DELETE ON runway '
+    f'BEGIN {_refresh_airport("old.airport_id")} END;',
+
+    f'CREATE TRIGGER {SUMMARY_TABLE}_update '
+    f'AFTER UPDATE OF airport_id, length_ft, surface, lighted, closed ON runway '
+    f'BEGIN {_refresh_airport("old.airport_id")} {_refresh_airport("new.airport_id")} END;'
+]
+
+
+
+class RunwaySummary:
+    """
+    This object processes the event that rebuilds the runway summary, a table with one row
+    per airport that has runways, describing its longest runways and how many runways of
+    each kind it has.  Once built, triggers on the runway table keep it current.
+    """
+
+    def __init__(self):
+        """Initializes the runway summary engine"""
+        pass
+
+    def handlers(self) -> dict[type, 'callable']:
+        """
+        Returns a dictionary mapping each runway summary event type to the method that
+        handles it, so the main engine can dispatch an event with a single lookup.
+        """
+        return {
+            RebuildRunwaySummaryEvent: self.rebuild
+        }
+
+    def rebuild(self, connection: sqlite3.Connection, event: RebuildRunwaySummaryEvent) -> Iterator['events']:
+        """
+        Creates the summary table and its triggers if they don't exist yet, then replaces the
+        table's contents with a summary of every airport's runways, all in one transaction,
+        yielding a RunwaySummaryRebuiltEvent with the number of airports summarized.
+        """
+        with connection:
+            connection.execute('CREATE INDEX IF NOT EXISTS runway_airport_id_index ON runway (airport_id);')
+
+            if not has_runway_summary(connection):
+                connection.execute(_CREATE_TABLE)
+
+                for statement in _CREATE_TRIGGERS:
+                    connection.execute(statement)
+
+            connection.execute(f'DELETE FROM {SUMMARY_TABLE};')
+            connection.execute(f'INSERT INTO {SUMMARY_TABLE} {_SUMMARIZE.format(condition = "1")};')
+
+            cursor = connection.execute(f'SELECT COUNT(*) FROM {SUMMARY_TABLE};')
+            airport_count = cursor.fetchone()[0]
+            cursor.close()
+
+        yield RunwaySummaryRebuiltEvent(airport_count)
+
+
+def has_runway_summary(connection: sqlite3.Connection) -> bool:
+    """Returns True if the runway summary table exists."""
+    cursor = connection.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?;", (SUMMARY_TABLE, ))
+
+    exists = cursor.fetchone() is not None
+    cursor.close()
+    return exists
+
+
+def runway_filter_characteristic(runway_filter: RunwayFilter) -> tuple[str, list]:
+    """
+    Returns a characteristic of an airport search, and its parameters, that limits it to
+    airports with a runway matching the filter.  It reads only the summary table: the
+    longest open runway of the filter's kind has to exist and be long enough.
+    """
+    if runway_filter.paved and runway_filter.lighted:
+        column = 'longest_lighted_paved_ft'
+    elif runway_filter.paved:
+        column = 'longest_paved_ft'
+    elif runway_filter.lighted:
+        column = 'longest_lighted_ft'
+    else:
+        column = 'longest_ft'
+
+    if runway_filter.min_length_ft is None:
+        condition, parameters = f'{column} IS NOT NULL', []
+    else:
+        condition, parameters = f'{column} >= ?', [runway_filter.min_length_ft]
+
+    return f'airport_id IN (SELECT airport_id FROM {SUMMARY_TABLE} WHERE {condition})', parameters
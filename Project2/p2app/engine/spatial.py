@@ -0,0 +1,260 @@
+# p2app/engine/spatial.py
+#
+# ICS 33 Winter 2024
+# Project 2: Learning to Fly
+#
+# An in-memory spatial index of points on the Earth's surface, and the engine
+# that uses one over the airports to find the airports nearest a point or within
+# a given distance of it.
+
+import math
+import sqlite3
+from collections.abc import Iterator
+from p2app.events import *
+
+
+
+EARTH_RADIUS_KM = 6371.0088
+
+# The size of each grid cell, in degrees of latitude and longitude.  A degree is at
+# most about 111 km, so a search within a few hundred km visits a handful of cells.
+_CELL_DEGREES = 1.0
+_ROWS = int(180 / _CELL_DEGREES)
+_COLUMNS = int(360 / _CELL_DEGREES)
+
+# The radius of the first search when finding the nearest points; it's doubled until
+# enough points are found.
+_INITIAL_NEAREST_RADIUS_KM = 50.0
+
+# The number of airports loaded by each query when turning ids into Airports.
+_LOAD_BATCH_SIZE = 500
+
+
+
+def haversine_km(latitude_1: float, longitude_1: float, latitude_2: float, longitude_2: float) -> float:
+    """Returns the great-circle distance, in km, between two points given in degrees."""
+    phi_1 = math.radians(latitude_1)
+    phi_2 = math.radians(latitude_2)
+    half_delta_phi = (phi_2 - phi_1) / 2
+    half_delta_lambda = math.radians(longitude_2 - longitude_1) / 2
+
+    a = math.sin(half_delta_phi) ** 2 + \
+        math.cos(phi_1) * math.cos(phi_2) * math.sin(half_delta_lambda) ** 2
+
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+
+class SpatialIndex:
+    """
+    A grid of cells, each covering the same span of latitude and longitude, that holds
+    points identified by an id.  A search first finds the cells that could hold points
+    within the given distance, then measures the exact distance to the points in them,
+    so it only looks at a small fraction of the points.
+    """
+
+    def __init__(self):
+        """Initializes an empty spatial index"""
+        self._cells = {}
+        self._positions = {}
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    def put(self, point_id: int, latitude_deg: float, longitude_deg: float) -> None:
+        """Adds a point, or moves the point with the given id if it's already in the index."""
+        self.remove(point_id)
+        self._positions[point_id] = (latitude_deg, longitude_deg)
+
+        cell = (_row(latitude_deg), _column(longitude_deg))
+        self._cells.setdefault(cell, []).append((point_id, latitude_deg, longitude_deg))
+
+    def load(self, points: Iterator[tuple[int, float, float]]) -> None:
+        """Replaces the index's contents with the given (id, latitude, longitude) points."""
+        self.clear()
+
+        for point in points:
+            point_id, latitude_deg, longitude_deg = point
+            self._positions[point_id] = (latitude_deg, longitude_deg)
+            self._cells.setdefault((_row(latitude_deg), _column(longitude_deg)), []).append(point)
+
+    def remove(self, point_id: int) -> None:
+        """Removes the point with the given id, if it's in the index."""
+        position = self._positions.pop(point_id, None)
+
+        if position is not None:
+            cell = (_row(position[0]), _column(position[1]))
+            points = self._cells[cell]
+            points[:] = [point for point in points if point[0] != point_id]
+
+            if not points:
+                del self._cells[cell]
+
+    def clear(self) -> None:
+        """Removes every point."""
+        self._cells.clear()
+        self._positions.clear()
+
+    def within(self, latitude_deg: float, longitude_deg: float, radius_km: float) -> list[tuple[float, int]]:
+        """Returns (distance in km, id) for every point within the given distance of the
+        given point, nearest first."""
+        found = []
+
+        for cell in _cells_within(latitude_deg, longitude_deg, radius_km):
+            for point_id, point_latitude, point_longitude in self._cells.get(cell, ()):
+                distance = haversine_km(latitude_deg, longitude_deg, point_latitude, point_longitude)
+
+                if distance <= radius_km:
+                    found.append((distance, point_id))
+
+        found.sort()
+        return found
+
+    def nearest(self, latitude_deg: float, longitude_deg: float, count: int) -> list[tuple[float, int]]:
+        """
+        Returns (distance in km, id) for the given number of points nearest the given point
+        (or every point, if there aren't that many), nearest first.  It searches within a
+        small radius, doubling it until enough points turn up; every point closer than the
+        last one found is then certain to have been found too.
+        """
+        radius_km = _INITIAL_NEAREST_RADIUS_KM
+
+        while True:
+            found = self.within(latitude_deg, longitude_deg, radius_km)
+
+            if len(found) >= count or radius_km >= math.pi * EARTH_RADIUS_KM:
+                return found[:count]
+
+            radius_km *= 2
+
+
+
+class NearbyAirports:
+    """
+    This object processes the events that ask for the airports near a point, answering
+    them from a spatial index of every airport's position, which is built when the
+    database is opened and kept current as airports are saved.
+    """
+
+    def __init__(self, locations: SpatialIndex):
+        """Initializes the nearby airports engine, given the spatial index of airport positions"""
+        self._locations = locations
+
+    def handlers(self) -> dict[type, 'callable']:
+        """
+        Returns a dictionary mapping each nearby airport event type to the method that
+        handles it, so the main engine can dispatch an event with a single lookup.
+        """
+        return {
+            FindNearestAirportsEvent: self.nearest,
+            FindAirportsWithinEvent: self.within
+        }
+
+    def load(self, connection: sqlite3.Connection) -> None:
+        """Replaces the spatial index's contents with the position of every airport in the database."""
+        cursor = connection.execute('SELECT airport_id, latitude_deg, longitude_deg FROM airport;')
+        self._locations.load(cursor)
+        cursor.close()
+
+    def clear(self) -> None:
+        """Empties the spatial index, as when the database is closed."""
+        self._locations.clear()
+
+    def nearest(self, connection: sqlite3.Connection, event: FindNearestAirportsEvent) -> Iterator['events']:
+        """Yields a NearbyAirportEvent for each of the requested number of airports nearest
+        the event's point, nearest first."""
+        failure = _coordinate_failure(event.latitude_deg(), event.longitude_deg())
+
+        if failure is None and event.count() < 1:
+            failure = 'The number of airports must be at least 1'
+
+        if failure:
+            yield FindNearbyAirportsFailedEvent(failure)
+            return
+
+        found = self._locations.nearest(event.latitude_deg(), event.longitude_deg(), event.count())
+        yield from _nearby_airport_events(connection, found)
+
+    def within(self, connection: sqlite3.Connection, event: FindAirportsWithinEvent) -> Iterator['events']:
+        """Yields a NearbyAirportEvent for every airport within the event's distance of its
+        point, nearest first."""
+        failure = _coordinate_failure(event.latitude_deg(), event.longitude_deg())
+
+        if failure is None and event.radius_km() < 0:
+            failure = 'The distance must not be negative'
+
+        if failure:
+            yield FindNearbyAirportsFailedEvent(failure)
+            return
+
+        found = self._locations.within(event.latitude_deg(), event.longitude_deg(), event.radius_km())
+        yield from _nearby_airport_events(connection, found)
+
+
+def _nearby_airport_events(connection: sqlite3.Connection, found: list[tuple[float, int]]) -> Iterator['events']:
+    """Yields a NearbyAirportEvent for each (distance, airport id), in the same order, loading
+    the airports from the database in batches."""
+    for start in range(0, len(found), _LOAD_BATCH_SIZE):
+        batch = found[start:start + _LOAD_BATCH_SIZE]
+        placeholders = ', '.join('?' for _ in batch)
+
+        cursor = connection.execute(
+            f'SELECT * FROM airport WHERE airport_id IN ({placeholders});',
+            [airport_id for distance, airport_id in batch])
+
+        airports = {result[0]: Airport(*result) for result in cursor.fetchall()}
+        cursor.close()
+
+        for distance, airport_id in batch:
+            if airport_id in airports:
+                yield NearbyAirportEvent(airports[airport_id], distance)
+
+
+def _coordinate_failure(latitude_deg: float, longitude_deg: float) -> str | None:
+    """Returns the reason a coordinate is invalid, or None if it's valid."""
+    if not -90 <= latitude_deg <= 90:
+        return 'Latitude must be between -90 and 90 degrees'
+    elif not -180 <= longitude_deg <= 180:
+        return 'Longitude must be between -180 and 180 degrees'
+    else:
+        return None
+
+
+def _row(latitude_deg: float) -> int:
+    """Returns the grid row holding the given latitude."""
+    return min(_ROWS - 1, max(0, int((latitude_deg + 90) // _CELL_DEGREES)))
+
+
+def _column(longitude_deg: float) -> int:
+    """Returns the grid column holding the given longitude, wrapping around the antimeridian."""
+    return int((longitude_deg + 180) // _CELL_DEGREES) % _COLUMNS
+
+
+def _cells_within(latitude_deg: float, longitude_deg: float, radius_km: float) -> Iterator[tuple[int, int]]:
+    """
+    Yields every grid cell that could hold a point within the given distance of the given
+    point.  The rows span the circle's extent in latitude; the columns span its widest
+    extent in longitude, which is every column if the circle reaches a pole.
+    """
+    angle = radius_km / EARTH_RADIUS_KM
+    delta_latitude = math.degrees(angle)
+    low_latitude = latitude_deg - delta_latitude
+    high_latitude = latitude_deg + delta_latitude
+    rows = range(_row(low_latitude), _row(high_latitude) + 1)
+
+    if low_latitude <= -90 or high_latitude >= 90 or angle >= math.pi / 2:
+        columns = range(_COLUMNS)
+    else:
+        ratio = math.sin(angle) / math.cos(math.radians(latitude_deg))
+        delta_longitude = math.degrees(math.asin(ratio)) if ratio < 1 else 180
+
+        if delta_longitude >= 180:
+            columns = range(_COLUMNS)
+        else:
+            first = int((longitude_deg - delta_longitude + 180) // _CELL_DEGREES)
+            last = int((longitude_deg + delta_longitude + 180) // _CELL_DEGREES)
+            columns = [column % _COLUMNS for column in range(first, min(last, first + _COLUMNS - 1) + 1)]
+
+    for row in rows:
+        for column in columns:
+            yield row, column
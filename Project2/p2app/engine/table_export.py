@@ -0,0 +1,146 @@
+# p2app/engine/table_export.py
+#
+# ICS 33 Winter 2024
+# Project 2: Learning to Fly
+#
+# Exporting the rows of a table to a CSV file (with a header row of column
+# names) or a JSONL file (one JSON object per line), either of which is
+# compressed with gzip when its name ends in .gz.
+
+import csv
+import gzip
+import json
+import sqlite3
+from collections.abc import Iterator
+from pathlib import Path
+from p2app.events import *
+
+
+
+# The number of rows fetched from the cursor and written at a time.  Only one chunk
+# of rows is ever held in memory, however large the table is.
+_CHUNK_SIZE = 5000
+
+_JSONL_SUFFIXES = ('.jsonl', '.ndjson', '.json')
+_GZIP_SUFFIX = '.gz'
+
+# The suffix of the file an export is written to until it's finished, when it's renamed,
+# so that a failed export never leaves a partial file behind under the requested name.
+_PARTIAL_SUFFIX = '.part'
+
+
+
+class TableExport:
+    """
+    This object processes table export events sent to it by the user interface, streaming
+    the rows of a table from a cursor to a file a chunk at a time and yielding progress
+    events as each chunk is written.
+    """
+
+    def __init__(self):
+        """Initializes the table export engine"""
+        pass
+
+    def handlers(self) -> dict[type, 'callable']:
+        """
+        Returns a dictionary mapping each table export event type to the method that
+        handles it, so the main engine can dispatch an event with a single lookup.
+        """
+        return {
+            StartTableExportEvent: self.start
+        }
+
+    def start(self, connection: sqlite3.Connection, event: StartTableExportEvent) -> Iterator['events']:
+        """
+        Writes every row of the event's table that matches all of its filters (each of
+        which maps a column to the value it must equal) to the event's file, whose suffix
+        determines its format and whether it's compressed.
+        """
+        table = event.table()
+
+        if table not in EXPORT_TABLES:
+            yield TableExportFailedEvent(f'Cannot export table {repr(table)}')
+            return
+
+        columns = _column_names(connection, table)
+        filters = event.filters() or {}
+        unknown_columns = [column for column in filters if column not in columns]
+
+        if unknown_columns:
+            yield TableExportFailedEvent(f'Table {table} has no column {repr(unknown_columns[0])}')
+            return
+
+        statement = f'SELECT {", ".join(columns)} FROM {table}'
+
+        if filters:
+            statement += ' WHERE ' + ' AND '.join(f'{column} = ?' for column in filters)
+
+        path = Path(event.path())
+        partial_path = path.with_name(path.name + _PARTIAL_SUFFIX)
+        cursor = connection.execute(statement + ' ORDER BY rowid;', list(filters.values()))
+        rows_written = 0
+        is_finished = False
+
+        try:
+            with _open_for_writing(partial_path, path) as file:
+                write_rows = _start_writing(file, path, columns)
+
+                while rows := cursor.fetchmany(_CHUNK_SIZE):
+                    write_rows(rows)
+                    rows_written += len(rows)
+                    yield TableExportProgressEvent(table, rows_written)
+
+            partial_path.replace(path)
+            is_finished = True
+        except OSError as e:
+            yield TableExportFailedEvent(
+                f'Could not write {path} after {rows_written} rows: {e}')
+            return
+        except sqlite3.Error as e:
+            yield TableExportFailedEvent(
+                f'Could not read {table} after {rows_written} rows: {e}')
+            return
+        finally:
+            # Whether the export failed or was abandoned part of the way through (as when
+            # the application is closed), the partial file is removed.
+            cursor.close()
+
+            if not is_finished:
+                partial_path.unlink(missing_ok = True)
+
+        yield TableExportCompletedEvent(table, path, rows_written)
+
+
+def _column_names(connection: sqlite3.Connection, table: str) -> list[str]:
+    """Returns the names of a table's columns, in the order they're defined."""
+    cursor = connection.execute(f'PRAGMA table_info({table});')
+    columns = [column_info[1] for column_info in cursor.fetchall()]
+    cursor.close()
+    return columns
+
+
+def _open_for_writing(partial_path: Path, path: Path):
+    """Opens the partial file for writing text, compressing it if the final path ends in .gz."""
+    if path.suffix.lower() == _GZIP_SUFFIX:
+        return gzip.open(partial_path, 'wt', encoding = 'utf-8', newline = '')
+    else:
+        return partial_path.open('w', encoding = 'utf-8', newline = '')
+
+
+def _start_writing(file, path: Path, columns: list[str]) -> 'callable':
+    """Writes whatever comes before the rows (a CSV file's header), then returns a function
+    that writes a chunk of rows to the file in the format chosen by the path's suffix."""
+    suffixes = [suffix.lower() for suffix in path.suffixes]
+
+    if suffixes and suffixes[-1] == _GZIP_SUFFIX:
+        suffixes.pop()
+
+    if suffixes and suffixes[-1] in _JSONL_SUFFIXES:
+        def write_rows(rows):
+            file.writelines(json.dumps(dict(zip(columns, row))) + '\n' for row in rows)
+    else:
+        writer = csv.writer(file)
+        writer.writerow(columns)
+        write_rows = writer.writerows
+
+    return write_rows
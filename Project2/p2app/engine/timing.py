@@ -0,0 +1,227 @@
+# p2app/engine/timing.py
+#
+# ICS 33 Winter 2024
+# Project 2: Learning to Fly
+#
+# Timing statistics for the events the engine processes and the SQL statements
+# it executes, along with the connection and cursor classes that measure every
+# statement executed through them.
+
+import random
+import re
+import sqlite3
+import threading
+import time
+from p2app.events import TimingStatistic, TIMING_KIND_STATEMENT
+
+
+
+# The most latencies kept for each event type or statement shape.  Beyond that, each
+# new latency replaces a random one, so the percentiles are estimated from a uniform
+# sample of every latency recorded, while the memory used stays bounded.
+_MAX_SAMPLES = 10000
+
+_WHITESPACE = re.compile(r'\s+')
+_PLACEHOLDER_LIST = re.compile(r'\?(?:\s*,\s*\?)+')
+
+
+
+class TimingStatistics:
+    """
+    Records the number of times each event type was processed and each shape of SQL
+    statement was executed, how long each took, and how many results or rows each
+    produced.  Events are processed, and statements executed, on several threads at
+    once, so every operation holds a lock.
+    """
+
+    def __init__(self):
+        """Initializes an empty set of timing statistics"""
+        self._lock = threading.Lock()
+        self._random = random.Random()
+        self._entries = {}
+
+    def record(self, kind: str, name: str, seconds: float, rows: int) -> None:
+        """Records one processed event or executed statement, given its kind (TIMING_KIND_EVENT
+        or TIMING_KIND_STATEMENT) and its name (an event type's name or a statement shape)."""
+        with self._lock:
+            entry = self._entries.get((kind, name))
+
+            if entry is None:
+                entry = self._entries[(kind, name)] = [0, 0.0, 0, []]
+
+            entry[0] += 1
+            entry[1] += seconds
+            entry[2] += rows
+            samples = entry[3]
+
+            if len(samples) < _MAX_SAMPLES:
+                samples.append(seconds)
+            else:
+                replaced = self._random.randrange(entry[0])
+
+                if replaced < _MAX_SAMPLES:
+                    samples[replaced] = seconds
+
+    def reset(self) -> None:
+        """Discards everything recorded so far."""
+        with self._lock:
+            self._entries.clear()
+
+    def snapshot(self) -> list[TimingStatistic]:
+        """Returns a TimingStatistic for every event type and statement shape recorded so far,
+        the ones that took the most time in all first."""
+        with self._lock:
+            entries = [
+                (kind, name, count, total_seconds, rows, sorted(samples))
+                for (kind, name), (count, total_seconds, rows, samples) in self._entries.items()
+            ]
+
+        statistics = [
+            TimingStatistic(
+                kind, name, count, total_seconds, _percentile(samples, 50), _percentile(samples, 95),
+                _percentile(samples, 99), rows)
+            for kind, name, count, total_seconds, rows, samples in entries
+        ]
+
+        statistics.sort(key = lambda statistic: statistic.total_seconds, reverse = True)
+        return statistics
+
+
+def statement_shape(statement: str) -> str:
+    """Returns the shape of an SQL statement, which is the same for every statement that
+    differs only in its whitespace or in how many placeholders are in a list of them."""
+    return _PLACEHOLDER_LIST.sub('?, ...', _WHITESPACE.sub(' ', statement).strip())
+
+
+def _percentile(samples: list[float], percent: int) -> float:
+    """Returns the given percentile of a sorted list of latencies, by the nearest-rank method."""
+    if not samples:
+        return 0.0
+
+    return samples[max(0, -(-len(samples) * percent // 100) - 1)]
+
+
+
+class TimedConnection(sqlite3.Connection):
+    """
+    A connection whose cursors record the shape, latency, and number of rows of every
+    statement they execute in a TimingStatistics.  Pass it, along with the statistics,
+    as the factory when connecting.  Connection.execute doesn't go through the cursor
+    method, so it and executemany are overridden too.
+    """
+
+    def __init__(self, *args, timing: TimingStatistics, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._timing = timing
+
+    def cursor(self, factory = None) -> sqlite3.Cursor:
+        cursor = super().cursor(factory or TimedCursor)
+
+        if isinstance(cursor, TimedCursor):
+            cursor.start_timing(self._timing)
+
+        return cursor
+
+    def execute(self, statement: str, parameters = (), /) -> sqlite3.Cursor:
+        return self.cursor().execute(statement, parameters)
+
+    def executemany(self, statement: str, parameters, /) -> sqlite3.Cursor:
+        return self.cursor().executemany(statement, parameters)
+
+
+
+class TimedCursor(sqlite3.Cursor):
+    """
+    A cursor that times each statement it executes, from executing it until its last row
+    is fetched (or the cursor is closed, or used for another statement), counting the rows
+    it fetches along the way.
+    """
+
+    def start_timing(self, timing: TimingStatistics) -> None:
+        """Records the cursor's statements in the given statistics from now on."""
+        self._timing = timing
+        self._shape = None
+        self._seconds = 0.0
+        self._rows = 0
+
+    def execute(self, statement: str, parameters = (), /) -> sqlite3.Cursor:
+        self._finish_timing()
+        self._shape = statement_shape(statement)
+        self._rows = 0
+        start = time.perf_counter()
+
+        try:
+            return super().execute(statement, parameters)
+        finally:
+            self._seconds = time.perf_counter() - start
+
+    def executemany(self, statement: str, parameters, /) -> sqlite3.Cursor:
+        self._finish_timing()
+        start = time.perf_counter()
+
+        try:
+            return super().executemany(statement, parameters)
+        finally:
+            self._timing.record(
+                TIMING_KIND_STATEMENT, statement_shape(statement), time.perf_counter() - start,
+                max(0, self.rowcount))
+
+    def fetchone(self):
+        start = time.perf_counter()
+        row = super().fetchone()
+        self._seconds += time.perf_counter() - start
+
+        if row is None:
+            self._finish_timing()
+        else:
+            self._rows += 1
+
+        return row
+
+    def fetchmany(self, size: int | None = None) -> list:
+        start = time.perf_counter()
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        self._seconds += time.perf_counter() - start
+        self._rows += len(rows)
+
+        if not rows:
+            self._finish_timing()
+
+        return rows
+
+    def fetchall(self) -> list:
+        start = time.perf_counter()
+        rows = super().fetchall()
+        self._seconds += time.perf_counter() - start
+        self._rows += len(rows)
+        self._finish_timing()
+        return rows
+
+    def __next__(self):
+        start = time.perf_counter()
+
+        try:
+            row = super().__next__()
+        except StopIteration:
+            self._seconds += time.perf_counter() - start
+            self._finish_timing()
+            raise
+
+        self._seconds += time.perf_counter() - start
+        self._rows += 1
+        return row
+
+    def close(self) -> None:
+        self._finish_timing()
+        super().close()
+
+    def __del__(self):
+        self._finish_timing()
+
+    def _finish_timing(self) -> None:
+        """Records the statement being timed, if there is one."""
+        shape = getattr(self, '_shape', None)
+
+        if shape is not None:
+            self._shape = None
+            self._timing.record(TIMING_KIND_STATEMENT, shape, self._seconds, self._rows)
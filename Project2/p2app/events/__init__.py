@@ -4,12 +4,21 @@
 # Project 2: Learning to Fly
 #
 # Initialization module for the p2app.events package.
-#
-# YOU WILL NOT NEED TO MODIFY THIS FILE AT ALL
 
 from .event_bus import EventBus
 from .app import *
+from .airports import *
 from .continents import *
 from .countries import *
 from .database import *
+from .diagnostics import *
+from .exports import *
+from .frequencies import *
+from .full_text import *
+from .imports import *
+from .indexes import *
+from .navaids import *
 from .regions import *
+from .runways import *
+from .searches import *
+from .spatial import *
@@ -0,0 +1,253 @@
+# p2app/events/airports.py
+#
+# ICS 33 Winter 2024
+# Project 2: Learning to Fly
+#
+# Events that are either related to searching for, creating, or editing airports
+# in the database.
+
+from collections import namedtuple
+from .full_text import MATCH_EXACT
+from .runways import RunwayFilter
+
+
+
+Airport = namedtuple(
+    'Airport',
+    ['airport_id', 'airport_ident', 'type', 'name', 'latitude_deg', 'longitude_deg',
+     'elevation_ft', 'continent_id', 'country_id', 'region_id', 'municipality',
+     'scheduled_service', 'gps_code', 'iata_code', 'local_code', 'home_link',
+     'wikipedia_link', 'keywords'])
+
+Airport.__annotations__ = {
+    'airport_id': int | None,
+    'airport_ident': str | None,
+    'type': str | None,
+    'name': str | None,
+    'latitude_deg': float | None,
+    'longitude_deg': float | None,
+    'elevation_ft': int | None,
+    'continent_id': int | None,
+    'country_id': int | None,
+    'region_id': int | None,
+    'municipality': str | None,
+    'scheduled_service': int | None,
+    'gps_code': str | None,
+    'iata_code': str | None,
+    'local_code': str | None,
+    'home_link': str | None,
+    'wikipedia_link': str | None,
+    'keywords': str | None
+}
+
+
+
+class StartAirportSearchEvent:
+    def __init__(
+            self, airport_ident: str, iata_code: str, gps_code: str, municipality: str, name: str,
+            page_size: int | None = None, continuation: int | tuple[float, int] | None = None,
+            match_mode: str = MATCH_EXACT, runway_filter: RunwayFilter | None = None,
+            generation: int | None = None):
+        self._airport_ident = airport_ident
+        self._iata_code = iata_code
+        self._gps_code = gps_code
+        self._municipality = municipality
+        self._name = name
+        self._page_size = page_size
+        self._continuation = continuation
+        self._match_mode = match_mode
+        self._runway_filter = runway_filter
+        self._generation = generation
+
+
+    def airport_ident(self) -> str:
+        return self._airport_ident
+
+
+    def iata_code(self) -> str:
+        return self._iata_code
+
+
+    def gps_code(self) -> str:
+        return self._gps_code
+
+
+    def municipality(self) -> str:
+        return self._municipality
+
+
+    def name(self) -> str:
+        return self._name
+
+
+    def page_size(self) -> int | None:
+        return self._page_size
+
+
+    def continuation(self) -> int | tuple[float, int] | None:
+        return self._continuation
+
+
+    def match_mode(self) -> str:
+        return self._match_mode
+
+
+    def runway_filter(self) -> RunwayFilter | None:
+        return self._runway_filter
+
+
+    def generation(self) -> int | None:
+        return self._generation
+
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}: airport_ident = {repr(self._airport_ident)}, ' + \
+               f'iata_code = {repr(self._iata_code)}, gps_code = {repr(self._gps_code)}, ' + \
+               f'municipality = {repr(self._municipality)}, name = {repr(self._name)}, ' + \
+               f'page_size = {repr(self._page_size)}, continuation = {repr(self._continuation)}, ' + \
+               f'match_mode = {repr(self._match_mode)}, runway_filter = {repr(self._runway_filter)}, ' + \
+               f'generation = {repr(self._generation)}'
+
+
+
+class AirportSearchResultsEvent:
+    def __init__(self, airports: list[Airport], generation: int | None = None):
+        self._airports = airports
+        self._generation = generation
+
+
+    def airports(self) -> list[Airport]:
+        return self._airports
+
+
+    def generation(self) -> int | None:
+        return self._generation
+
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}: airports = {repr(self._airports)}, ' + \
+               f'generation = {repr(self._generation)}'
+
+
+
+class AirportSearchMoreResultsEvent:
+    def __init__(self, continuation: int | tuple[float, int], generation: int | None = None):
+        self._continuation = continuation
+        self._generation = generation
+
+
+    def continuation(self) -> int | tuple[float, int]:
+        return self._continuation
+
+
+    def generation(self) -> int | None:
+        return self._generation
+
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}: continuation = {repr(self._continuation)}, ' + \
+               f'generation = {repr(self._generation)}'
+
+
+
+class AirportSearchFailedEvent:
+    def __init__(self, reason: str, generation: int | None = None):
+        self._reason = reason
+        self._generation = generation
+
+
+    def reason(self) -> str:
+        return self._reason
+
+
+    def generation(self) -> int | None:
+        return self._generation
+
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}: reason = {repr(self._reason)}, ' + \
+               f'generation = {repr(self._generation)}'
+
+
+
+class LoadAirportEvent:
+    def __init__(self, airport_id: int):
+        self._airport_id = airport_id
+
+
+    def airport_id(self) -> int:
+        return self._airport_id
+
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}: airport_id = {repr(self._airport_id)}'
+
+
+
+class AirportLoadedEvent:
+    def __init__(self, airport: Airport):
+        self._airport = airport
+
+
+    def airport(self) -> Airport:
+        return self._airport
+
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}: airport = {repr(self._airport)}'
+
+
+
+class SaveNewAirportEvent:
+    def __init__(self, airport: Airport):
+        self._airport = airport
+
+
+    def airport(self) -> Airport:
+        return self._airport
+
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}: airport = {repr(self._airport)}'
+
+
+
+class SaveAirportEvent:
+    def __init__(self, airport: Airport):
+        self._airport = airport
+
+
+    def airport(self) -> Airport:
+        return self._airport
+
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}: airport = {repr(self._airport)}'
+
+
+
+class AirportSavedEvent:
+    def __init__(self, airport: Airport):
+        self._airport = airport
+
+
+    def airport(self) -> Airport:
+        return self._airport
+
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}: airport = {repr(self._airport)}'
+
+
+
+class SaveAirportFailedEvent:
+    def __init__(self, reason: str):
+        self._reason = reason
+
+
+    def reason(self) -> str:
+        return self._reason
+
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}: reason = {repr(self._reason)}'
@@ -7,10 +7,9 @@
 # in the database.
 #
 # See the project write-up for details on when these events are sent and by whom.
-#
-# YOU WILL NOT NEED TO MODIFY THIS FILE AT ALL
 
 from collections import namedtuple
+from .full_text import MATCH_EXACT
 
 
 
@@ -25,9 +24,16 @@ Continent.__annotations__ = {
 
 
 class StartContinentSearchEvent:
-    def __init__(self, continent_code: str, name: str):
+    def __init__(
+            self, continent_code: str, name: str,
+            page_size: int | None = None, continuation: int | tuple[float, int] | None = None,
+            match_mode: str = MATCH_EXACT, generation: int | None = None):
         self._continent_code = continent_code
         self._name = name
+        self._page_size = page_size
+        self._continuation = continuation
+        self._match_mode = match_mode
+        self._generation = generation
 
 
     def continent_code(self) -> str:
@@ -38,22 +44,66 @@ class StartContinentSearchEvent:
         return self._name
 
 
+    def page_size(self) -> int | None:
+        return self._page_size
+
+
+    def continuation(self) -> int | tuple[float, int] | None:
+        return self._continuation
+
+
+    def match_mode(self) -> str:
+        return self._match_mode
+
+
+    def generation(self) -> int | None:
+        return self._generation
+
+
     def __repr__(self) -> str:
-        return f'{type(self).__name__}: continent_code = {repr(self._continent_code)}, name = {repr(self._name)}'
+        return f'{type(self).__name__}: continent_code = {repr(self._continent_code)}, name = {repr(self._name)}, ' + \
+               f'page_size = {repr(self._page_size)}, continuation = {repr(self._continuation)}, ' + \
+               f'match_mode = {repr(self._match_mode)}, generation = {repr(self._generation)}'
 
 
 
-class ContinentSearchResultEvent:
-    def __init__(self, continent: Continent):
-        self._continent = continent
+class ContinentSearchResultsEvent:
+    def __init__(self, continents: list[Continent], generation: int | None = None):
+        self._continents = continents
+        self._generation = generation
 
 
-    def continent(self) -> Continent:
-        return self._continent
+    def continents(self) -> list[Continent]:
+        return self._continents
+
+
+    def generation(self) -> int | None:
+        return self._generation
 
 
     def __repr__(self) -> str:
-        return f'{type(self).__name__}: continent = {repr(self._continent)}'
+        return f'{type(self).__name__}: continents = {repr(self._continents)}, ' + \
+               f'generation = {repr(self._generation)}'
+
+
+
+class ContinentSearchMoreResultsEvent:
+    def __init__(self, continuation: int | tuple[float, int], generation: int | None = None):
+        self._continuation = continuation
+        self._generation = generation
+
+
+    def continuation(self) -> int | tuple[float, int]:
+        return self._continuation
+
+
+    def generation(self) -> int | None:
+        return self._generation
+
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}: continuation = {repr(self._continuation)}, ' + \
+               f'generation = {repr(self._generation)}'
 
 
 
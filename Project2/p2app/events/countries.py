@@ -7,10 +7,9 @@
 # in the database.
 #
 # See the project write-up for details on when these events are sent and by whom.
-#
-# YOU WILL NOT NEED TO MODIFY THIS FILE AT ALL
 
 from collections import namedtuple
+from .full_text import MATCH_EXACT
 
 
 
@@ -30,9 +29,16 @@ Country.__annotations__ = {
 
 
 class StartCountrySearchEvent:
-    def __init__(self, country_code: str, name: str):
+    def __init__(
+            self, country_code: str, name: str,
+            page_size: int | None = None, continuation: int | tuple[float, int] | None = None,
+            match_mode: str = MATCH_EXACT, generation: int | None = None):
         self._country_code = country_code
         self._name = name
+        self._page_size = page_size
+        self._continuation = continuation
+        self._match_mode = match_mode
+        self._generation = generation
 
 
     def country_code(self) -> str:
@@ -43,22 +49,66 @@ class StartCountrySearchEvent:
         return self._name
 
 
+    def page_size(self) -> int | None:
+        return self._page_size
+
+
+    def continuation(self) -> int | tuple[float, int] | None:
+        return self._continuation
+
+
+    def match_mode(self) -> str:
+        return self._match_mode
+
+
+    def generation(self) -> int | None:
+        return self._generation
+
+
     def __repr__(self) -> str:
-        return f'{type(self).__name__}: country_code = {repr(self._country_code)}, name = {repr(self._name)}'
+        return f'{type(self).__name__}: country_code = {repr(self._country_code)}, name = {repr(self._name)}, ' + \
+               f'page_size = {repr(self._page_size)}, continuation = {repr(self._continuation)}, ' + \
+               f'match_mode = {repr(self._match_mode)}, generation = {repr(self._generation)}'
 
 
 
-class CountrySearchResultEvent:
-    def __init__(self, country: Country):
-        self._country = country
+class CountrySearchResultsEvent:
+    def __init__(self, countries: list[Country], generation: int | None = None):
+        self._countries = countries
+        self._generation = generation
 
 
-    def country(self) -> Country:
-        return self._country
+    def countries(self) -> list[Country]:
+        return self._countries
+
+
+    def generation(self) -> int | None:
+        return self._generation
 
 
     def __repr__(self) -> str:
-        return f'{type(self).__name__}: country = {repr(self._country)}'
+        return f'{type(self).__name__}: countries = {repr(self._countries)}, ' + \
+               f'generation = {repr(self._generation)}'
+
+
+
+class CountrySearchMoreResultsEvent:
+    def __init__(self, continuation: int | tuple[float, int], generation: int | None = None):
+        self._continuation = continuation
+        self._generation = generation
+
+
+    def continuation(self) -> int | tuple[float, int]:
+        return self._continuation
+
+
+    def generation(self) -> int | None:
+        return self._generation
+
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}: continuation = {repr(self._continuation)}, ' + \
+               f'generation = {repr(self._generation)}'
 
 
 
@@ -6,24 +6,33 @@
 # Events related to the opening and closing of the database.
 #
 # See the project write-up for details on when these events are sent and by whom.
-#
-# YOU WILL NOT NEED TO MODIFY THIS FILE AT ALL
 
 from pathlib import Path
 
 
 
+# The names of the connection profiles the engine knows how to apply when it opens
+# a database; the first one is the default.
+CONNECTION_PROFILE_NAMES = ('interactive', 'bulk-load', 'read-only analytics')
+
+
+
 class OpenDatabaseEvent:
-    def __init__(self, path: Path):
+    def __init__(self, path: Path, profile_name: str | None = None):
         self._path = path
+        self._profile_name = profile_name
 
 
     def path(self) -> Path:
         return self._path
 
 
+    def profile_name(self) -> str | None:
+        return self._profile_name
+
+
     def __repr__(self) -> str:
-        return f'{type(self).__name__}: path = {repr(self._path)}'
+        return f'{type(self).__name__}: path = {repr(self._path)}, profile_name = {repr(self._profile_name)}'
 
 
 
@@ -47,6 +56,25 @@ class DatabaseOpenedEvent:
 
 
 
+class DatabaseProfileAppliedEvent:
+    def __init__(self, profile_name: str, settings: dict[str, object]):
+        self._profile_name = profile_name
+        self._settings = settings
+
+
+    def profile_name(self) -> str:
+        return self._profile_name
+
+
+    def settings(self) -> dict[str, object]:
+        return self._settings
+
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}: profile_name = {repr(self._profile_name)}, settings = {repr(self._settings)}'
+
+
+
 class DatabaseOpenFailedEvent:
     def __init__(self, reason: str):
         self._reason = reason
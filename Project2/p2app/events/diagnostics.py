@@ -0,0 +1,167 @@
+# p2app/events/diagnostics.py
+#
+# ICS 33 Winter 2024
+# Project 2: Learning to Fly
+#
+# Events that let the user interface's Debug menu ask the engine about its
+# internal state.
+
+from collections import namedtuple
+from pathlib import Path
+
+
+
+CacheStatistics = namedtuple('CacheStatistics', ['hits', 'misses', 'size', 'capacity'])
+
+CacheStatistics.__annotations__ = {
+    'hits': int,
+    'misses': int,
+    'size': int,
+    'capacity': int
+}
+
+
+# How much the pool of read connections is being used.  size is the number of read
+# connections; in_use and peak_in_use count the ones lent out now and at most at once;
+# waits counts the times a search had to wait for one, for wait_seconds in all.
+ConnectionPoolStatistics = namedtuple(
+    'ConnectionPoolStatistics',
+    ['size', 'in_use', 'peak_in_use', 'acquisitions', 'waits', 'wait_seconds'])
+
+ConnectionPoolStatistics.__annotations__ = {
+    'size': int,
+    'in_use': int,
+    'peak_in_use': int,
+    'acquisitions': int,
+    'waits': int,
+    'wait_seconds': float
+}
+
+
+# The kinds of things timing statistics are recorded for.
+TIMING_KIND_EVENT = 'event'
+TIMING_KIND_STATEMENT = 'statement'
+
+
+# How long one event type took to process, or one shape of SQL statement took to execute
+# and fetch, across every time it was.  The latencies are in seconds; rows counts the
+# events yielded in response to an event, or the rows fetched or changed by a statement.
+TimingStatistic = namedtuple(
+    'TimingStatistic',
+    ['kind', 'name', 'count', 'total_seconds', 'p50_seconds', 'p95_seconds', 'p99_seconds', 'rows'])
+
+TimingStatistic.__annotations__ = {
+    'kind': str,
+    'name': str,
+    'count': int,
+    'total_seconds': float,
+    'p50_seconds': float,
+    'p95_seconds': float,
+    'p99_seconds': float,
+    'rows': int
+}
+
+
+
+class GetCacheStatisticsEvent:
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}'
+
+
+
+class CacheStatisticsEvent:
+    def __init__(self, statistics: CacheStatistics):
+        self._statistics = statistics
+
+
+    def statistics(self) -> CacheStatistics:
+        return self._statistics
+
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}: statistics = {repr(self._statistics)}'
+
+
+
+class GetConnectionPoolStatisticsEvent:
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}'
+
+
+
+class ConnectionPoolStatisticsEvent:
+    def __init__(self, statistics: ConnectionPoolStatistics):
+        self._statistics = statistics
+
+
+    def statistics(self) -> ConnectionPoolStatistics:
+        return self._statistics
+
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}: statistics = {repr(self._statistics)}'
+
+
+
+class GetTimingStatisticsEvent:
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}'
+
+
+
+class TimingStatisticsEvent:
+    def __init__(self, statistics: list[TimingStatistic]):
+        self._statistics = statistics
+
+
+    def statistics(self) -> list[TimingStatistic]:
+        return self._statistics
+
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}: statistics = {len(self._statistics)}'
+
+
+
+class ResetTimingStatisticsEvent:
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}'
+
+
+
+class TimingStatisticsResetEvent:
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}'
+
+
+
+class DumpTimingStatisticsEvent:
+    def __init__(self, path: Path):
+        self._path = path
+
+
+    def path(self) -> Path:
+        return self._path
+
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}: path = {repr(self._path)}'
+
+
+
+class TimingStatisticsDumpedEvent:
+    def __init__(self, path: Path, count: int):
+        self._path = path
+        self._count = count
+
+
+    def path(self) -> Path:
+        return self._path
+
+
+    def count(self) -> int:
+        return self._count
+
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}: path = {repr(self._path)}, count = {repr(self._count)}'
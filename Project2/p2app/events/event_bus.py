@@ -11,7 +11,43 @@
 # * The user interface's internal events are routed back to the user interface
 #   to be processed, with the engine never seeing them.
 #
-# YOU WILL NOT NEED TO MODIFY THIS FILE AT ALL
+# By default, the engine processes each event on the calling thread, which is
+# the user interface's thread.  In worker mode, the engine instead processes
+# events one at a time, in the order they were sent, on a dedicated thread (so
+# the database connection it opens belongs to that thread), while the user
+# interface periodically collects the engine's results from a queue, so that a
+# slow query never stops the window from repainting.  Events that the engine says
+# only read from the database (such as searches) are instead handed to a small
+# pool of threads, so that several of them can be processed at once, each on its
+# own read connection, without waiting behind one another or behind a save.  The
+# engine puts each of those events in a lane (such as the one for regions), and the
+# events in a lane are still processed one at a time, in the order they were sent,
+# so their results arrive in that order, too.  A few events (such as cancelling
+# a search) are processed right away on the user interface's thread instead, since
+# they'd otherwise wait behind the events they're meant to affect.  Outside of
+# worker mode, every event is finished before the next one is sent, so there's never
+# a search in progress to cancel.
+#
+# While recording, every event the user interface sends to the engine is also
+# written to a log, which benchmarks/replay.py can replay without the user
+# interface.
+
+import queue
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from .app import EndApplicationEvent
+from .recording import EventRecorder
+
+
+
+# How often, in milliseconds, the user interface checks for results from the engine
+# while in worker mode, and the most results it handles before letting Tk catch up.
+_RESULT_POLL_INTERVAL_MS = 20
+_MAX_RESULTS_PER_POLL = 200
+
+# The most events processed at once by the threads in worker mode.
+_MAX_CONCURRENT_EVENTS = 8
 
 
 
@@ -20,6 +56,13 @@ class EventBus:
         self._view = None
         self._engine = None
         self._is_debug_mode = False
+        self._pending_events = None
+        self._results = None
+        self._worker = None
+        self._concurrent_events = None
+        self._lanes = {}
+        self._lanes_lock = threading.Lock()
+        self._recorder = None
 
 
     def register_view(self, view):
@@ -38,12 +81,122 @@ class EventBus:
         self._is_debug_mode = False
 
 
+    def start_recording(self, path):
+        self.stop_recording()
+        self._recorder = EventRecorder(path)
+
+
+    def stop_recording(self):
+        if self._recorder is not None:
+            self._recorder.close()
+            self._recorder = None
+
+
+    def enable_worker_mode(self):
+        if self._worker is not None:
+            return
+
+        self._pending_events = queue.SimpleQueue()
+        self._results = queue.SimpleQueue()
+
+        self._concurrent_events = ThreadPoolExecutor(
+            max_workers = _MAX_CONCURRENT_EVENTS, thread_name_prefix = 'engine-reader')
+
+        self._worker = threading.Thread(
+            target = self._process_pending_events, name = 'engine-worker', daemon = True)
+
+        self._worker.start()
+        self._view.after(_RESULT_POLL_INTERVAL_MS, self._deliver_results)
+
+
     def initiate_event(self, event):
         if self._is_debug_mode:
             print(f'Sent by view  : {event}')
 
+        if self._recorder is not None:
+            self._recorder.record(event)
+
+        if self._worker is not None:
+            if self._engine.is_immediate(event):
+                self._process_event(event)
+            else:
+                self._pending_events.put(event)
+
+            return
+
         for result_event in self._engine.process_event(event):
-            if self._is_debug_mode:
-                print(f'Sent by engine: {result_event}')
+            self._deliver_result(result_event)
+
+
+    def _process_pending_events(self):
+        while True:
+            event = self._pending_events.get()
+
+            lane = self._engine.concurrent_lane(event)
+
+            if lane is not None:
+                self._process_in_lane(lane, event)
+            elif self._process_event(event):
+                self._concurrent_events.shutdown(wait = False, cancel_futures = True)
+                return
+
+
+    def _process_in_lane(self, lane, event):
+        # An event stays at the front of its lane until it's been processed, so a lane
+        # that already has events in it has a thread working through them, which will
+        # get to this event in turn.
+        with self._lanes_lock:
+            pending = self._lanes.setdefault(lane, deque())
+            pending.append(event)
+
+            if len(pending) > 1:
+                return
+
+        self._concurrent_events.submit(self._process_lane, pending)
+
+
+    def _process_lane(self, pending):
+        while True:
+            with self._lanes_lock:
+                event = pending[0]
+
+            self._process_event(event)
+
+            with self._lanes_lock:
+                pending.popleft()
+
+                if not pending:
+                    return
+
+
+    def _process_event(self, event):
+        is_ending = False
+
+        for result_event in self._engine.process_event(event):
+            self._results.put(result_event)
+            is_ending = is_ending or isinstance(result_event, EndApplicationEvent)
+
+        return is_ending
+
+
+    def _deliver_results(self):
+        for _ in range(_MAX_RESULTS_PER_POLL):
+            try:
+                result_event = self._results.get_nowait()
+            except queue.Empty:
+                self._view.after(_RESULT_POLL_INTERVAL_MS, self._deliver_results)
+                return
+
+            self._deliver_result(result_event)
+
+            if isinstance(result_event, EndApplicationEvent):
+                return
+
+        self._view.after(1, self._deliver_results)
+
+
+    def _deliver_result(self, result_event):
+        if self._is_debug_mode:
+            print(f'Sent by engine: {result_event}')
 
-            self._view.handle_event(result_event)
+        self._view.handle_event(result_event)
@@ -0,0 +1,98 @@
+# p2app/events/exports.py
+#
+# ICS 33 Winter 2024
+# Project 2: Learning to Fly
+#
+# Events related to exporting the rows of a table to a CSV or JSONL file,
+# optionally compressed with gzip.
+
+from pathlib import Path
+
+
+
+# The tables that can be exported.
+EXPORT_TABLES = (
+    'continent', 'country', 'region', 'airport', 'runway', 'airport_frequency', 'navigation_aid')
+
+
+
+class StartTableExportEvent:
+    def __init__(self, table: str, path: Path, filters: dict[str, object] | None = None):
+        self._table = table
+        self._path = path
+        self._filters = filters
+
+
+    def table(self) -> str:
+        return self._table
+
+
+    def path(self) -> Path:
+        return self._path
+
+
+    def filters(self) -> dict[str, object] | None:
+        return self._filters
+
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}: table = {repr(self._table)}, path = {repr(self._path)}, ' + \
+               f'filters = {repr(self._filters)}'
+
+
+
+class TableExportProgressEvent:
+    def __init__(self, table: str, rows_written: int):
+        self._table = table
+        self._rows_written = rows_written
+
+
+    def table(self) -> str:
+        return self._table
+
+
+    def rows_written(self) -> int:
+        return self._rows_written
+
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}: table = {repr(self._table)}, rows_written = {repr(self._rows_written)}'
+
+
+
+class TableExportCompletedEvent:
+    def __init__(self, table: str, path: Path, rows_written: int):
+        self._table = table
+        self._path = path
+        self._rows_written = rows_written
+
+
+    def table(self) -> str:
+        return self._table
+
+
+    def path(self) -> Path:
+        return self._path
+
+
+    def rows_written(self) -> int:
+        return self._rows_written
+
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}: table = {repr(self._table)}, path = {repr(self._path)}, ' + \
+               f'rows_written = {repr(self._rows_written)}'
+
+
+
+class TableExportFailedEvent:
+    def __init__(self, reason: str):
+        self._reason = reason
+
+
+    def reason(self) -> str:
+        return self._reason
+
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}: reason = {repr(self._reason)}'
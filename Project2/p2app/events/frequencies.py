@@ -0,0 +1,98 @@
+# p2app/events/frequencies.py
+#
+# ICS 33 Winter 2024
+# Project 2: Learning to Fly
+#
+# Events related to finding the airport and navigation aid frequencies within
+# a range, along with the units a range can be given in.
+
+from collections import namedtuple
+
+
+
+# The units a frequency range can be given in.  Airport frequencies are stored in MHz
+# and navigation aid frequencies in kHz, but a range in either unit finds both.
+FREQUENCY_MHZ = 'MHz'
+FREQUENCY_KHZ = 'kHz'
+
+FREQUENCY_UNITS = (FREQUENCY_MHZ, FREQUENCY_KHZ)
+
+# Where a matching frequency came from: an airport's frequency, or a navigation aid.
+FREQUENCY_SOURCE_AIRPORT = 'airport_frequency'
+FREQUENCY_SOURCE_NAVAID = 'navigation_aid'
+
+
+
+# A frequency within a searched range.  record_id is the airport_frequency_id or the
+# navigation_aid_id, depending on the source; description is an airport frequency's
+# description or a navigation aid's name.
+FrequencyMatch = namedtuple(
+    'FrequencyMatch',
+    ['source', 'record_id', 'airport_id', 'type', 'description', 'frequency_mhz'])
+
+FrequencyMatch.__annotations__ = {
+    'source': str,
+    'record_id': int,
+    'airport_id': int | None,
+    'type': str,
+    'description': str | None,
+    'frequency_mhz': float
+}
+
+
+
+class FindFrequenciesEvent:
+    def __init__(self, low: float, high: float, unit: str = FREQUENCY_MHZ, frequency_type: str | None = None):
+        self._low = low
+        self._high = high
+        self._unit = unit
+        self._frequency_type = frequency_type
+
+
+    def low(self) -> float:
+        return self._low
+
+
+    def high(self) -> float:
+        return self._high
+
+
+    def unit(self) -> str:
+        return self._unit
+
+
+    def frequency_type(self) -> str | None:
+        return self._frequency_type
+
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}: low = {repr(self._low)}, high = {repr(self._high)}, ' + \
+               f'unit = {repr(self._unit)}, frequency_type = {repr(self._frequency_type)}'
+
+
+
+class FrequencyFoundEvent:
+    def __init__(self, match: FrequencyMatch):
+        self._match = match
+
+
+    def match(self) -> FrequencyMatch:
+        return self._match
+
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}: match = {repr(self._match)}'
+
+
+
+class FindFrequenciesFailedEvent:
+    def __init__(self, reason: str):
+        self._reason = reason
+
+
+    def reason(self) -> str:
+        return self._reason
+
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}: reason = {repr(self._reason)}'
@@ -0,0 +1,60 @@
+# p2app/events/full_text.py
+#
+# ICS 33 Winter 2024
+# Project 2: Learning to Fly
+#
+# Events related to the full-text index over the names and keywords of
+# continents, countries, regions, and airports, along with the match modes a
+# search can ask for.
+
+
+
+# How a search's name criterion is matched.  An exact match compares the whole name;
+# a prefix match finds names containing words that begin with each word typed; a ranked
+# match finds names or keywords containing any word typed (or a word beginning with
+# it), best matches first.
+MATCH_EXACT = 'exact'
+MATCH_PREFIX = 'prefix'
+MATCH_RANKED = 'ranked'
+
+MATCH_MODES = (MATCH_EXACT, MATCH_PREFIX, MATCH_RANKED)
+
+
+
+class BuildFullTextIndexEvent:
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}'
+
+
+
+class FullTextIndexBuiltEvent:
+    def __init__(self, tables: list[str]):
+        self._tables = tables
+
+
+    def tables(self) -> list[str]:
+        return self._tables
+
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}: tables = {repr(self._tables)}'
+
+
+
+class DropFullTextIndexEvent:
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}'
+
+
+
+class FullTextIndexDroppedEvent:
+    def __init__(self, tables: list[str]):
+        self._tables = tables
+
+
+    def tables(self) -> list[str]:
+        return self._tables
+
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}: tables = {repr(self._tables)}'
@@ -0,0 +1,107 @@
+# p2app/events/imports.py
+#
+# ICS 33 Winter 2024
+# Project 2: Learning to Fly
+#
+# Events related to importing continents, countries, or regions in bulk from a
+# CSV or JSONL file in OurAirports format.
+
+from collections import namedtuple
+from pathlib import Path
+
+
+
+# The tables that can be imported in bulk.
+BULK_IMPORT_TABLES = ('continent', 'country', 'region')
+
+
+
+ImportFailure = namedtuple('ImportFailure', ['line_number', 'reason'])
+
+ImportFailure.__annotations__ = {
+    'line_number': int,
+    'reason': str
+}
+
+
+
+class StartBulkImportEvent:
+    def __init__(self, table: str, path: Path):
+        self._table = table
+        self._path = path
+
+
+    def table(self) -> str:
+        return self._table
+
+
+    def path(self) -> Path:
+        return self._path
+
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}: table = {repr(self._table)}, path = {repr(self._path)}'
+
+
+
+class BulkImportProgressEvent:
+    def __init__(self, table: str, rows_read: int, rows_inserted: int):
+        self._table = table
+        self._rows_read = rows_read
+        self._rows_inserted = rows_inserted
+
+
+    def table(self) -> str:
+        return self._table
+
+
+    def rows_read(self) -> int:
+        return self._rows_read
+
+
+    def rows_inserted(self) -> int:
+        return self._rows_inserted
+
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}: table = {repr(self._table)}, ' + \
+               f'rows_read = {repr(self._rows_read)}, rows_inserted = {repr(self._rows_inserted)}'
+
+
+
+class BulkImportCompletedEvent:
+    def __init__(self, table: str, rows_inserted: int, failures: list[ImportFailure]):
+        self._table = table
+        self._rows_inserted = rows_inserted
+        self._failures = failures
+
+
+    def table(self) -> str:
+        return self._table
+
+
+    def rows_inserted(self) -> int:
+        return self._rows_inserted
+
+
+    def failures(self) -> list[ImportFailure]:
+        return self._failures
+
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}: table = {repr(self._table)}, ' + \
+               f'rows_inserted = {repr(self._rows_inserted)}, failures = {len(self._failures)}'
+
+
+
+class BulkImportFailedEvent:
+    def __init__(self, reason: str):
+        self._reason = reason
+
+
+    def reason(self) -> str:
+        return self._reason
+
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}: reason = {repr(self._reason)}'
@@ -0,0 +1,123 @@
+# p2app/events/indexes.py
+#
+# ICS 33 Winter 2024
+# Project 2: Learning to Fly
+#
+# Events related to managing the database's secondary indexes and checking how
+# the engine's searches are executed.
+
+from collections import namedtuple
+
+
+
+IndexStatus = namedtuple('IndexStatus', ['name', 'table', 'columns', 'exists'])
+
+IndexStatus.__annotations__ = {
+    'name': str,
+    'table': str,
+    'columns': tuple[str, ...],
+    'exists': bool
+}
+
+
+
+SearchPlan = namedtuple('SearchPlan', ['search', 'statement', 'plan', 'is_full_scan'])
+
+SearchPlan.__annotations__ = {
+    'search': str,
+    'statement': str,
+    'plan': list[str],
+    'is_full_scan': bool
+}
+
+
+
+class CreateIndexesEvent:
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}'
+
+
+
+class IndexesCreatedEvent:
+    def __init__(self, names: list[str]):
+        self._names = names
+
+
+    def names(self) -> list[str]:
+        return self._names
+
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}: names = {repr(self._names)}'
+
+
+
+class DropIndexesEvent:
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}'
+
+
+
+class IndexesDroppedEvent:
+    def __init__(self, names: list[str]):
+        self._names = names
+
+
+    def names(self) -> list[str]:
+        return self._names
+
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}: names = {repr(self._names)}'
+
+
+
+class ListIndexesEvent:
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}'
+
+
+
+class IndexesListedEvent:
+    def __init__(self, indexes: list[IndexStatus]):
+        self._indexes = indexes
+
+
+    def indexes(self) -> list[IndexStatus]:
+        return self._indexes
+
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}: indexes = {repr(self._indexes)}'
+
+
+
+class ExplainSearchesEvent:
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}'
+
+
+
+class SearchesExplainedEvent:
+    def __init__(self, plans: list[SearchPlan]):
+        self._plans = plans
+
+
+    def plans(self) -> list[SearchPlan]:
+        return self._plans
+
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}: plans = {repr(self._plans)}'
+
+
+
+class AnalyzeDatabaseEvent:
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}'
+
+
+
+class DatabaseAnalyzedEvent:
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}'
@@ -0,0 +1,107 @@
+# p2app/events/navaids.py
+#
+# ICS 33 Winter 2024
+# Project 2: Learning to Fly
+#
+# Events related to finding the navigation aids near each airport, whether or
+# not the navigation aid is linked to that airport.
+
+from collections import namedtuple
+
+
+
+# A navigation aid near an airport, along with its distance from the airport.
+NearbyNavaid = namedtuple(
+    'NearbyNavaid',
+    ['navigation_aid_id', 'ident', 'name', 'type', 'frequency_khz', 'distance_km'])
+
+NearbyNavaid.__annotations__ = {
+    'navigation_aid_id': int,
+    'ident': str,
+    'name': str,
+    'type': str,
+    'frequency_khz': int,
+    'distance_km': float
+}
+
+
+
+class BuildNavaidProximityEvent:
+    def __init__(self, radius_km: float):
+        self._radius_km = radius_km
+
+
+    def radius_km(self) -> float:
+        return self._radius_km
+
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}: radius_km = {repr(self._radius_km)}'
+
+
+
+class NavaidProximityBuiltEvent:
+    def __init__(self, radius_km: float, pair_count: int):
+        self._radius_km = radius_km
+        self._pair_count = pair_count
+
+
+    def radius_km(self) -> float:
+        return self._radius_km
+
+
+    def pair_count(self) -> int:
+        return self._pair_count
+
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}: radius_km = {repr(self._radius_km)}, ' + \
+               f'pair_count = {repr(self._pair_count)}'
+
+
+
+class LoadNearbyNavaidsEvent:
+    def __init__(self, airport_id: int):
+        self._airport_id = airport_id
+
+
+    def airport_id(self) -> int:
+        return self._airport_id
+
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}: airport_id = {repr(self._airport_id)}'
+
+
+
+class NearbyNavaidsLoadedEvent:
+    def __init__(self, airport_id: int, navaids: list[NearbyNavaid]):
+        self._airport_id = airport_id
+        self._navaids = navaids
+
+
+    def airport_id(self) -> int:
+        return self._airport_id
+
+
+    def navaids(self) -> list[NearbyNavaid]:
+        return self._navaids
+
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}: airport_id = {repr(self._airport_id)}, ' + \
+               f'navaids = {repr(self._navaids)}'
+
+
+
+class NavaidProximityFailedEvent:
+    def __init__(self, reason: str):
+        self._reason = reason
+
+
+    def reason(self) -> str:
+        return self._reason
+
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}: reason = {repr(self._reason)}'
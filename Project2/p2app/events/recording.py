@@ -0,0 +1,110 @@
+# p2app/events/recording.py
+#
+# ICS 33 Winter 2024
+# Project 2: Learning to Fly
+#
+# Recording the events the user interface sends to the engine in a log that can
+# be replayed later without the user interface (see benchmarks/replay.py).
+#
+# A log is a JSONL file with one line per event, holding the number of seconds
+# since recording began and the event itself.  An event is stored as the name
+# of its type and its attributes; the attributes' values can be namedtuples from
+# p2app.events (e.g., Continent), paths, tuples, lists, and dictionaries, along
+# with anything JSON can represent on its own.
+
+import json
+import time
+from collections.abc import Iterator
+from pathlib import Path
+
+
+
+class EventRecorder:
+    """Appends each event it's given to a log file, flushing after every one, so the log
+    is complete up to the last event even if the application doesn't exit cleanly."""
+
+    def __init__(self, path: Path):
+        """Initializes a recorder that writes a new log at the given path"""
+        self._file = Path(path).open('w', encoding = 'utf-8')
+        self._start = time.perf_counter()
+
+    def record(self, event) -> None:
+        """Writes an event to the log."""
+        record = {'seconds': time.perf_counter() - self._start, 'event': encode_event(event)}
+        self._file.write(json.dumps(record) + '\n')
+        self._file.flush()
+
+    def close(self) -> None:
+        """Closes the log."""
+        self._file.close()
+
+
+def read_recording(path: Path) -> Iterator[tuple[float, object]]:
+    """Yields (seconds since recording began, event) for every event in a log, in the order
+    they were recorded."""
+    with Path(path).open(encoding = 'utf-8') as file:
+        for line in file:
+            if line.strip():
+                record = json.loads(line)
+                yield record['seconds'], decode_event(record['event'])
+
+
+def encode_event(event) -> dict:
+    """Returns a JSON-compatible representation of an event."""
+    return {
+        'type': type(event).__name__,
+        'attributes': {name: _encode_value(value) for name, value in vars(event).items()}
+    }
+
+
+def decode_event(encoded: dict):
+    """Returns the event that encode_event represented, without calling its constructor, so
+    it's recreated with exactly the attributes it was recorded with."""
+    event_type = _event_types()[encoded['type']]
+    event = event_type.__new__(event_type)
+
+    for name, value in encoded['attributes'].items():
+        setattr(event, name, _decode_value(value))
+
+    return event
+
+
+def _event_types() -> dict[str, type]:
+    """Returns every class in p2app.events, keyed by name, which includes both the event
+    types and the namedtuple types their attributes can hold."""
+    import p2app.events
+    return {name: value for name, value in vars(p2app.events).items() if isinstance(value, type)}
+
+
+def _encode_value(value):
+    """Returns a JSON-compatible representation of one of an event's attributes."""
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    elif isinstance(value, tuple) and hasattr(value, '_fields'):
+        return {'namedtuple': type(value).__name__, 'values': [_encode_value(field) for field in value]}
+    elif isinstance(value, tuple):
+        return {'tuple': [_encode_value(element) for element in value]}
+    elif isinstance(value, list):
+        return [_encode_value(element) for element in value]
+    elif isinstance(value, dict):
+        return {'dict': [[_encode_value(key), _encode_value(element)] for key, element in value.items()]}
+    elif isinstance(value, Path):
+        return {'path': str(value)}
+    else:
+        raise TypeError(f'Cannot record a value of type {type(value).__name__}')
+
+
+def _decode_value(value):
+    """Returns the attribute that _encode_value represented."""
+    if isinstance(value, list):
+        return [_decode_value(element) for element in value]
+    elif not isinstance(value, dict):
+        return value
+    elif 'namedtuple' in value:
+        return _event_types()[value['namedtuple']](*(_decode_value(field) for field in value['values']))
+    elif 'tuple' in value:
+        return tuple(_decode_value(element) for element in value['tuple'])
+    elif 'dict' in value:
+        return {_decode_value(key): _decode_value(element) for key, element in value['dict']}
+    else:
+        return Path(value['path'])
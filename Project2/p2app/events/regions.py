@@ -7,10 +7,9 @@
 # in the database.
 #
 # See the project write-up for details on when these events are sent and by whom.
-#
-# YOU WILL NOT NEED TO MODIFY THIS FILE AT ALL
 
 from collections import namedtuple
+from .full_text import MATCH_EXACT
 
 
 
@@ -33,10 +32,17 @@ Region.__annotations__ = {
 
 
 class StartRegionSearchEvent:
-    def __init__(self, region_code: str, local_code: str, name: str):
+    def __init__(
+            self, region_code: str, local_code: str, name: str,
+            page_size: int | None = None, continuation: int | tuple[float, int] | None = None,
+            match_mode: str = MATCH_EXACT, generation: int | None = None):
         self._region_code = region_code
         self._local_code = local_code
         self._name = name
+        self._page_size = page_size
+        self._continuation = continuation
+        self._match_mode = match_mode
+        self._generation = generation
 
 
     def region_code(self) -> str:
@@ -51,23 +57,67 @@ class StartRegionSearchEvent:
         return self._name
 
 
+    def page_size(self) -> int | None:
+        return self._page_size
+
+
+    def continuation(self) -> int | tuple[float, int] | None:
+        return self._continuation
+
+
+    def match_mode(self) -> str:
+        return self._match_mode
+
+
+    def generation(self) -> int | None:
+        return self._generation
+
+
     def __repr__(self) -> str:
         return f'{type(self).__name__}: region_code = {repr(self._region_code)}, ' + \
-               f'local_name = {repr(self._local_code)}, name = {repr(self._name)}'
+               f'local_name = {repr(self._local_code)}, name = {repr(self._name)}, ' + \
+               f'page_size = {repr(self._page_size)}, continuation = {repr(self._continuation)}, ' + \
+               f'match_mode = {repr(self._match_mode)}, generation = {repr(self._generation)}'
 
 
 
-class RegionSearchResultEvent:
-    def __init__(self, region: Region):
-        self._region = region
+class RegionSearchResultsEvent:
+    def __init__(self, regions: list[Region], generation: int | None = None):
+        self._regions = regions
+        self._generation = generation
 
 
-    def region(self) -> Region:
-        return self._region
+    def regions(self) -> list[Region]:
+        return self._regions
+
+
+    def generation(self) -> int | None:
+        return self._generation
 
 
     def __repr__(self) -> str:
-        return f'{type(self).__name__}: region = {repr(self._region)}'
+        return f'{type(self).__name__}: regions = {repr(self._regions)}, ' + \
+               f'generation = {repr(self._generation)}'
+
+
+
+class RegionSearchMoreResultsEvent:
+    def __init__(self, continuation: int | tuple[float, int], generation: int | None = None):
+        self._continuation = continuation
+        self._generation = generation
+
+
+    def continuation(self) -> int | tuple[float, int]:
+        return self._continuation
+
+
+    def generation(self) -> int | None:
+        return self._generation
+
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}: continuation = {repr(self._continuation)}, ' + \
+               f'generation = {repr(self._generation)}'
 
 
 
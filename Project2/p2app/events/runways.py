@@ -0,0 +1,42 @@
+# p2app/events/runways.py
+#
+# ICS 33 Winter 2024
+# Project 2: Learning to Fly
+#
+# Events related to the per-airport summary of runways, and the filter that
+# lets an airport search ask for airports with a suitable runway.
+
+from collections import namedtuple
+
+
+
+# A filter on the runways an airport must have: at least one open runway that is at
+# least min_length_ft long (when given), and that is also paved and/or lighted when
+# those are True.
+RunwayFilter = namedtuple('RunwayFilter', ['min_length_ft', 'paved', 'lighted'])
+
+RunwayFilter.__annotations__ = {
+    'min_length_ft': int | None,
+    'paved': bool,
+    'lighted': bool
+}
+
+
+
+class RebuildRunwaySummaryEvent:
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}'
+
+
+
+class RunwaySummaryRebuiltEvent:
+    def __init__(self, airport_count: int):
+        self._airport_count = airport_count
+
+
+    def airport_count(self) -> int:
+        return self._airport_count
+
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}: airport_count = {repr(self._airport_count)}'
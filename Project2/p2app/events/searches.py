@@ -0,0 +1,52 @@
+# p2app/events/searches.py
+#
+# ICS 33 Winter 2024
+# Project 2: Learning to Fly
+#
+# Events related to cancelling searches that are still in progress, whether the
+# user interface asked for them to be cancelled or they ran past the time budget
+# of the database's connection profile.
+
+
+
+class CancelSearchEvent:
+    def __init__(self, search: str, generation: int | None = None):
+        self._search = search
+        self._generation = generation
+
+
+    def search(self) -> str:
+        return self._search
+
+
+    def generation(self) -> int | None:
+        return self._generation
+
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}: search = {repr(self._search)}, generation = {repr(self._generation)}'
+
+
+
+class SearchCancelledEvent:
+    def __init__(self, search: str, reason: str, generation: int | None):
+        self._search = search
+        self._reason = reason
+        self._generation = generation
+
+
+    def search(self) -> str:
+        return self._search
+
+
+    def reason(self) -> str:
+        return self._reason
+
+
+    def generation(self) -> int | None:
+        return self._generation
+
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}: search = {repr(self._search)}, reason = {repr(self._reason)}, ' + \
+               f'generation = {repr(self._generation)}'
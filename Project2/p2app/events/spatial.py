@@ -0,0 +1,92 @@
+# p2app/events/spatial.py
+#
+# ICS 33 Winter 2024
+# Project 2: Learning to Fly
+#
+# Events related to finding the airports near a point on the Earth's surface.
+
+from .airports import Airport
+
+
+
+class FindNearestAirportsEvent:
+    def __init__(self, latitude_deg: float, longitude_deg: float, count: int):
+        self._latitude_deg = latitude_deg
+        self._longitude_deg = longitude_deg
+        self._count = count
+
+
+    def latitude_deg(self) -> float:
+        return self._latitude_deg
+
+
+    def longitude_deg(self) -> float:
+        return self._longitude_deg
+
+
+    def count(self) -> int:
+        return self._count
+
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}: latitude_deg = {repr(self._latitude_deg)}, ' + \
+               f'longitude_deg = {repr(self._longitude_deg)}, count = {repr(self._count)}'
+
+
+
+class FindAirportsWithinEvent:
+    def __init__(self, latitude_deg: float, longitude_deg: float, radius_km: float):
+        self._latitude_deg = latitude_deg
+        self._longitude_deg = longitude_deg
+        self._radius_km = radius_km
+
+
+    def latitude_deg(self) -> float:
+        return self._latitude_deg
+
+
+    def longitude_deg(self) -> float:
+        return self._longitude_deg
+
+
+    def radius_km(self) -> float:
+        return self._radius_km
+
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}: latitude_deg = {repr(self._latitude_deg)}, ' + \
+               f'longitude_deg = {repr(self._longitude_deg)}, radius_km = {repr(self._radius_km)}'
+
+
+
+class NearbyAirportEvent:
+    def __init__(self, airport: Airport, distance_km: float):
+        self._airport = airport
+        self._distance_km = distance_km
+
+
+    def airport(self) -> Airport:
+        return self._airport
+
+
+    def distance_km(self) -> float:
+        return self._distance_km
+
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}: airport = {repr(self._airport)}, ' + \
+               f'distance_km = {repr(self._distance_km)}'
+
+
+
+class FindNearbyAirportsFailedEvent:
+    def __init__(self, reason: str):
+        self._reason = reason
+
+
+    def reason(self) -> str:
+        return self._reason
+
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}: reason = {repr(self._reason)}'
@@ -4,21 +4,38 @@
 # Project 2: Learning to Fly
 #
 # This is the portion of the user interface that is displayed when the
-# Edit / Countries menu item is selected.
-#
-# YOU WILL NOT NEED TO MODIFY THIS FILE AT ALL
+# Edit / Countries menu item is selected.  Its search results are fetched a
+# page at a time and shown in a list that only draws the rows in view, and
+# starting a new search cancels the one it replaces.
 
+import itertools
 import tkinter
 import tkinter.messagebox
 from p2app.events import *
 from .event_handling import EventHandler
 from .events import *
+from .virtual_list import VirtualListbox
+
+
+
+_SEARCH_PAGE_SIZE = 100
+
+# How long, in milliseconds, a search as you type waits after a keystroke before it
+# starts, so that a burst of typing starts one search rather than one per keystroke.
+_SEARCH_AS_YOU_TYPE_DELAY_MS = 250
+
+# Numbers every search, so the engine can tell which searches came before a
+# cancellation; the numbers keep going up even when the view is built again.
+_search_generations = itertools.count(1)
 
 
 
 class CountriesView(tkinter.Frame, EventHandler):
     def __init__(self, parent):
         super().__init__(parent)
+        self.subscribe(
+            SaveCountryFailedEvent, DiscardCountryEvent, NewCountryEvent, StartEditingCountryEvent,
+            CountryLoadedEvent, CountrySavedEvent)
 
         search_view = _CountriesSearchView(self)
         search_view.grid(row = 0, column = 0, sticky = tkinter.NSEW)
@@ -62,6 +79,9 @@ class CountriesView(tkinter.Frame, EventHandler):
 class _CountriesSearchView(tkinter.LabelFrame, EventHandler):
     def __init__(self, parent):
         super().__init__(parent, text = 'Country Search')
+        self.subscribe(
+            ClearCountriesSearchListEvent, CountrySearchResultsEvent, CountrySearchMoreResultsEvent,
+            SearchCancelledEvent, ShowEditCountriesViewEvent)
 
         code_label = tkinter.Label(self, text = 'Country Code: ')
         code_label.grid(row = 0, column = 0, padx = 5, pady = 5, sticky = tkinter.E)
@@ -81,54 +101,109 @@ class _CountriesSearchView(tkinter.LabelFrame, EventHandler):
         name_entry = tkinter.Entry(self, textvariable = self._search_name, width = 30)
         name_entry.grid(row = 1, column = 1, sticky = tkinter.EW, padx = 5, pady = 5)
 
+        match_label = tkinter.Label(self, text = 'Match: ')
+        match_label.grid(row = 2, column = 0, sticky = tkinter.E, padx = 5, pady = 5)
+
+        self._match_mode = tkinter.StringVar(self, MATCH_EXACT)
+        self._match_mode.trace_add('write', self._on_search_changed)
+
+        match_menu = tkinter.OptionMenu(self, self._match_mode, *MATCH_MODES)
+        match_menu.grid(row = 2, column = 1, sticky = tkinter.W, padx = 5, pady = 5)
+
         self._search_button = tkinter.Button(
             self, text = 'Search', state = tkinter.DISABLED,
             command = self._on_search_button_clicked)
 
-        self._search_button.grid(row = 2, column = 1, sticky = tkinter.E, padx = 5, pady = 5)
+        self._search_button.grid(row = 3, column = 1, sticky = tkinter.E, padx = 5, pady = 5)
+
+        self._search_as_you_type = tkinter.BooleanVar(self, False)
+        self._search_as_you_type.trace_add('write', self._on_search_as_you_type_changed)
+
+        search_as_you_type_button = tkinter.Checkbutton(
+            self, text = 'Search as you type', variable = self._search_as_you_type)
+
+        search_as_you_type_button.grid(row = 3, column = 0, sticky = tkinter.W, padx = 5, pady = 5)
 
         empty_area = tkinter.Label(self, text = '')
-        empty_area.grid(row = 3, column = 1, sticky = tkinter.NSEW, padx = 5, pady = 5)
+        empty_area.grid(row = 4, column = 1, sticky = tkinter.NSEW, padx = 5, pady = 5)
 
-        self._search_list = tkinter.Listbox(
-            self, height = 4,
-            activestyle = tkinter.NONE, selectmode = tkinter.SINGLE)
+        self._search_list = VirtualListbox(self, height = 4)
 
         self._search_list.bind('<<ListboxSelect>>', self._on_search_selection_changed)
         self._search_list.grid(
-            row = 0, column = 2, rowspan = 4, columnspan = 1, sticky = tkinter.NSEW,
+            row = 0, column = 2, rowspan = 5, columnspan = 1, sticky = tkinter.NSEW,
             padx = 5, pady = 5)
 
         self._search_country_ids = []
+        self._search_criteria = None
+        self._search_match_mode = MATCH_EXACT
+        self._search_continuation = None
+        self._search_generation = 0
+        self._pending_search = None
+        self._search_stopped_reason = None
 
         button_frame = tkinter.Frame(self)
-        button_frame.grid(row = 4, column = 2, sticky = tkinter.E, padx = 5, pady = 5)
+        button_frame.grid(row = 5, column = 2, sticky = tkinter.E, padx = 5, pady = 5)
+
+        self._more_button = tkinter.Button(
+            button_frame, text = 'Load More', state = tkinter.DISABLED,
+            command = self._on_load_more)
+
+        self._more_button.grid(row = 0, column = 0, padx = 5, pady = 5)
 
         self._new_button = tkinter.Button(
             button_frame, text = 'New Country',
             command = self._on_new_country)
 
-        self._new_button.grid(row = 0, column = 0, padx = 5, pady = 5)
+        self._new_button.grid(row = 0, column = 1, padx = 5, pady = 5)
 
         self._edit_button = tkinter.Button(
             button_frame, text = 'Edit Country', state = tkinter.DISABLED,
             command = self._on_edit_country)
 
-        self._edit_button.grid(row = 0, column = 1, padx = 5, pady = 5)
+        self._edit_button.grid(row = 0, column = 2, padx = 5, pady = 5)
 
         self.rowconfigure(0, weight = 0)
         self.rowconfigure(1, weight = 0)
         self.rowconfigure(2, weight = 0)
-        self.rowconfigure(3, weight = 1)
-        self.rowconfigure(4, weight = 0)
+        self.rowconfigure(3, weight = 0)
+        self.rowconfigure(4, weight = 1)
+        self.rowconfigure(5, weight = 0)
         self.columnconfigure(0, weight = 0)
         self.columnconfigure(1, weight = 1)
         self.columnconfigure(2, weight = 2)
 
 
     def _on_search_button_clicked(self):
+        self._cancel_pending_search()
+        self._start_search()
+
+
+    def _start_search(self):
+        # Every search has a new generation, which the engine includes in its results,
+        # so results still arriving from an earlier search can be told apart and ignored.
+        # The earlier search is cancelled, too, so the engine stops spending time on it.
+        self._search_criteria = self._get_search_criteria()
+        self._search_stopped_reason = None
+        self._search_match_mode = self._match_mode.get()
+        self._search_generation = next(_search_generations)
+
+        self.initiate_event(CancelSearchEvent(StartCountrySearchEvent.__name__, self._search_generation))
         self.initiate_event(ClearCountriesSearchListEvent())
-        self.initiate_event(StartCountrySearchEvent(self._get_search_code(), self._get_search_name()))
+        self.initiate_event(StartCountrySearchEvent(
+            *self._search_criteria, _SEARCH_PAGE_SIZE, match_mode = self._search_match_mode,
+            generation = self._search_generation))
+
+
+    def _on_load_more(self):
+        self._more_button['state'] = tkinter.DISABLED
+        self.initiate_event(StartCountrySearchEvent(
+            *self._search_criteria, _SEARCH_PAGE_SIZE, self._search_continuation,
+            self._search_match_mode, self._search_generation))
+
+
+    def _get_search_criteria(self):
+        return (self._get_search_code(), self._get_search_name())
 
 
     def _get_search_code(self):
@@ -153,9 +228,51 @@ class _CountriesSearchView(tkinter.LabelFrame, EventHandler):
             new_state = tkinter.DISABLED
 
         self._search_button['state'] = new_state
+
+        if self._search_as_you_type.get():
+            self._schedule_search()
+
         return True
 
 
+    def _on_search_as_you_type_changed(self, *args):
+        if self._search_as_you_type.get():
+            if self._match_mode.get() == MATCH_EXACT:
+                self._match_mode.set(MATCH_PREFIX)
+            else:
+                self._schedule_search()
+        else:
+            self._cancel_pending_search()
+
+
+    def _schedule_search(self):
+        self._cancel_pending_search()
+
+        if any(self._get_search_criteria()):
+            self._pending_search = self.after(
+                _SEARCH_AS_YOU_TYPE_DELAY_MS, self._on_search_delay_elapsed)
+        else:
+            self._search_generation = next(_search_generations)
+            self.initiate_event(CancelSearchEvent(StartCountrySearchEvent.__name__, self._search_generation))
+            self.initiate_event(ClearCountriesSearchListEvent())
+
+
+    def _on_search_delay_elapsed(self):
+        self._pending_search = None
+        self._start_search()
+
+
+    def _cancel_pending_search(self):
+        if self._pending_search is not None:
+            self.after_cancel(self._pending_search)
+            self._pending_search = None
+
+
+    def destroy(self):
+        self._cancel_pending_search()
+        super().destroy()
+
+
     def _on_search_selection_changed(self, event):
         if event.widget.curselection():
             new_state = tkinter.NORMAL
@@ -178,13 +295,32 @@ class _CountriesSearchView(tkinter.LabelFrame, EventHandler):
 
     def on_event(self, event):
         if isinstance(event, ClearCountriesSearchListEvent):
-            self._search_list.delete(0, tkinter.END)
+            self._search_list.clear()
             self._search_country_ids = []
             self._edit_button['state'] = tkinter.DISABLED
-        elif isinstance(event, CountrySearchResultEvent):
-            display_name = f'{event.country().country_code} - {event.country().name}'
-            self._search_list.insert(tkinter.END, display_name)
-            self._search_country_ids.append(event.country().country_id)
+            self._search_continuation = None
+            self._more_button['state'] = tkinter.DISABLED
+        elif isinstance(event, CountrySearchResultsEvent):
+            if event.generation() == self._search_generation:
+                self._search_list.extend(f'{country.country_code} - {country.name}' for country in event.countries())
+                self._search_country_ids.extend(country.country_id for country in event.countries())
+        elif isinstance(event, CountrySearchMoreResultsEvent):
+            if event.generation() == self._search_generation:
+                self._search_continuation = event.continuation()
+                self._more_button['state'] = tkinter.NORMAL
+        elif isinstance(event, SearchCancelledEvent):
+            if event.search() == StartCountrySearchEvent.__name__ and event.generation() == self._search_generation:
+                # While the view is hidden, the reason is kept until it's shown again, so the
+                # user isn't interrupted by a search they can't see.
+                if self.winfo_viewable():
+                    tkinter.messagebox.showerror('Country Search Stopped', event.reason())
+                else:
+                    self._search_stopped_reason = event.reason()
+        elif isinstance(event, ShowEditCountriesViewEvent):
+            if self._search_stopped_reason is not None:
+                reason = self._search_stopped_reason
+                self._search_stopped_reason = None
+                tkinter.messagebox.showerror('Country Search Stopped', reason)
 
 
 
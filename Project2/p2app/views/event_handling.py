@@ -7,12 +7,27 @@
 # (e.g., the events returned from the p2app.engine package, or events that are
 # internal to the user interface).
 #
-# YOU WILL NOT NEED TO MODIFY THIS FILE AT ALL
-
+# Each component subscribes to the event types it handles when it's created, and
+# an event is only delivered to the components subscribed to its type (or one of
+# its base types), so the cost of delivering it depends on how many components
+# care about it, rather than how many components there are.  Deliveries happen in
+# the order a walk of the whole tree of components would make them: on_event is
+# called on a component before its descendants, on_event_post after them (and
+# before its next sibling), and siblings are visited in the order they were
+# created.
+
+import itertools
+import math
 import tkinter
 
 
 
+# Numbers each component as it joins the tree, so that siblings can be put in the
+# order they were created.
+_sequence = itertools.count()
+
+
+
 class EventHandler:
     def initiate_event(self, event):
         widget = self
@@ -27,18 +42,16 @@ class EventHandler:
             widget.initiate_event(event)
 
 
-    def handle_event(self, event):
-        self.on_event(event)
+    def subscribe(self, *event_types):
+        _subscriptions(self).add(self, event_types)
 
-        if isinstance(self, tkinter.Tk) or isinstance(self, tkinter.Widget):
-            for child in self.winfo_children():
-                if not child.winfo_exists():
-                    continue
 
-                if isinstance(child, EventHandler):
-                    child.handle_event(event)
-
-        self.on_event_post(event)
+    def handle_event(self, event):
+        for handler, is_post in _subscriptions(self).visits(event, _path(self)):
+            if is_post:
+                handler.on_event_post(event)
+            else:
+                handler.on_event(event)
 
 
     def on_event(self, event):
@@ -47,3 +60,106 @@ class EventHandler:
 
     def on_event_post(self, event):
         pass
+
+
+
+class _Subscriptions:
+    def __init__(self):
+        self._handlers = {}
+        self._version = 0
+
+
+    def add(self, handler, event_types):
+        _path(handler)
+
+        for event_type in event_types:
+            handlers = self._handlers.setdefault(event_type, [])
+
+            if handler not in handlers:
+                handlers.append(handler)
+
+        self._version += 1
+
+
+    def visits(self, event, within):
+        # Yields (handler, whether it's the visit after its descendants) for the handlers
+        # subscribed to an event that are in the tree at or below the given path, in the
+        # order a walk of the tree would visit them.  Handlers can create new components
+        # that subscribe to the same event while it's being delivered; when that happens,
+        # the rest of the visits are found again, so the new components are included if
+        # a walk of the tree would have reached them.
+        last = None
+
+        while True:
+            version = self._version
+
+            visits = sorted(
+                (_visit_order(handler, is_post), handler, is_post)
+                for handler in self._handlers_of(event)
+                if _path(handler)[:len(within)] == within
+                for is_post in (False, True)
+                if last is None or _visit_order(handler, is_post) > last)
+
+            for order, handler, is_post in visits:
+                if not handler.winfo_exists():
+                    continue
+
+                last = order
+                yield handler, is_post
+
+                if self._version != version:
+                    break
+            else:
+                return
+
+
+    def _handlers_of(self, event):
+        handlers = {}
+
+        for event_type in type(event).__mro__:
+            registered = self._handlers.get(event_type)
+
+            if registered:
+                registered[:] = [handler for handler in registered if handler.winfo_exists()]
+                handlers.update(dict.fromkeys(registered))
+
+        return handlers
+
+
+
+def _subscriptions(handler):
+    root = handler
+
+    while root.master is not None:
+        root = root.master
+
+    if not hasattr(root, '_event_subscriptions'):
+        root._event_subscriptions = _Subscriptions()
+
+    return root._event_subscriptions
+
+
+def _path(widget):
+    # The sequence numbers of a component and all of its ancestors, from the root down,
+    # which is computed once, since components never move to a different parent.
+    # Sorting paths puts components in the order a walk of the tree would visit them.
+    # A component's siblings that don't have numbers yet are numbered along with it, in
+    # the order they were created (which is the order of their parent's children), so
+    # siblings are numbered in that order even when the older ones subscribe later.
+    if not hasattr(widget, '_event_path'):
+        if widget.master is None:
+            widget._event_path = (next(_sequence), )
+        else:
+            parent_path = _path(widget.master)
+
+            for sibling in widget.master.children.values():
+                if not hasattr(sibling, '_event_path'):
+                    sibling._event_path = parent_path + (next(_sequence), )
+
+    return widget._event_path
+
+
+def _visit_order(handler, is_post):
+    # A component's visit after its descendants sorts after all of theirs, but before
+    # its next sibling's.
+    return _path(handler) + (math.inf, ) if is_post else _path(handler)
@@ -3,9 +3,9 @@
 # ICS 33 Winter 2024
 # Project 2: Learning to Fly
 #
-# The outermost shell of the user interface.
-#
-# YOU WILL NOT NEED TO MODIFY THIS FILE AT ALL
+# The outermost shell of the user interface, which switches between the views
+# (keeping each one it has built, hidden, until the database is closed) and shows
+# the progress of imports and exports in the window's title.
 
 import tkinter
 import tkinter.messagebox
@@ -30,10 +30,19 @@ _MISSING_DATABASE_NAME = '[no database open]'
 class MainView(tkinter.Tk, EventHandler):
     def __init__(self, event_bus):
         super().__init__()
+        self.subscribe(
+            ShowEditContinentsViewEvent, ShowEditCountriesViewEvent, ShowEditRegionsViewEvent,
+            DatabaseOpenedEvent, DatabaseClosedEvent, DatabaseOpenFailedEvent, EnableDebugModeEvent,
+            DisableDebugModeEvent, StartRecordingEventsEvent, StopRecordingEventsEvent,
+            BulkImportProgressEvent, BulkImportCompletedEvent, BulkImportFailedEvent,
+            TableExportProgressEvent, TableExportCompletedEvent, TableExportFailedEvent,
+            EndApplicationEvent, ErrorEvent)
         self.geometry(f'{_INITIAL_WINDOW_WIDTH}x{_INITIAL_WINDOW_HEIGHT}')
         self.config(menu = MainMenu(self))
         self._event_bus = event_bus
         self._current_view = None
+        self._views = {}
+        self._database_name = _MISSING_DATABASE_NAME
         self.rowconfigure(0, weight = 1)
         self.columnconfigure(0, weight = 1)
 
@@ -46,31 +55,54 @@ class MainView(tkinter.Tk, EventHandler):
 
 
     def run(self):
-        self._switch_view(EmptyView(self))
+        self._switch_view(EmptyView)
         self._update_database_path(None)
         self.mainloop()
 
 
     def on_event(self, event):
         if isinstance(event, ShowEditContinentsViewEvent):
-            self._switch_view(ContinentsView(self))
+            self._switch_view(ContinentsView)
         elif isinstance(event, ShowEditCountriesViewEvent):
-            self._switch_view(CountriesView(self))
+            self._switch_view(CountriesView)
         elif isinstance(event, ShowEditRegionsViewEvent):
-            self._switch_view(RegionsView(self))
+            self._switch_view(RegionsView)
         elif isinstance(event, DatabaseOpenedEvent):
             self._update_database_path(event.path())
         elif isinstance(event, DatabaseClosedEvent):
             self._update_database_path(None)
-            self._switch_view(EmptyView(self))
+            self._discard_views()
+            self._switch_view(EmptyView)
         elif isinstance(event, DatabaseOpenFailedEvent):
             self._update_database_path(None)
-            self._switch_view(EmptyView(self))
+            self._discard_views()
+            self._switch_view(EmptyView)
             tkinter.messagebox.showerror('Could Not Open Database', event.reason())
         elif isinstance(event, EnableDebugModeEvent):
             self._event_bus.enable_debug_mode()
         elif isinstance(event, DisableDebugModeEvent):
             self._event_bus.disable_debug_mode()
+        elif isinstance(event, StartRecordingEventsEvent):
+            try:
+                self._event_bus.start_recording(event.path())
+            except OSError as e:
+                tkinter.messagebox.showerror('Could Not Record Events', str(e))
+        elif isinstance(event, StopRecordingEventsEvent):
+            self._event_bus.stop_recording()
+        elif isinstance(event, BulkImportProgressEvent):
+            self.title(
+                f'{_PROJECT_NAME} - {self._database_name} - '
+                f'importing {event.table()}: {event.rows_read():,} rows read')
+            self.update_idletasks()
+        elif isinstance(event, BulkImportCompletedEvent) or isinstance(event, BulkImportFailedEvent):
+            self.title(f'{_PROJECT_NAME} - {self._database_name}')
+        elif isinstance(event, TableExportProgressEvent):
+            self.title(
+                f'{_PROJECT_NAME} - {self._database_name} - '
+                f'exporting {event.table()}: {event.rows_written():,} rows written')
+            self.update_idletasks()
+        elif isinstance(event, TableExportCompletedEvent) or isinstance(event, TableExportFailedEvent):
+            self.title(f'{_PROJECT_NAME} - {self._database_name}')
 
 
     def on_event_post(self, event):
@@ -80,12 +112,36 @@ class MainView(tkinter.Tk, EventHandler):
             tkinter.messagebox.showerror('Error', event.message())
 
 
-    def _switch_view(self, view):
-        if self._current_view:
-            self._current_view.destroy()
+    def _switch_view(self, view_type):
+        # Views are built the first time they're shown, then hidden rather than destroyed
+        # when another view is shown, so switching back to one is quick and leaves its
+        # searches and edits as they were.  There are only a few kinds of views, so they're
+        # kept until the database is closed.
+        view = self._views.get(view_type)
+
+        if view is None:
+            view = view_type(self)
+            self._views[view_type] = view
+
+        if view is not self._current_view:
+            if self._current_view:
+                # Focus would otherwise stay on a widget in the hidden view, which would
+                # go on receiving keystrokes.
+                self.focus_set()
+                self._current_view.grid_remove()
+
+            self._current_view = view
+            self._current_view.grid(row = 0, column = 0, sticky = tkinter.NSEW, padx = 5, pady = 5)
 
-        self._current_view = view
-        self._current_view.grid(row = 0, column = 0, sticky = tkinter.NSEW, padx = 5, pady = 5)
+
+    def _discard_views(self):
+        # The views show what was in a database that's no longer open, so they're
+        # built again the next time they're shown.
+        for view in self._views.values():
+            view.destroy()
+
+        self._views = {}
+        self._current_view = None
 
 
     def _update_database_path(self, path):
@@ -94,4 +150,5 @@ class MainView(tkinter.Tk, EventHandler):
         else:
             visible_name = _MISSING_DATABASE_NAME
 
+        self._database_name = visible_name
         self.title(f'{_PROJECT_NAME} - {visible_name}')
@@ -3,19 +3,32 @@
 # ICS 33 Winter 2024
 # Project 2: Learning to Fly
 #
-# An implementation of the application's menus.
-#
-# YOU WILL NOT NEED TO MODIFY THIS FILE AT ALL
+# An implementation of the application's menus.  Besides opening and closing the
+# database, they offer its maintenance (indexes, full-text search, the runway
+# summary, navaid proximity), bulk imports and table exports, and the debugging
+# reports; the Edit and Database menus only exist while a database is open.
 
 import tkinter
 import tkinter.filedialog
+import tkinter.messagebox
+import tkinter.simpledialog
 from p2app.events import *
 from .events import *
 from .event_handling import EventHandler
+from .reports import ReportWindow
 
 
 
 _OPEN_DATABASE_DIALOG_TITLE = 'Open Database'
+_IMPORT_DIALOG_TITLE = 'Import OurAirports File'
+_IMPORT_FILE_TYPES = [('OurAirports files', '*.csv *.jsonl'), ('All files', '*')]
+_EXPORT_DIALOG_TITLE = 'Export Table'
+_EXPORT_FILE_TYPES = [
+    ('CSV files', '*.csv *.csv.gz'), ('JSONL files', '*.jsonl *.jsonl.gz'), ('All files', '*')
+]
+_DEFAULT_NAVAID_RADIUS_KM = 50.0
+_TIMING_FILE_TYPES = [('CSV files', '*.csv'), ('All files', '*')]
+_RECORDING_FILE_TYPES = [('Event logs', '*.jsonl'), ('All files', '*')]
 
 
 
@@ -28,23 +41,40 @@ class BaseMenu(tkinter.Menu, EventHandler):
 class MainMenu(BaseMenu):
     def __init__(self, parent):
         super().__init__(parent)
+        self.subscribe(DatabaseOpenedEvent, DatabaseClosedEvent)
         self.add_cascade(label = 'File', menu = FileMenu(self))
         self.add_cascade(label = 'Debug', menu = DebugMenu(self))
+        self._edit_menu = None
+        self._database_menu = None
 
 
     def on_event(self, event):
         if isinstance(event, DatabaseOpenedEvent):
-            self.insert_cascade(index = 1, label = 'Edit', menu = EditMenu(self))
+            self._edit_menu = EditMenu(self)
+            self._database_menu = DatabaseMenu(self)
+            self.insert_cascade(index = 1, label = 'Edit', menu = self._edit_menu)
+            self.insert_cascade(index = 2, label = 'Database', menu = self._database_menu)
         elif isinstance(event, DatabaseClosedEvent):
             self.delete('Edit')
+            self.delete('Database')
+
+            # Deleting the entries leaves the menus themselves alive, and still subscribed
+            # to the events they handle, so they're destroyed as well.
+            self._edit_menu.destroy()
+            self._database_menu.destroy()
+            self._edit_menu = None
+            self._database_menu = None
 
 
 
 class FileMenu(BaseMenu):
     def __init__(self, parent):
         super().__init__(parent)
+        self.subscribe(DatabaseOpenedEvent, DatabaseClosedEvent)
+        self._profile_name = tkinter.StringVar(self, CONNECTION_PROFILE_NAMES[0])
         self.add_command(label = 'Open', state = tkinter.NORMAL, command = self._on_open)
         self.add_command(label = 'Close', state = tkinter.DISABLED, command = self._on_close)
+        self.add_cascade(label = 'Connection Profile', menu = ProfileMenu(self, self._profile_name))
         self.add_command(label = 'Exit', command = self._on_exit)
 
 
@@ -54,7 +84,7 @@ class FileMenu(BaseMenu):
             initialdir = Path.cwd())
 
         if open_path:
-            self.initiate_event(OpenDatabaseEvent(Path(open_path)))
+            self.initiate_event(OpenDatabaseEvent(Path(open_path), self._profile_name.get()))
 
 
     def _on_close(self):
@@ -69,9 +99,20 @@ class FileMenu(BaseMenu):
         if isinstance(event, DatabaseOpenedEvent):
             self.entryconfig('Open', state = tkinter.DISABLED)
             self.entryconfig('Close', state = tkinter.NORMAL)
+            self.entryconfig('Connection Profile', state = tkinter.DISABLED)
         elif isinstance(event, DatabaseClosedEvent):
             self.entryconfig('Open', state = tkinter.NORMAL)
             self.entryconfig('Close', state = tkinter.DISABLED)
+            self.entryconfig('Connection Profile', state = tkinter.NORMAL)
+
+
+
+class ProfileMenu(BaseMenu):
+    def __init__(self, parent, profile_name):
+        super().__init__(parent)
+
+        for name in CONNECTION_PROFILE_NAMES:
+            self.add_radiobutton(label = name.capitalize(), variable = profile_name, value = name)
 
 
 
@@ -96,9 +137,172 @@ class EditMenu(BaseMenu):
 
 
 
+class DatabaseMenu(BaseMenu):
+    def __init__(self, parent):
+        super().__init__(parent)
+        self.subscribe(
+            BulkImportCompletedEvent, BulkImportFailedEvent, IndexesCreatedEvent,
+            IndexesDroppedEvent, FullTextIndexBuiltEvent, FullTextIndexDroppedEvent,
+            RunwaySummaryRebuiltEvent, NavaidProximityBuiltEvent, NavaidProximityFailedEvent,
+            TableExportCompletedEvent, TableExportFailedEvent, DatabaseAnalyzedEvent,
+            IndexesListedEvent, SearchesExplainedEvent)
+        self.add_command(label = 'Create Indexes', command = self._on_create_indexes)
+        self.add_command(label = 'Drop Indexes', command = self._on_drop_indexes)
+        self.add_command(label = 'List Indexes', command = self._on_list_indexes)
+        self.add_command(label = 'Explain Searches', command = self._on_explain_searches)
+        self.add_command(label = 'Analyze', command = self._on_analyze)
+        self.add_separator()
+        self.add_command(label = 'Build Full-Text Index', command = self._on_build_full_text_index)
+        self.add_command(label = 'Drop Full-Text Index', command = self._on_drop_full_text_index)
+        self.add_command(label = 'Rebuild Runway Summary', command = self._on_rebuild_runway_summary)
+        self.add_command(label = 'Build Navaid Proximity...', command = self._on_build_navaid_proximity)
+        self.add_separator()
+
+        for table in BULK_IMPORT_TABLES:
+            self.add_command(
+                label = f'Import {table.capitalize()} File...',
+                command = lambda table = table: self._on_import(table))
+
+        self.add_cascade(label = 'Export Table', menu = ExportMenu(self))
+
+
+    def _on_create_indexes(self):
+        self.initiate_event(CreateIndexesEvent())
+
+
+    def _on_drop_indexes(self):
+        self.initiate_event(DropIndexesEvent())
+
+
+    def _on_list_indexes(self):
+        self.initiate_event(ListIndexesEvent())
+
+
+    def _on_explain_searches(self):
+        self.initiate_event(ExplainSearchesEvent())
+
+
+    def _on_analyze(self):
+        self.initiate_event(AnalyzeDatabaseEvent())
+
+
+    def _on_build_full_text_index(self):
+        self.initiate_event(BuildFullTextIndexEvent())
+
+
+    def _on_drop_full_text_index(self):
+        self.initiate_event(DropFullTextIndexEvent())
+
+
+    def _on_rebuild_runway_summary(self):
+        self.initiate_event(RebuildRunwaySummaryEvent())
+
+
+    def _on_build_navaid_proximity(self):
+        radius_km = tkinter.simpledialog.askfloat(
+            'Build Navaid Proximity', 'Find navaids within this many km of each airport:',
+            parent = self, initialvalue = _DEFAULT_NAVAID_RADIUS_KM, minvalue = 0.1)
+
+        if radius_km is not None:
+            self.initiate_event(BuildNavaidProximityEvent(radius_km))
+
+
+    def _on_import(self, table):
+        import_path = tkinter.filedialog.askopenfilename(
+            title = _IMPORT_DIALOG_TITLE,
+            initialdir = Path.cwd(),
+            filetypes = _IMPORT_FILE_TYPES)
+
+        if import_path:
+            self.initiate_event(StartBulkImportEvent(table, Path(import_path)))
+
+
+    def on_event(self, event):
+        if isinstance(event, BulkImportCompletedEvent):
+            summary = f'{event.rows_inserted():,} {event.table()} rows imported, {len(event.failures()):,} failed'
+
+            if event.failures():
+                lines = [summary, '']
+                lines.extend(f'line {failure.line_number}: {failure.reason}' for failure in event.failures())
+                ReportWindow(self, 'Import Complete', lines)
+            else:
+                tkinter.messagebox.showinfo('Import Complete', summary)
+        elif isinstance(event, BulkImportFailedEvent):
+            tkinter.messagebox.showerror('Import Failed', event.reason())
+        elif isinstance(event, IndexesCreatedEvent):
+            names = '\n'.join(event.names()) if event.names() else '(all indexes already existed)'
+            tkinter.messagebox.showinfo('Indexes Created', names)
+        elif isinstance(event, IndexesDroppedEvent):
+            names = '\n'.join(event.names()) if event.names() else '(no indexes to drop)'
+            tkinter.messagebox.showinfo('Indexes Dropped', names)
+        elif isinstance(event, FullTextIndexBuiltEvent):
+            tables = '\n'.join(event.tables()) if event.tables() else '(all tables were already indexed)'
+            tkinter.messagebox.showinfo('Full-Text Index Built', tables)
+        elif isinstance(event, FullTextIndexDroppedEvent):
+            tables = '\n'.join(event.tables()) if event.tables() else '(no full-text index to drop)'
+            tkinter.messagebox.showinfo('Full-Text Index Dropped', tables)
+        elif isinstance(event, RunwaySummaryRebuiltEvent):
+            tkinter.messagebox.showinfo(
+                'Runway Summary Rebuilt', f'{event.airport_count():,} airports with runways summarized')
+        elif isinstance(event, NavaidProximityBuiltEvent):
+            tkinter.messagebox.showinfo(
+                'Navaid Proximity Built',
+                f'{event.pair_count():,} airport and navaid pairs within {event.radius_km():g} km')
+        elif isinstance(event, NavaidProximityFailedEvent):
+            tkinter.messagebox.showerror('Navaid Proximity', event.reason())
+        elif isinstance(event, TableExportCompletedEvent):
+            tkinter.messagebox.showinfo(
+                'Export Complete', f'{event.rows_written():,} {event.table()} rows written to {event.path()}')
+        elif isinstance(event, TableExportFailedEvent):
+            tkinter.messagebox.showerror('Export Failed', event.reason())
+        elif isinstance(event, DatabaseAnalyzedEvent):
+            tkinter.messagebox.showinfo('Analyze', 'Table and index statistics have been gathered.')
+        elif isinstance(event, IndexesListedEvent):
+            lines = [
+                f'{"present" if index.exists else "missing":8} {index.name} ON {index.table} ({", ".join(index.columns)})'
+                for index in event.indexes()
+            ]
+            ReportWindow(self, 'Indexes', lines)
+        elif isinstance(event, SearchesExplainedEvent):
+            lines = []
+
+            for plan in event.plans():
+                lines.append(f'{"FULL SCAN" if plan.is_full_scan else "indexed"}: {plan.search}')
+                lines.append(f'    {plan.statement}')
+                lines.extend(f'    -> {detail}' for detail in plan.plan)
+                lines.append('')
+
+            ReportWindow(self, 'Search Plans', lines)
+
+
+
+class ExportMenu(BaseMenu):
+    def __init__(self, parent):
+        super().__init__(parent)
+
+        for table in EXPORT_TABLES:
+            self.add_command(label = f'{table}...', command = lambda table = table: self._on_export(table))
+
+
+    def _on_export(self, table):
+        export_path = tkinter.filedialog.asksaveasfilename(
+            title = _EXPORT_DIALOG_TITLE,
+            initialdir = Path.cwd(),
+            initialfile = f'{table}.csv',
+            filetypes = _EXPORT_FILE_TYPES)
+
+        if export_path:
+            self.initiate_event(StartTableExportEvent(table, Path(export_path)))
+
+
+
 class DebugMenu(BaseMenu):
     def __init__(self, parent):
         super().__init__(parent)
+        self.subscribe(
+            CacheStatisticsEvent, ConnectionPoolStatisticsEvent, TimingStatisticsEvent,
+            TimingStatisticsResetEvent, TimingStatisticsDumpedEvent, DatabaseProfileAppliedEvent,
+            DatabaseClosedEvent)
 
         self._is_debug_mode = tkinter.IntVar(self, 0)
 
@@ -106,9 +310,122 @@ class DebugMenu(BaseMenu):
             label = 'Show Events', variable = self._is_debug_mode,
             command = self._on_change_show_events)
 
+        self._database_settings = None
+
+        self.add_command(
+            label = 'Show Database Settings', state = tkinter.DISABLED,
+            command = self._on_show_database_settings)
+
+        self.add_command(label = 'Show Cache Statistics', command = self._on_show_cache_statistics)
+        self.add_command(label = 'Show Connection Pool', command = self._on_show_connection_pool)
+        self.add_separator()
+        self.add_command(label = 'Show Timing Statistics', command = self._on_show_timing_statistics)
+        self.add_command(label = 'Reset Timing Statistics', command = self._on_reset_timing_statistics)
+        self.add_command(label = 'Dump Timing Statistics...', command = self._on_dump_timing_statistics)
+        self.add_separator()
+        self.add_command(label = 'Record Events...', command = self._on_record_events)
+
+        self.add_command(
+            label = 'Stop Recording Events', state = tkinter.DISABLED,
+            command = self._on_stop_recording_events)
+
 
     def _on_change_show_events(self):
         if self._is_debug_mode.get():
             self.initiate_event(EnableDebugModeEvent())
         else:
             self.initiate_event(DisableDebugModeEvent())
+
+
+    def _on_show_database_settings(self):
+        profile_name, settings = self._database_settings
+        lines = [f'Connection profile: {profile_name}', '']
+        lines.extend(f'{pragma} = {value}' for pragma, value in settings.items())
+        tkinter.messagebox.showinfo('Database Settings', '\n'.join(lines))
+
+
+    def _on_show_cache_statistics(self):
+        self.initiate_event(GetCacheStatisticsEvent())
+
+
+    def _on_show_connection_pool(self):
+        self.initiate_event(GetConnectionPoolStatisticsEvent())
+
+
+    def _on_show_timing_statistics(self):
+        self.initiate_event(GetTimingStatisticsEvent())
+
+
+    def _on_reset_timing_statistics(self):
+        self.initiate_event(ResetTimingStatisticsEvent())
+
+
+    def _on_dump_timing_statistics(self):
+        dump_path = tkinter.filedialog.asksaveasfilename(
+            title = 'Dump Timing Statistics',
+            initialdir = Path.cwd(),
+            initialfile = 'timing.csv',
+            filetypes = _TIMING_FILE_TYPES)
+
+        if dump_path:
+            self.initiate_event(DumpTimingStatisticsEvent(Path(dump_path)))
+
+
+    def _on_record_events(self):
+        recording_path = tkinter.filedialog.asksaveasfilename(
+            title = 'Record Events',
+            initialdir = Path.cwd(),
+            initialfile = 'session.jsonl',
+            filetypes = _RECORDING_FILE_TYPES)
+
+        if recording_path:
+            self.initiate_event(StartRecordingEventsEvent(Path(recording_path)))
+            self.entryconfig('Record Events...', state = tkinter.DISABLED)
+            self.entryconfig('Stop Recording Events', state = tkinter.NORMAL)
+
+
+    def _on_stop_recording_events(self):
+        self.initiate_event(StopRecordingEventsEvent())
+        self.entryconfig('Record Events...', state = tkinter.NORMAL)
+        self.entryconfig('Stop Recording Events', state = tkinter.DISABLED)
+
+
+    def on_event(self, event):
+        if isinstance(event, CacheStatisticsEvent):
+            statistics = event.statistics()
+            lookups = statistics.hits + statistics.misses
+            hit_rate = f'{statistics.hits / lookups:.1%}' if lookups else 'n/a'
+
+            tkinter.messagebox.showinfo(
+                'Cache Statistics',
+                f'Hits: {statistics.hits:,}\nMisses: {statistics.misses:,}\nHit rate: {hit_rate}\n'
+                f'Cached entities: {statistics.size:,} of {statistics.capacity:,}')
+        elif isinstance(event, ConnectionPoolStatisticsEvent):
+            statistics = event.statistics()
+
+            tkinter.messagebox.showinfo(
+                'Connection Pool',
+                f'Read connections: {statistics.size:,}\nIn use: {statistics.in_use:,} '
+                f'(at most {statistics.peak_in_use:,} at once)\nBorrowed: {statistics.acquisitions:,} times\n'
+                f'Waited for one: {statistics.waits:,} times, {statistics.wait_seconds:.3f} s in all')
+        elif isinstance(event, TimingStatisticsEvent):
+            lines = [f'{"kind":9} {"count":>8} {"total ms":>10} {"p50 ms":>8} {"p95 ms":>8} {"p99 ms":>8} {"rows":>10}  name']
+
+            lines.extend(
+                f'{statistic.kind:9} {statistic.count:8,} {statistic.total_seconds * 1000:10.1f} '
+                f'{statistic.p50_seconds * 1000:8.2f} {statistic.p95_seconds * 1000:8.2f} '
+                f'{statistic.p99_seconds * 1000:8.2f} {statistic.rows:10,}  {statistic.name}'
+                for statistic in event.statistics())
+
+            ReportWindow(self, 'Timing Statistics', lines)
+        elif isinstance(event, TimingStatisticsResetEvent):
+            tkinter.messagebox.showinfo('Timing Statistics Reset', 'Timing statistics have been reset.')
+        elif isinstance(event, TimingStatisticsDumpedEvent):
+            tkinter.messagebox.showinfo(
+                'Timing Statistics Dumped', f'{event.count():,} timing statistics written to {event.path()}')
+        elif isinstance(event, DatabaseProfileAppliedEvent):
+            self._database_settings = (event.profile_name(), event.settings())
+            self.entryconfig('Show Database Settings', state = tkinter.NORMAL)
+        elif isinstance(event, DatabaseClosedEvent):
+            self._database_settings = None
+            self.entryconfig('Show Database Settings', state = tkinter.DISABLED)
@@ -0,0 +1,42 @@
+# p2app/views/reports.py
+#
+# ICS 33 Winter 2024
+# Project 2: Learning to Fly
+#
+# A small window that displays a read-only, multi-line report, for engine
+# results that are too long to fit comfortably in a message box.
+
+import tkinter
+
+
+
+_REPORT_WIDTH = 100
+_REPORT_HEIGHT = 30
+
+
+
+class ReportWindow(tkinter.Toplevel):
+    def __init__(self, parent, title, lines):
+        super().__init__(parent)
+        self.title(title)
+
+        scrollbar = tkinter.Scrollbar(self, orient = tkinter.VERTICAL)
+        scrollbar.grid(row = 0, column = 1, sticky = tkinter.NS)
+
+        text = tkinter.Text(
+            self, width = _REPORT_WIDTH, height = _REPORT_HEIGHT, wrap = tkinter.NONE,
+            yscrollcommand = scrollbar.set)
+
+        text.insert(tkinter.END, '\n'.join(lines))
+        text['state'] = tkinter.DISABLED
+        text.grid(row = 0, column = 0, sticky = tkinter.NSEW)
+
+        scrollbar['command'] = text.yview
+
+        close_button = tkinter.Button(self, text = 'Close', command = self.destroy)
+        close_button.grid(row = 1, column = 0, columnspan = 2, padx = 5, pady = 5, sticky = tkinter.E)
+
+        self.rowconfigure(0, weight = 1)
+        self.rowconfigure(1, weight = 0)
+        self.columnconfigure(0, weight = 1)
+        self.columnconfigure(1, weight = 0)
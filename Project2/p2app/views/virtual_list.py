@@ -0,0 +1,159 @@
+# p2app/views/virtual_list.py
+#
+# ICS 33 Winter 2024
+# Project 2: Learning to Fly
+#
+# A list of items that can grow to many thousands of lines without slowing down
+# the user interface.  Only the lines that fit in the window are ever inserted
+# into the underlying Listbox; scrolling replaces them with the lines that come
+# into view.  Like a Listbox, it generates <<ListboxSelect>> when the user
+# changes the selection, and curselection() returns the selected line's index
+# among all the items, not just the visible ones.
+
+import tkinter
+import tkinter.font
+
+
+
+class VirtualListbox(tkinter.Frame):
+    def __init__(self, parent, height):
+        super().__init__(parent)
+
+        self._items = []
+        self._top = 0
+        self._visible_count = height
+        self._selected = None
+
+        self._listbox = tkinter.Listbox(
+            self, height = height, activestyle = tkinter.NONE, selectmode = tkinter.SINGLE,
+            exportselection = False)
+
+        self._listbox.grid(row = 0, column = 0, sticky = tkinter.NSEW)
+
+        self._scrollbar = tkinter.Scrollbar(
+            self, orient = tkinter.VERTICAL, command = self._on_scrollbar)
+
+        self._scrollbar.grid(row = 0, column = 1, sticky = tkinter.NS)
+
+        self._listbox.bind('<<ListboxSelect>>', self._on_listbox_select)
+        self._listbox.bind('<Configure>', self._on_configure)
+        self._listbox.bind('<MouseWheel>', self._on_mouse_wheel)
+        self._listbox.bind('<Button-4>', lambda event: self._scroll_by(-3))
+        self._listbox.bind('<Button-5>', lambda event: self._scroll_by(3))
+        self._listbox.bind('<Up>', lambda event: self._move_selection(-1))
+        self._listbox.bind('<Down>', lambda event: self._move_selection(1))
+        self._listbox.bind('<Prior>', lambda event: self._move_selection(-self._visible_count))
+        self._listbox.bind('<Next>', lambda event: self._move_selection(self._visible_count))
+
+        self.rowconfigure(0, weight = 1)
+        self.columnconfigure(0, weight = 1)
+
+        self._update_scrollbar()
+
+
+    def clear(self):
+        self._items = []
+        self._top = 0
+        self._selected = None
+        self._listbox.delete(0, tkinter.END)
+        self._update_scrollbar()
+
+
+    def extend(self, items):
+        first_new = len(self._items)
+        self._items.extend(items)
+
+        if first_new < self._top + self._visible_count:
+            self._render()
+
+        self._update_scrollbar()
+
+
+    def curselection(self):
+        return () if self._selected is None else (self._selected, )
+
+
+    def size(self):
+        return len(self._items)
+
+
+    def _render(self):
+        self._listbox.delete(0, tkinter.END)
+        self._listbox.insert(tkinter.END, *self._items[self._top:self._top + self._visible_count])
+
+        if self._selected is not None and self._top <= self._selected < self._top + self._visible_count:
+            self._listbox.selection_set(self._selected - self._top)
+
+
+    def _update_scrollbar(self):
+        if len(self._items) == 0:
+            self._scrollbar.set(0.0, 1.0)
+        else:
+            first = self._top / len(self._items)
+            last = min(len(self._items), self._top + self._visible_count) / len(self._items)
+            self._scrollbar.set(first, last)
+
+
+    def _scroll_to(self, top):
+        top = self._clamp_top(top)
+
+        if top != self._top:
+            self._top = top
+            self._render()
+            self._update_scrollbar()
+
+
+    def _scroll_by(self, lines):
+        self._scroll_to(self._top + lines)
+
+
+    def _on_scrollbar(self, action, amount, unit = None):
+        if action == tkinter.MOVETO:
+            self._scroll_to(round(float(amount) * len(self._items)))
+        elif unit == tkinter.PAGES:
+            self._scroll_by(int(amount) * self._visible_count)
+        else:
+            self._scroll_by(int(amount))
+
+
+    def _on_mouse_wheel(self, event):
+        self._scroll_by(-3 if event.delta > 0 else 3)
+
+
+    def _on_configure(self, event):
+        line_height = tkinter.font.Font(font = self._listbox['font']).metrics('linespace')
+        line_height += 2 * int(self._listbox['selectborderwidth'])
+        border = 2 * (int(self._listbox['borderwidth']) + int(self._listbox['highlightthickness']))
+        visible_count = max(1, (event.height - border) // line_height + 1)
+
+        if visible_count != self._visible_count:
+            self._visible_count = visible_count
+            self._top = self._clamp_top(self._top)
+            self._render()
+            self._update_scrollbar()
+
+
+    def _on_listbox_select(self, event):
+        selection = self._listbox.curselection()
+        self._selected = self._top + selection[0] if selection else None
+        self.event_generate('<<ListboxSelect>>')
+
+
+    def _move_selection(self, lines):
+        if len(self._items) > 0:
+            current = self._selected if self._selected is not None else self._top - 1
+            self._selected = max(0, min(current + lines, len(self._items) - 1))
+
+            top = min(self._top, self._selected)
+            self._top = self._clamp_top(max(top, self._selected - self._visible_count + 2))
+            self._render()
+            self._update_scrollbar()
+            self.event_generate('<<ListboxSelect>>')
+
+        return 'break'
+
+
+    def _clamp_top(self, top):
+        # The last visible line is usually only partly visible, so the list can scroll
+        # one line further than it otherwise would, bringing the last item fully into view.
+        return max(0, min(top, len(self._items) - self._visible_count + 1))
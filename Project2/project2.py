@@ -19,6 +19,7 @@ def main():
 
     event_bus.register_engine(engine)
     event_bus.register_view(main_view)
+    event_bus.enable_worker_mode()
 
     main_view.run()
 
@@ -0,0 +1,46 @@
+# tests/conftest.py
+#
+# ICS 33 Winter 2024
+# Project 2: Learning to Fly
+#
+# Fixtures shared by the tests: an engine attached to a small in-memory database
+# built from schema.sql (see benchmarks/_support.py), and the same sample data in
+# a database file, for the tests that need more than one connection to it.
+#
+#     python -m pytest tests
+
+import sqlite3
+import pytest
+from p2app.engine import Engine
+from benchmarks._support import attach_database, make_memory_database
+
+
+@pytest.fixture
+def database():
+    """An in-memory database with the project's schema and some sample rows."""
+    connection = make_memory_database(countries = 20, regions = 200, airports = 500)
+    yield connection
+    connection.close()
+
+
+@pytest.fixture
+def database_path(tmp_path):
+    """The path of a database file holding the same sample rows as the in-memory database."""
+    path = tmp_path / 'sample.db'
+    sample = make_memory_database(countries = 20, regions = 200, airports = 500)
+    connection = sqlite3.connect(path)
+    sample.backup(connection)
+    connection.close()
+    sample.close()
+    return path
+
+
+@pytest.fixture
+def engine(database):
+    """An engine whose open database is the in-memory sample database."""
+    return attach_database(Engine(), database)
+
+
+def process(engine: Engine, event) -> list:
+    """Returns every event the engine yields in response to the given one."""
+    return list(engine.process_event(event))
@@ -0,0 +1,119 @@
+# tests/test_bulk_import.py
+#
+# ICS 33 Winter 2024
+# Project 2: Learning to Fly
+#
+# Checks that a bulk import inserts the rows it can, reports each row it can't
+# (with its line number and the reason), and fails cleanly on unreadable files.
+
+import json
+from p2app.events import *
+from tests.conftest import process
+
+
+
+_REGION_HEADER = 'id,code,local_code,name,continent,iso_country,wikipedia_link,keywords\n'
+
+
+def region_count(database) -> int:
+    return database.execute('SELECT COUNT(*) FROM region;').fetchone()[0]
+
+
+def test_csv_import_reports_each_failed_row_and_inserts_the_rest(engine, database, tmp_path):
+    path = tmp_path / 'regions.csv'
+    path.write_text(
+        _REGION_HEADER +
+        '1,NEW-1,1,New Region 1,AF,C001,,\n' +        # line 2: fine
+        '2,NEW-2,2,,AF,C001,,\n' +                     # line 3: missing name
+        '3,NEW-3,3,New Region 3,XX,C001,,\n' +         # line 4: unknown continent
+        '4,NEW-4,4,New Region 4,AF,ZZZ,,\n' +          # line 5: unknown country
+        '5,C002-1,5,New Region 5,AF,C001,,\n' +        # line 6: duplicates a sample region
+        '6,NEW-1,6,New Region 6,AF,C001,,\n' +         # line 7: duplicates line 2
+        '7,NEW-7,7,New Region 7,EU,C002,,"a, b"\n',    # line 8: fine
+        encoding = 'utf-8')
+
+    before = region_count(database)
+    results = process(engine, StartBulkImportEvent('region', path))
+    completed = results[-1]
+
+    assert isinstance(completed, BulkImportCompletedEvent)
+    assert completed.rows_inserted() == 2
+    assert [failure.line_number for failure in completed.failures()] == [3, 4, 5, 6, 7]
+    assert completed.failures()[0].reason == 'Missing name'
+    assert 'continent' in completed.failures()[1].reason
+    assert 'country' in completed.failures()[2].reason
+    assert completed.failures()[3].reason == 'Duplicate region_code Not Allowed'
+    assert completed.failures()[4].reason == 'Duplicate region_code Not Allowed'
+    assert region_count(database) == before + 2
+
+    keywords = database.execute("SELECT keywords FROM region WHERE region_code = 'NEW-7';").fetchone()[0]
+    assert keywords == 'a, b'
+
+
+def test_jsonl_import_reports_failures_in_line_order(engine, database, tmp_path):
+    path = tmp_path / 'continents.jsonl'
+    records = [
+        {'code': 'ZA', 'name': 'Zealandia'},
+        {'code': 'EU', 'name': 'Europe Again'},     # line 2: duplicates a sample continent
+        {'code': 'ZB'}                              # line 3: missing name
+    ]
+
+    path.write_text(''.join(json.dumps(record) + '\n' for record in records), encoding = 'utf-8')
+
+    completed = process(engine, StartBulkImportEvent('continent', path))[-1]
+
+    assert isinstance(completed, BulkImportCompletedEvent)
+    assert completed.rows_inserted() == 1
+    assert [failure.line_number for failure in completed.failures()] == [2, 3]
+
+
+def test_jsonl_lines_that_are_not_objects_are_reported_as_failures(engine, database, tmp_path):
+    path = tmp_path / 'continents.jsonl'
+    lines = [
+        {'code': 'ZA', 'name': 'Zealandia'},
+        [1, 2],                                     # line 2
+        'x',                                        # line 3
+        3,                                          # line 4
+        None,                                       # line 5
+        {'code': 'ZB', 'name': 'Zealandia Again'}
+    ]
+
+    path.write_text(''.join(json.dumps(line) + '\n' for line in lines), encoding = 'utf-8')
+
+    completed = process(engine, StartBulkImportEvent('continent', path))[-1]
+
+    assert isinstance(completed, BulkImportCompletedEvent)
+    assert completed.rows_inserted() == 2
+    assert [failure.line_number for failure in completed.failures()] == [2, 3, 4, 5]
+    assert all(failure.reason == 'Not a JSON object' for failure in completed.failures())
+
+
+def test_imported_continents_can_be_referred_to_right_away(engine, tmp_path):
+    continents = tmp_path / 'continents.csv'
+    continents.write_text('id,code,name\n1,ZA,Zealandia\n', encoding = 'utf-8')
+    countries = tmp_path / 'countries.csv'
+    countries.write_text('id,code,name,continent\n1,ZQ,Zealandia Country,ZA\n', encoding = 'utf-8')
+
+    process(engine, StartBulkImportEvent('continent', continents))
+    completed = process(engine, StartBulkImportEvent('country', countries))[-1]
+
+    assert completed.rows_inserted() == 1
+    assert completed.failures() == []
+
+
+def test_unreadable_file_fails_the_import(engine, tmp_path):
+    path = tmp_path / 'continents.jsonl'
+    path.write_text('{"code": "ZA", "name": "Zealandia"}\n{not json\n', encoding = 'utf-8')
+
+    results = process(engine, StartBulkImportEvent('continent', path))
+
+    assert isinstance(results[-1], BulkImportFailedEvent)
+    assert 'after 1 rows' in results[-1].reason()
+
+
+def test_missing_file_and_unknown_table_fail_the_import(engine, tmp_path):
+    missing = process(engine, StartBulkImportEvent('region', tmp_path / 'missing.csv'))
+    unknown = process(engine, StartBulkImportEvent('airport', tmp_path / 'missing.csv'))
+
+    assert isinstance(missing[-1], BulkImportFailedEvent)
+    assert isinstance(unknown[-1], BulkImportFailedEvent)
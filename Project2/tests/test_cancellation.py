@@ -0,0 +1,217 @@
+# tests/test_cancellation.py
+#
+# ICS 33 Winter 2024
+# Project 2: Learning to Fly
+#
+# Checks that cancelling a kind of search stops only the earlier searches of that
+# kind, whether they're in progress or still waiting to start, that searches are
+# stopped once they run past their time budget, and that neither leaves anything
+# behind that affects the searches that follow.
+
+import sqlite3
+import threading
+import time
+import pytest
+from p2app.engine import Engine
+from p2app.engine.cancellation import RunningSearches
+from p2app.events import *
+from p2app.events.event_bus import EventBus
+from benchmarks._support import attach_database, make_memory_database
+from tests.conftest import process
+
+
+
+# A statement that keeps SQLite busy for far longer than any test should take.
+_SLOW_STATEMENT = \
+    'WITH RECURSIVE counter(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM counter WHERE x < 1000000000) ' \
+    'SELECT SUM(x) FROM counter;'
+
+
+def slow_search(connection, event):
+    connection.execute(_SLOW_STATEMENT).fetchone()
+    yield ErrorEvent('The slow search finished')
+
+
+def region_search(generation: int | None = None):
+    return StartRegionSearchEvent(None, None, 'x', generation = generation)
+
+
+def country_search(generation: int | None = None):
+    return StartCountrySearchEvent(None, 'x', generation = generation)
+
+
+class _SearchThread(threading.Thread):
+    """Runs a search through a RunningSearches on its own thread and connection."""
+
+    def __init__(self, searches: RunningSearches, event, handler = slow_search, budget_seconds = None):
+        super().__init__(daemon = True)
+        self._searches = searches
+        self._event = event
+        self._handler = handler
+        self._budget_seconds = budget_seconds
+        self.connection = sqlite3.connect(':memory:', check_same_thread = False)
+        self.results = None
+
+    def run(self):
+        self.results = list(self._searches.run(self._handler, self.connection, self._event, self._budget_seconds))
+
+
+def start_searches(searches: RunningSearches, *events) -> list[_SearchThread]:
+    """Starts a search for each event, returning once they're all in progress."""
+    threads = [_SearchThread(searches, event) for event in events]
+
+    for thread in threads:
+        thread.start()
+
+    deadline = time.monotonic() + 10
+
+    while len(searches._searches) < len(threads):
+        assert time.monotonic() < deadline, 'The searches never started'
+        time.sleep(0.01)
+
+    return threads
+
+
+def finish(thread: _SearchThread, timeout: float = 10) -> list:
+    thread.join(timeout)
+    assert not thread.is_alive(), 'The search was never stopped'
+    return thread.results
+
+
+def test_cancelling_one_kind_of_search_leaves_the_others_running():
+    searches = RunningSearches()
+    regions, countries = start_searches(searches, region_search(), country_search())
+
+    assert searches.cancel(StartRegionSearchEvent.__name__) == 1
+
+    cancelled, = finish(regions)
+    assert isinstance(cancelled, SearchCancelledEvent)
+    assert cancelled.search() == StartRegionSearchEvent.__name__
+    assert cancelled.reason() == 'The search was cancelled'
+
+    time.sleep(0.2)
+    assert countries.is_alive()
+
+    searches.cancel(StartCountrySearchEvent.__name__)
+    finish(countries)
+
+
+def test_cancelling_with_a_generation_stops_only_earlier_searches():
+    searches = RunningSearches()
+    earlier, later = start_searches(searches, region_search(1), region_search(2))
+
+    assert searches.cancel(StartRegionSearchEvent.__name__, 2) == 1
+    assert finish(earlier)[0].generation() == 1
+
+    time.sleep(0.2)
+    assert later.is_alive()
+
+    searches.cancel(StartRegionSearchEvent.__name__, 3)
+    assert finish(later)[0].generation() == 2
+
+
+def test_an_earlier_search_that_starts_after_the_cancellation_never_runs():
+    searches = RunningSearches()
+    searches.cancel(StartRegionSearchEvent.__name__, 5)
+    handled = []
+
+    def handler(connection, event):
+        handled.append(event)
+        yield ErrorEvent('ran')
+
+    connection = sqlite3.connect(':memory:')
+    stale, = searches.run(handler, connection, region_search(4), None)
+    current, = searches.run(handler, connection, region_search(5), None)
+    other_kind, = searches.run(handler, connection, country_search(1), None)
+
+    assert isinstance(stale, SearchCancelledEvent)
+    assert stale.generation() == 4
+    assert isinstance(current, ErrorEvent)
+    assert isinstance(other_kind, ErrorEvent)
+    assert [type(event) for event in handled] == [StartRegionSearchEvent, StartCountrySearchEvent]
+
+
+def test_a_search_past_its_budget_is_stopped():
+    searches = RunningSearches()
+    thread = _SearchThread(searches, region_search(1), budget_seconds = 0.05)
+    thread.start()
+
+    stopped, = finish(thread)
+
+    assert isinstance(stopped, SearchCancelledEvent)
+    assert 'budget of 0.05 seconds' in stopped.reason()
+
+
+def test_a_connection_is_unaffected_by_a_search_that_was_stopped():
+    searches = RunningSearches()
+    thread, = start_searches(searches, region_search())
+    searches.cancel(StartRegionSearchEvent.__name__)
+    finish(thread)
+
+    assert thread.connection.execute('SELECT 1;').fetchone() == (1, )
+    assert searches.cancel(StartRegionSearchEvent.__name__) == 0
+
+
+def test_other_errors_are_not_mistaken_for_cancellations():
+    searches = RunningSearches()
+
+    def failing_search(connection, event):
+        connection.execute('SELECT * FROM no_such_table;')
+        yield from ()
+
+    with pytest.raises(sqlite3.OperationalError):
+        list(searches.run(failing_search, sqlite3.connect(':memory:'), region_search(), None))
+
+
+def test_the_engine_stops_searches_past_the_profiles_budget(engine):
+    engine._handlers[StartRegionSearchEvent] = slow_search
+    engine._search_budget = 0.05
+
+    stopped, = process(engine, region_search(3))
+
+    assert isinstance(stopped, SearchCancelledEvent)
+    assert stopped.generation() == 3
+
+
+def test_the_engine_searches_normally_after_a_cancellation(engine):
+    expected = process(engine, StartRegionSearchEvent(None, None, 'Region 1', None, None, MATCH_PREFIX))
+    process(engine, CancelSearchEvent(StartRegionSearchEvent.__name__))
+
+    assert repr(process(engine, StartRegionSearchEvent(None, None, 'Region 1', None, None, MATCH_PREFIX))) == \
+           repr(expected)
+
+
+
+class _FakeView:
+    def after(self, milliseconds, function):
+        pass
+
+
+
+def test_the_event_bus_cancels_searches_without_a_pool():
+    # Without a pool, every event is processed on the bus's one worker thread, so the
+    # cancellation has to get past the country search it's queued behind to reach the
+    # region search queued behind that.
+    connection = sqlite3.connect(':memory:', check_same_thread = False)
+    make_memory_database().backup(connection)
+    engine = attach_database(Engine(), connection)
+    engine._handlers[StartCountrySearchEvent] = slow_search
+    engine._handlers[StartRegionSearchEvent] = slow_search
+
+    bus = EventBus()
+    bus.register_view(_FakeView())
+    bus.register_engine(engine)
+    bus.enable_worker_mode()
+
+    bus.initiate_event(country_search(1))
+    bus.initiate_event(region_search(1))
+    time.sleep(0.2)
+    bus.initiate_event(CancelSearchEvent(StartCountrySearchEvent.__name__, 2))
+    bus.initiate_event(CancelSearchEvent(StartRegionSearchEvent.__name__, 2))
+
+    results = [bus._results.get(timeout = 10) for _ in range(2)]
+
+    assert [(type(result), result.search()) for result in results] == [
+        (SearchCancelledEvent, StartCountrySearchEvent.__name__),
+        (SearchCancelledEvent, StartRegionSearchEvent.__name__)
+    ]
@@ -0,0 +1,236 @@
+# tests/test_connection_pool.py
+#
+# ICS 33 Winter 2024
+# Project 2: Learning to Fly
+#
+# Checks that searches and loads processed on the pool of read connections, on
+# several threads at once, return the same results as they do one at a time, see
+# what's been saved through the writer, and that the event bus delivers the
+# results of the events in one lane in the order the events were sent.  Opening
+# another database closes every connection to the previous one.
+
+import queue
+import shutil
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from p2app.engine import Engine
+from p2app.events import *
+from p2app.events.event_bus import EventBus
+from tests.conftest import process
+
+
+
+@pytest.fixture
+def pooled_engine(database_path):
+    """An engine that opened the sample database file with the interactive profile."""
+    engine = Engine()
+    results = process(engine, OpenDatabaseEvent(database_path, 'interactive'))
+    assert isinstance(results[0], DatabaseOpenedEvent)
+    yield engine
+    process(engine, CloseDatabaseEvent())
+
+
+def search_events() -> list:
+    return [
+        event
+        for i in range(1, 60)
+        for event in (
+            StartRegionSearchEvent(None, None, 'Region', None, None, MATCH_PREFIX),
+            StartCountrySearchEvent(f'C{i % 20 + 1:03}', None),
+            LoadRegionEvent(i),
+            StartAirportSearchEvent(None, None, None, None, 'a', None, None, MATCH_RANKED))
+    ]
+
+
+def test_the_pool_is_opened_and_events_are_given_lanes(pooled_engine):
+    assert pooled_engine._connections.pool_size() == 4
+    assert pooled_engine.concurrent_lane(StartRegionSearchEvent(None, None, 'x')) == \
+           pooled_engine.concurrent_lane(LoadRegionEvent(1))
+    assert pooled_engine.concurrent_lane(StartRegionSearchEvent(None, None, 'x')) != \
+           pooled_engine.concurrent_lane(LoadCountryEvent(1))
+    assert pooled_engine.concurrent_lane(SaveRegionEvent(None)) is None
+
+
+def test_concurrent_events_return_what_they_return_one_at_a_time(pooled_engine):
+    events = search_events()
+    one_at_a_time = [repr(process(pooled_engine, event)) for event in events]
+
+    with ThreadPoolExecutor(max_workers = 8) as executor:
+        concurrently = list(executor.map(lambda event: repr(process(pooled_engine, event)), events))
+
+    assert concurrently == one_at_a_time
+    assert pooled_engine._connections.statistics().peak_in_use > 1
+
+
+def test_readers_see_what_the_writer_saved(pooled_engine):
+    region = process(pooled_engine, LoadRegionEvent(7))[0].region()
+    process(pooled_engine, SaveRegionEvent(region._replace(name = 'Freshly Saved')))
+
+    results = process(pooled_engine, StartRegionSearchEvent(None, None, 'Freshly Saved'))
+
+    assert [found.region_id for result in results for found in result.regions()] == [7]
+
+
+def test_a_read_only_profile_refuses_saves(database_path):
+    engine = Engine()
+    process(engine, OpenDatabaseEvent(database_path, 'read-only analytics'))
+    region = process(engine, LoadRegionEvent(7))[0].region()
+
+    result, = process(engine, SaveRegionEvent(region._replace(name = 'Not Saved')))
+    process(engine, CloseDatabaseEvent())
+
+    assert isinstance(result, ErrorEvent)
+    assert 'read-only' in result.message()
+
+
+
+@pytest.fixture
+def other_database_path(database_path, tmp_path):
+    """The path of a copy of the sample database file in which region 7 was renamed."""
+    path = tmp_path / 'other.db'
+    shutil.copy(database_path, path)
+    connection = sqlite3.connect(path)
+    connection.execute("UPDATE region SET name = 'Only In The Other' WHERE region_id = 7;")
+    connection.commit()
+    connection.close()
+    return path
+
+
+def assert_closed(connection: sqlite3.Connection) -> None:
+    with pytest.raises(sqlite3.ProgrammingError):
+        connection.execute('SELECT 1;')
+
+
+def test_opening_another_database_closes_the_previous_connections(pooled_engine, other_database_path):
+    writer = pooled_engine._connections.writer()
+    readers = list(pooled_engine._connections._readers)
+
+    results = process(pooled_engine, OpenDatabaseEvent(other_database_path, 'interactive'))
+
+    assert isinstance(results[0], DatabaseOpenedEvent)
+
+    for connection in [writer, *readers]:
+        assert_closed(connection)
+
+    assert pooled_engine._connections.pool_size() == 4
+    assert not set(pooled_engine._connections._readers) & set(readers)
+
+    for _ in range(8):
+        region, = process(pooled_engine, LoadRegionEvent(7))
+        assert region.region().name == 'Only In The Other'
+
+
+def test_switching_profiles_replaces_the_connections_rather_than_adding_to_them(pooled_engine, database_path):
+    writer = pooled_engine._connections.writer()
+    readers = list(pooled_engine._connections._readers)
+
+    for profile_name in ['bulk-load', 'read-only analytics', 'interactive', 'interactive']:
+        results = process(pooled_engine, OpenDatabaseEvent(database_path, profile_name))
+        assert isinstance(results[-1], DatabaseProfileAppliedEvent)
+        assert pooled_engine._connections.pool_size() == results[-1].settings()['reader_count']
+
+        for connection in [writer, *readers]:
+            assert_closed(connection)
+
+        writer = pooled_engine._connections.writer()
+        readers = list(pooled_engine._connections._readers)
+
+
+def test_a_reader_lent_across_a_reopen_is_never_lent_again(pooled_engine, other_database_path):
+    borrowed = threading.Event()
+    release = threading.Event()
+    lent = []
+
+    def borrow():
+        with pooled_engine._connections.reader() as reader:
+            lent.append(reader)
+            borrowed.set()
+            release.wait(10)
+
+    borrower = threading.Thread(target = borrow)
+    borrower.start()
+    borrowed.wait(10)
+    threading.Timer(0.2, release.set).start()
+
+    # The old pool isn't closed until the reader lent from it is returned.
+    start = time.monotonic()
+    results = process(pooled_engine, OpenDatabaseEvent(other_database_path, 'interactive'))
+    borrower.join(10)
+
+    assert isinstance(results[0], DatabaseOpenedEvent)
+    assert time.monotonic() - start >= 0.2
+    assert_closed(lent[0])
+    assert lent[0] not in pooled_engine._connections._readers
+
+
+def test_closing_the_database_releases_anything_waiting_for_a_reader(database_path):
+    engine = Engine()
+    process(engine, OpenDatabaseEvent(database_path, 'interactive'))
+    connections = engine._connections
+    lent = [connections._idle_readers.get() for _ in range(connections.pool_size())]
+    waiting = []
+
+    def wait_for_reader():
+        with connections.reader() as reader:
+            waiting.append(reader)
+
+    def return_readers():
+        for reader in lent:
+            connections._idle_readers.put(reader)
+
+    waiter = threading.Thread(target = wait_for_reader)
+    waiter.start()
+    time.sleep(0.1)
+    threading.Timer(0.1, return_readers).start()
+
+    connections.close()
+    waiter.join(10)
+
+    assert not waiter.is_alive()
+    assert len(waiting) == 1
+    assert waiting[0] is None or waiting[0] in lent
+    assert connections.pool_size() == 0
+
+
+
+class _FakeView:
+    def after(self, milliseconds, function):
+        pass
+
+
+
+def test_the_event_bus_keeps_each_lanes_results_in_order(pooled_engine):
+    bus = EventBus()
+    bus.register_view(_FakeView())
+    bus.register_engine(pooled_engine)
+    bus.enable_worker_mode()
+
+    for region_id in range(1, 40):
+        bus.initiate_event(StartRegionSearchEvent(
+            None, None, 'Region', None, None, MATCH_PREFIX, generation = region_id))
+        bus.initiate_event(LoadRegionEvent(region_id))
+        bus.initiate_event(StartCountrySearchEvent(None, 'Country', None, None, MATCH_PREFIX))
+
+    region_results = []
+    deadline = time.monotonic() + 30
+
+    while len(region_results) < 78 and time.monotonic() < deadline:
+        try:
+            result = bus._results.get(timeout = 0.1)
+        except queue.Empty:
+            continue
+
+        if isinstance(result, RegionSearchResultsEvent):
+            if not region_results or region_results[-1] != ('search', result.generation()):
+                region_results.append(('search', result.generation()))
+        elif isinstance(result, RegionLoadedEvent):
+            region_results.append(('load', result.region().region_id))
+
+    bus.initiate_event(QuitInitiatedEvent())
+
+    assert region_results == [
+        step for region_id in range(1, 40) for step in (('search', region_id), ('load', region_id))
+    ]
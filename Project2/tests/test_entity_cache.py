@@ -0,0 +1,119 @@
+# tests/test_entity_cache.py
+#
+# ICS 33 Winter 2024
+# Project 2: Learning to Fly
+#
+# Checks that the entity cache never hands out a record that's older than what's
+# in the database: saves write through to it, failed saves (including saves of
+# records that don't exist) leave it alone, and it evicts the least recently used
+# records when it's full.
+
+from p2app.engine.entity_cache import EntityCache
+from p2app.events import *
+from tests.conftest import process
+
+
+
+def load_region(engine, region_id: int) -> Region:
+    result, = process(engine, LoadRegionEvent(region_id))
+    assert isinstance(result, RegionLoadedEvent)
+    return result.region()
+
+
+def test_loading_again_after_a_save_returns_the_saved_region(engine):
+    region = load_region(engine, 5)
+    saved = region._replace(name = 'Renamed Region')
+
+    result, = process(engine, SaveRegionEvent(saved))
+    hits_before = engine._cache.statistics().hits
+
+    assert isinstance(result, RegionSavedEvent)
+    assert load_region(engine, 5) == saved
+    assert engine._cache.statistics().hits == hits_before + 1
+
+
+def test_a_failed_save_leaves_the_cached_region_alone(engine):
+    region = load_region(engine, 5)
+    other = load_region(engine, 6)
+
+    duplicate, = process(engine, SaveRegionEvent(region._replace(region_code = other.region_code)))
+    unknown_country, = process(engine, SaveRegionEvent(region._replace(country_id = 999999)))
+
+    assert isinstance(duplicate, SaveRegionFailedEvent)
+    assert isinstance(unknown_country, SaveRegionFailedEvent)
+    assert load_region(engine, 5) == region
+
+
+def test_a_new_region_is_cached_with_its_new_id(engine, database):
+    new_region = Region(None, 'NEW-1', '1', 'New Region', 1, 1, None, None)
+
+    result, = process(engine, SaveNewRegionEvent(new_region))
+    added = result.region()
+
+    assert added.region_id is not None
+    assert load_region(engine, added.region_id) == added
+    assert database.execute('SELECT name FROM region WHERE region_id = ?;', (added.region_id, )).fetchone() == \
+           ('New Region', )
+
+
+def test_saved_continents_and_countries_are_written_through(engine):
+    continent, = process(engine, LoadContinentEvent(1))
+    country, = process(engine, LoadCountryEvent(1))
+
+    saved_continent = continent.continent()._replace(name = 'Renamed Continent')
+    saved_country = country.country()._replace(name = 'Renamed Country')
+    process(engine, SaveContinentEvent(saved_continent))
+    process(engine, SaveCountryEvent(saved_country))
+
+    assert process(engine, LoadContinentEvent(1))[0].continent() == saved_continent
+    assert process(engine, LoadCountryEvent(1))[0].country() == saved_country
+
+
+def test_saving_an_entity_that_does_not_exist_caches_nothing(engine):
+    missing_id = 999999
+    continent = Continent(missing_id, 'ZZ', 'Phantom Continent')
+    country = Country(missing_id, 'ZZ', 'Phantom Country', 1, None, None)
+    region = Region(missing_id, 'ZZ-1', '1', 'Phantom Region', 1, 1, None, None)
+
+    continent_result, = process(engine, SaveContinentEvent(continent))
+    country_result, = process(engine, SaveCountryEvent(country))
+    region_result, = process(engine, SaveRegionEvent(region))
+
+    assert isinstance(continent_result, SaveContinentFailedEvent)
+    assert isinstance(country_result, SaveCountryFailedEvent)
+    assert isinstance(region_result, SaveRegionFailedEvent)
+
+    for load_event in [LoadContinentEvent(missing_id), LoadCountryEvent(missing_id), LoadRegionEvent(missing_id)]:
+        assert isinstance(process(engine, load_event)[0], ErrorEvent)
+
+    assert engine._reference_tables.continent(missing_id) is None
+    assert engine._reference_tables.country(missing_id) is None
+
+    # Nor can anything refer to the continent or country as though they existed.
+    new_region = Region(None, 'ZZ-2', '2', 'New Region', missing_id, missing_id, None, None)
+    assert isinstance(process(engine, SaveNewRegionEvent(new_region))[0], SaveRegionFailedEvent)
+
+
+def test_a_load_never_replaces_a_saved_entity():
+    cache = EntityCache()
+    saved = Region(1, 'R-1', '1', 'Saved', 1, 1, None, None)
+
+    cache.put(saved)
+    cache.put_if_absent(saved._replace(name = 'Read before the save'))
+
+    assert cache.get(Region, 1) == saved
+
+
+def test_the_least_recently_used_entity_is_evicted():
+    cache = EntityCache(capacity = 2)
+    regions = [Region(i, f'R-{i}', str(i), f'Region {i}', 1, 1, None, None) for i in range(3)]
+
+    cache.put(regions[0])
+    cache.put(regions[1])
+    cache.get(Region, 0)
+    cache.put(regions[2])
+
+    assert cache.get(Region, 0) == regions[0]
+    assert cache.get(Region, 1) is None
+    assert cache.get(Region, 2) == regions[2]
+    assert cache.get(Country, 0) is None
@@ -0,0 +1,110 @@
+# tests/test_frequency_index.py
+#
+# ICS 33 Winter 2024
+# Project 2: Learning to Fly
+#
+# Checks that the frequency index finds exactly the frequencies in a range, and
+# that it's rebuilt after frequencies are added, changed, or deleted, whether
+# through the engine's own connection or through another one.
+
+import sqlite3
+import pytest
+from p2app.engine import Engine
+from p2app.events import *
+from benchmarks._support import attach_database, make_memory_database
+from tests.conftest import process
+
+
+
+@pytest.fixture
+def frequency_database(tmp_path):
+    """A database file holding sample airports, navigation aids, and frequencies."""
+    path = tmp_path / 'frequencies.db'
+    sample = make_memory_database(countries = 20, regions = 200, airports = 300, navaids = 200, frequencies = 1000)
+    connection = sqlite3.connect(path)
+    sample.backup(connection)
+    sample.close()
+    yield path, connection
+    connection.close()
+
+
+@pytest.fixture
+def frequency_engine(frequency_database):
+    """An engine whose open database is the sample frequency database."""
+    path, connection = frequency_database
+    return attach_database(Engine(), connection)
+
+
+def found(engine, low: float, high: float, unit: str = FREQUENCY_MHZ, frequency_type: str | None = None) -> list:
+    results = process(engine, FindFrequenciesEvent(low, high, unit, frequency_type))
+    assert all(isinstance(result, FrequencyFoundEvent) for result in results)
+    return [(result.match().source, result.match().record_id) for result in results]
+
+
+def expected(connection, low_mhz: float, high_mhz: float, frequency_type: str | None = None) -> list:
+    """Finds the frequencies in a range the slow way, ordered as the index orders them."""
+    rows = connection.execute(
+        'SELECT frequency_mhz, 0, airport_frequency_id, type FROM airport_frequency '
+        'WHERE frequency_mhz BETWEEN ? AND ? '
+        'UNION ALL '
+        'SELECT frequency_khz / 1000.0, 1, navigation_aid_id, type FROM navigation_aid '
+        'WHERE frequency_khz / 1000.0 BETWEEN ? AND ? '
+        'ORDER BY 1, 2, 3;', (low_mhz, high_mhz, low_mhz, high_mhz)).fetchall()
+
+    sources = [FREQUENCY_SOURCE_AIRPORT, FREQUENCY_SOURCE_NAVAID]
+
+    return [
+        (sources[source], record_id) for frequency, source, record_id, record_type in rows
+        if frequency_type in (None, record_type)
+    ]
+
+
+@pytest.mark.parametrize('low, high', [(118.0, 118.5), (108.0, 137.0), (121.5, 121.5), (200.0, 300.0)])
+def test_finds_exactly_the_frequencies_in_a_range(frequency_engine, frequency_database, low, high):
+    path, connection = frequency_database
+    assert found(frequency_engine, low, high) == expected(connection, low, high)
+
+
+def test_kilohertz_and_type_filters(frequency_engine, frequency_database):
+    path, connection = frequency_database
+
+    assert found(frequency_engine, 118000, 119000, FREQUENCY_KHZ) == expected(connection, 118.0, 119.0)
+    assert found(frequency_engine, 118.0, 137.0, frequency_type = 'TWR') == \
+           expected(connection, 118.0, 137.0, 'TWR')
+
+
+def test_writes_through_the_engines_connection_are_seen(frequency_engine, frequency_database):
+    path, connection = frequency_database
+    found(frequency_engine, 100.0, 140.0)
+
+    connection.execute(
+        "INSERT INTO airport_frequency (airport_frequency_id, airport_id, type, description, frequency_mhz) "
+        "VALUES (5000, 1, 'TWR', 'New', 136.975);")
+    connection.execute('UPDATE airport_frequency SET frequency_mhz = 136.95 WHERE airport_frequency_id = 1;')
+    connection.execute('DELETE FROM airport_frequency WHERE airport_frequency_id = 2;')
+    connection.commit()
+
+    assert (FREQUENCY_SOURCE_AIRPORT, 5000) in found(frequency_engine, 136.975, 136.975)
+    assert found(frequency_engine, 136.95, 136.95) == expected(connection, 136.95, 136.95)
+    assert found(frequency_engine, 100.0, 140.0) == expected(connection, 100.0, 140.0)
+
+
+def test_writes_through_another_connection_are_seen(frequency_engine, frequency_database):
+    path, connection = frequency_database
+    found(frequency_engine, 100.0, 140.0)
+
+    other = sqlite3.connect(path)
+    other.execute('UPDATE navigation_aid SET frequency_khz = 117950 WHERE navigation_aid_id = 1;')
+    other.commit()
+    other.close()
+
+    assert (FREQUENCY_SOURCE_NAVAID, 1) in found(frequency_engine, 117.95, 117.95)
+    assert found(frequency_engine, 100.0, 140.0) == expected(connection, 100.0, 140.0)
+
+
+def test_bad_ranges_fail(frequency_engine):
+    reversed_range, = process(frequency_engine, FindFrequenciesEvent(120.0, 110.0))
+    unknown_unit, = process(frequency_engine, FindFrequenciesEvent(110.0, 120.0, 'GHz'))
+
+    assert isinstance(reversed_range, FindFrequenciesFailedEvent)
+    assert isinstance(unknown_unit, FindFrequenciesFailedEvent)
@@ -0,0 +1,117 @@
+# tests/test_paging.py
+#
+# ICS 33 Winter 2024
+# Project 2: Learning to Fly
+#
+# Checks that paging through a search with continuations returns exactly the
+# results of the same search unpaged, in the same order, with no duplicates or gaps,
+# whether it's matched exactly, by prefix, or by rank (with the full-text index or
+# with the LIKE patterns used without it).
+
+import pytest
+from p2app.events import *
+from tests.conftest import process
+
+
+
+_SHARED_NAME = 'Shared Name'
+_SHARED_COUNT = 150
+_KEYWORDS = [None, 'shared', 'shared, shared places', 'elsewhere']
+
+
+@pytest.fixture
+def shared_regions(database):
+    """Adds regions that all have the same name, scattered among the others by id.  Some
+    of them also have keywords, so a ranked search scores them differently, while the
+    rest tie."""
+    database.executemany(
+        'INSERT INTO region (region_id, region_code, local_code, name, continent_id, country_id, keywords) '
+        'VALUES (?, ?, ?, ?, 1, 1, ?);',
+        [(1000 + i * 3, f'SH-{i}', str(i), _SHARED_NAME, _KEYWORDS[i % len(_KEYWORDS)])
+         for i in range(_SHARED_COUNT)])
+
+    database.commit()
+
+
+def search_pages(engine, make_search, page_size: int | None) -> tuple[list[int], int]:
+    """Runs a region search one page at a time, following each page's continuation, and
+    returns the ids of every region found, in order, along with the number of pages."""
+    region_ids = []
+    continuation = None
+    pages = 0
+
+    while True:
+        pages += 1
+        continuation_seen = None
+
+        for result in process(engine, make_search(page_size, continuation)):
+            if isinstance(result, RegionSearchResultsEvent):
+                region_ids.extend(region.region_id for region in result.regions())
+            elif isinstance(result, RegionSearchMoreResultsEvent):
+                continuation_seen = result.continuation()
+            else:
+                pytest.fail(f'Unexpected result: {result}')
+
+        if continuation_seen is None:
+            return region_ids, pages
+
+        continuation = continuation_seen
+
+
+def exact_name_search(page_size, continuation):
+    return StartRegionSearchEvent(None, None, _SHARED_NAME, page_size, continuation)
+
+
+@pytest.mark.parametrize('page_size', [1, 7, 100, _SHARED_COUNT - 1, _SHARED_COUNT, _SHARED_COUNT + 1])
+def test_keyset_pages_cover_the_unpaged_results(engine, shared_regions, page_size):
+    expected, _ = search_pages(engine, exact_name_search, None)
+    found, pages = search_pages(engine, exact_name_search, page_size)
+
+    assert len(expected) == _SHARED_COUNT
+    assert found == expected
+    assert pages == -(-_SHARED_COUNT // page_size)
+
+
+def test_page_ends_with_a_continuation_only_when_more_results_remain(engine, shared_regions):
+    results = process(engine, exact_name_search(_SHARED_COUNT, None))
+
+    assert not any(isinstance(result, RegionSearchMoreResultsEvent) for result in results)
+    assert sum(len(result.regions()) for result in results) == _SHARED_COUNT
+
+
+def name_search(match_mode: str):
+    def make_search(page_size, continuation):
+        return StartRegionSearchEvent(None, None, 'shar', page_size, continuation, match_mode)
+
+    return make_search
+
+
+@pytest.mark.parametrize('is_full_text_indexed', [True, False])
+@pytest.mark.parametrize('match_mode', [MATCH_PREFIX, MATCH_RANKED])
+@pytest.mark.parametrize('page_size', [1, 7, _SHARED_COUNT - 1, _SHARED_COUNT + 1])
+def test_matched_pages_cover_the_unpaged_results(
+        engine, shared_regions, is_full_text_indexed, match_mode, page_size):
+    if is_full_text_indexed:
+        assert isinstance(process(engine, BuildFullTextIndexEvent())[-1], FullTextIndexBuiltEvent)
+
+    expected, _ = search_pages(engine, name_search(match_mode), None)
+    found, _ = search_pages(engine, name_search(match_mode), page_size)
+
+    assert sorted(expected) == sorted(range(1000, 1000 + _SHARED_COUNT * 3, 3))
+    assert found == expected
+
+
+def test_a_ranked_search_continues_after_the_full_text_index_is_dropped(engine, shared_regions):
+    process(engine, BuildFullTextIndexEvent())
+    first_page = process(engine, name_search(MATCH_RANKED)(10, None))
+    continuation = first_page[-1].continuation()
+
+    process(engine, DropFullTextIndexEvent())
+    rest = [
+        region.region_id
+        for result in process(engine, name_search(MATCH_RANKED)(None, continuation))
+        for region in result.regions()
+    ]
+
+    assert isinstance(continuation, tuple)
+    assert rest and all(region_id > continuation[1] for region_id in rest)
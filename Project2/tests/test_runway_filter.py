@@ -0,0 +1,51 @@
+# tests/test_runway_filter.py
+#
+# ICS 33 Winter 2024
+# Project 2: Learning to Fly
+#
+# Checks that an airport search filtered by runways fails with an event the user
+# interface can tell apart from an error until the runway summary is built, and
+# then finds the airports whose runways match.
+
+from p2app.events import *
+from tests.conftest import process
+
+
+
+def runway_search(generation: int) -> StartAirportSearchEvent:
+    return StartAirportSearchEvent(
+        None, None, None, None, None, runway_filter = RunwayFilter(1000, True, False),
+        generation = generation)
+
+
+def add_runways(database) -> None:
+    """Gives a few airports runways, of which only airports 2 and 5 have a long paved one."""
+    database.executemany(
+        'INSERT INTO runway (airport_id, length_ft, surface, lighted, closed) VALUES (?, ?, ?, ?, ?);',
+        [(1, 800, 'ASPH', 1, 0),          # too short
+         (2, 3000, 'Concrete', 0, 0),
+         (3, 4000, 'TURF', 1, 0),         # not paved
+         (4, 5000, 'ASP', 1, 1),          # closed
+         (5, 900, 'GRVL', 0, 0),
+         (5, 1200, 'asphalt', 0, 0)])
+    database.commit()
+
+
+def test_a_runway_search_fails_until_the_summary_is_built(engine):
+    failed, = process(engine, runway_search(7))
+
+    assert isinstance(failed, AirportSearchFailedEvent)
+    assert failed.generation() == 7
+    assert 'runway summary' in failed.reason()
+
+
+def test_a_runway_search_finds_airports_once_the_summary_is_built(engine, database):
+    add_runways(database)
+    rebuilt, = process(engine, RebuildRunwaySummaryEvent())
+    assert isinstance(rebuilt, RunwaySummaryRebuiltEvent)
+
+    results = process(engine, runway_search(8))
+
+    assert all(isinstance(result, AirportSearchResultsEvent) for result in results)
+    assert all(result.generation() == 8 for result in results)
+    assert sorted(airport.airport_id for result in results for airport in result.airports()) == [2, 5]
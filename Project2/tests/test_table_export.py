@@ -0,0 +1,72 @@
+# tests/test_table_export.py
+#
+# ICS 33 Winter 2024
+# Project 2: Learning to Fly
+#
+# Checks that a table export writes every matching row, and that an export that
+# fails or is abandoned part of the way through leaves no file behind, neither the
+# requested one nor the partial one it was being written to.
+
+import json
+import pytest
+import p2app.engine.table_export
+from p2app.events import *
+from tests.conftest import process
+
+
+
+@pytest.fixture
+def small_chunks(monkeypatch):
+    """Makes exports write a few rows at a time, so they yield several progress events."""
+    monkeypatch.setattr(p2app.engine.table_export, '_CHUNK_SIZE', 50)
+
+
+def left_behind(tmp_path) -> list[str]:
+    return sorted(path.name for path in tmp_path.iterdir())
+
+
+def test_an_export_writes_every_matching_row(engine, database, tmp_path, small_chunks):
+    path = tmp_path / 'regions.jsonl'
+
+    results = process(engine, StartTableExportEvent('region', path, {'continent_id': 1}))
+
+    assert isinstance(results[-1], TableExportCompletedEvent)
+    assert left_behind(tmp_path) == ['regions.jsonl']
+
+    with path.open(encoding = 'utf-8') as file:
+        rows = [json.loads(line) for line in file]
+
+    expected = database.execute('SELECT COUNT(*) FROM region WHERE continent_id = 1;').fetchone()[0]
+    assert len(rows) == results[-1].rows_written() == expected > 0
+    assert all(row['continent_id'] == 1 for row in rows)
+
+
+def test_an_abandoned_export_leaves_no_file_behind(engine, tmp_path, small_chunks):
+    export = engine.process_event(StartTableExportEvent('airport', tmp_path / 'airports.csv'))
+
+    assert isinstance(next(export), TableExportProgressEvent)
+    assert left_behind(tmp_path) == ['airports.csv.part']
+
+    export.close()
+
+    assert left_behind(tmp_path) == []
+
+
+def test_an_export_that_fails_to_read_leaves_no_file_behind(engine, database, tmp_path, small_chunks):
+    calls = 0
+
+    def interrupt_eventually():
+        nonlocal calls
+        calls += 1
+        return calls > 20
+
+    database.set_progress_handler(interrupt_eventually, 10)
+
+    try:
+        results = process(engine, StartTableExportEvent('airport', tmp_path / 'airports.csv.gz'))
+    finally:
+        database.set_progress_handler(None, 0)
+
+    assert isinstance(results[-1], TableExportFailedEvent)
+    assert 'Could not read airport' in results[-1].reason()
+    assert left_behind(tmp_path) == []